@@ -0,0 +1,55 @@
+"""
+Compara o modo completo e o modo leve do navegador usado pelo Expresso.
+
+Para cada modo faz login, abre a visão mensal, lê os eventos e mostra o
+tempo de carregamento da página, o heap do JavaScript e a memória RSS do
+Chrome (esta última apenas com psutil instalado).
+
+Uso:
+    EXPRESSO_USUARIO=... EXPRESSO_SENHA=... python benchmark_expresso_navegador.py
+"""
+import os
+import sys
+import time
+
+from vcard_sync2 import sincronizarExpresso
+
+
+def medir_modo(usuario, senha, modo_leve):
+    """Executa o fluxo de leitura do calendário em um modo e retorna as métricas"""
+    expresso = sincronizarExpresso(usuario, senha, modo_leve=modo_leve)
+    try:
+        inicio = time.perf_counter()
+        expresso.login()
+        expresso.selecionarCalendario()
+        eventos = expresso.obterEventos()
+        metricas = expresso.metricas_navegador()
+        metricas["eventos"] = len(eventos)
+        metricas["total_s"] = round(time.perf_counter() - inicio, 1)
+        return metricas
+    finally:
+        expresso.fechar()
+
+
+def main():
+    usuario = os.environ.get("EXPRESSO_USUARIO")
+    senha = os.environ.get("EXPRESSO_SENHA")
+    if not usuario or not senha:
+        print("Defina EXPRESSO_USUARIO e EXPRESSO_SENHA para executar o benchmark")
+        return 1
+
+    resultados = [medir_modo(usuario, senha, modo_leve) for modo_leve in (False, True)]
+
+    colunas = ["modo", "eventos", "total_s", "dom_pronto_ms", "carregamento_ms", "heap_js_mb", "rss_mb"]
+    print("\n" + "  ".join(f"{coluna:>15}" for coluna in colunas))
+    for metricas in resultados:
+        print("  ".join(f"{str(metricas.get(coluna)):>15}" for coluna in colunas))
+
+    if resultados[0]["eventos"] != resultados[1]["eventos"]:
+        print("ATENÇÃO: os dois modos encontraram quantidades diferentes de eventos")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,153 @@
+"""
+Benchmark do parser da página do calendário do Expresso, sem navegador.
+
+Usa uma página salva pela captura de diagnóstico (--arquivo; por padrão a
+captura amostrada mais recente em capturas_expresso) e páginas mensais
+sintéticas com centenas de eventos. Para cada página mostra o tempo de
+extração por evento e o pico de memória (alocações do Python, medidas
+com tracemalloc), e confere se os eventos seguem o
+formato retornado por obterEventos.
+
+Uso:
+    python benchmark_expresso_parser.py [--arquivo pagina.html] [--eventos 100 500 1000]
+"""
+import argparse
+import glob
+import os
+import re
+import sys
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+from expresso_diagnostico import DIRETORIO_CAPTURAS
+from expresso_parser import extrair_eventos_html
+
+# Campos de cada evento retornado por obterEventos
+CAMPOS_EVENTO = {
+    "id",
+    "data",
+    "inicio",
+    "fim",
+    "titulo",
+    "descricao",
+    "url",
+    "participantes",
+}
+
+ENTRADA_SINTETICA = """
+<td class="calendar_m_w_tablecell" colspan="1" width="14%" bgcolor="#ffffff">
+<div id="calendar_event_entry" style="overflow:hidden;">
+<a class="event_entry" href="/index.php?menuaction=calendar.uicalendar.view&amp;cal_id={cal_id}&amp;date={data}" title=" Sala {n}"><br>
+ <img src="/calendar/templates/default/images/recur.png" width="12" height="12" title="evento recorrente" border="0">
+ <img src="/calendar/templates/default/images/multi_3.png" width="14" height="14" title="Participante {n} [participante.{n}] (A),
+Outro Participante [outro.participante] (S)" border="0">
+&nbsp;<font size="1"><span style="color: black">{inicio}-{fim}</span>  (S)<br><b>Evento sintético {n}</b><br><i>Descrição do evento {n}</i> <br><b>Local:</b> Sala {n}
+</font></a><font size="1">
+</font></div></td>"""
+
+
+def gerar_pagina_sintetica(quantidade):
+    """Monta uma página mensal com a quantidade de eventos pedida"""
+    inicio_mes = date.today().replace(day=1)
+    entradas = []
+    for n in range(quantidade):
+        dia = inicio_mes + timedelta(days=n % 28)
+        hora = 8 + n % 10
+        entradas.append(
+            ENTRADA_SINTETICA.format(
+                cal_id=300000 + n,
+                data=dia.strftime("%Y%m%d"),
+                n=n,
+                inicio=f"{hora:02d}:00",
+                fim=f"{hora + 1:02d}:30",
+            )
+        )
+    return (
+        "<html><body><table><tr>" + "".join(entradas) + "</tr></table></body></html>"
+    )
+
+
+def validar_eventos(eventos):
+    """Retorna a lista de problemas encontrados no formato dos eventos"""
+    problemas = []
+    for i, evento in enumerate(eventos):
+        if set(evento) != CAMPOS_EVENTO:
+            problemas.append(f"evento {i}: campos {sorted(evento)}")
+            continue
+        if not all(isinstance(valor, str) for valor in evento.values()):
+            problemas.append(f"evento {i}: valores que não são texto")
+        if not evento["id"]:
+            problemas.append(f"evento {i}: sem id")
+        if not re.fullmatch(r"\d{2}/\d{2}/\d{4}", evento["data"]):
+            problemas.append(f"evento {i}: data inválida {evento['data']!r}")
+        for campo in ("inicio", "fim"):
+            if evento[campo] and not re.fullmatch(r"\d{1,2}:\d{2}", evento[campo]):
+                problemas.append(f"evento {i}: {campo} inválido {evento[campo]!r}")
+        if not evento["url"].startswith("https://"):
+            problemas.append(f"evento {i}: url não é absoluta {evento['url']!r}")
+    return problemas
+
+
+def medir(nome, html, repeticoes):
+    """Extrai os eventos da página e imprime tempo por evento e pico de memória"""
+    # Quantidade de entradas na página, para conferir se nenhuma foi perdida
+    esperados = html.count('id="calendar_event_entry"')
+
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        eventos = extrair_eventos_html(html)
+    duracao = (time.perf_counter() - inicio) / repeticoes
+
+    tracemalloc.start()
+    extrair_eventos_html(html)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    problemas = validar_eventos(eventos)
+    if len(eventos) != esperados:
+        problemas.append(f"{len(eventos)} eventos extraídos, {esperados} esperados")
+
+    por_evento = duracao / len(eventos) * 1000 if eventos else 0
+    print(
+        f"{nome:<28} {len(eventos):>6} eventos  {duracao * 1000:>9.2f} ms  "
+        f"{por_evento:>8.3f} ms/evento  pico {pico / 1024:>9.1f} KiB"
+    )
+    for problema in problemas:
+        print(f"  ERRO: {problema}")
+    return not problemas
+
+
+def captura_mais_recente():
+    """Retorna a última página do calendário salva pela amostragem, se houver"""
+    # Capturas de erro terminam em _erro_calendario.html e ficam de fora
+    capturas = sorted(glob.glob(os.path.join(DIRETORIO_CAPTURAS, "*[0-9]_calendario.html")))
+    return capturas[-1] if capturas else "pagina_calendario.html"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--arquivo", default=captura_mais_recente())
+    parser.add_argument("--eventos", type=int, nargs="+", default=[100, 500, 1000])
+    parser.add_argument("--repeticoes", type=int, default=5)
+    args = parser.parse_args()
+
+    ok = True
+    if os.path.exists(args.arquivo):
+        with open(args.arquivo, encoding="utf-8") as f:
+            ok &= medir(args.arquivo, f.read(), args.repeticoes)
+    else:
+        print(f"Arquivo {args.arquivo} não encontrado, usando apenas páginas sintéticas")
+
+    for quantidade in args.eventos:
+        ok &= medir(
+            f"sintética ({quantidade})",
+            gerar_pagina_sintetica(quantidade),
+            args.repeticoes,
+        )
+
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,72 +1,97 @@
 # calendar_synchronizer.py
 from database import DatabaseManager
+from mapping_index import MappingIndex, SOURCES
+from event_match_index import EventMatchIndex
+from normalized_event import NormalizedEvent, content_hashes, expresso_local_datetime, parse_datetime_utc
 from datetime import datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
 import time
-import re
 import json
 
 # Adicione/modifique estas partes no arquivo calendar_synchronizer.py
 
 
 class CalendarSynchronizer:
-    def __init__(self, google_sync, outlook_sync, expresso_sync=None):
+    # Tempo máximo, em segundos, para obter os eventos de cada calendário
+    FETCH_TIMEOUTS = {"google": 60, "outlook": 60, "expresso": 120}
+
+    def __init__(
+        self,
+        google_sync,
+        outlook_sync,
+        expresso_sync=None,
+        use_incremental_sync=True,
+        fetch_timeouts=None,
+    ):
         self.google_sync = google_sync
         self.outlook_sync = outlook_sync
         self.expresso_sync = expresso_sync  # Pode ser None se não estiver usando
 
+        # Buscar apenas as alterações (syncToken do Google, delta do Outlook)
+        # em vez da listagem completa
+        self.use_incremental_sync = use_incremental_sync
+
+        # Os três calendários são consultados ao mesmo tempo, cada um com seu timeout
+        self.fetch_timeouts = dict(self.FETCH_TIMEOUTS, **(fetch_timeouts or {}))
+        self.fetch_executor = ThreadPoolExecutor(
+            max_workers=len(self.FETCH_TIMEOUTS), thread_name_prefix="fetch"
+        )
+        # Buscas que estouraram o timeout e ainda estão rodando, por provedor
+        self.pending_fetches = {}
+
         # Inicializar o gerenciador de banco de dados
         self.db = DatabaseManager()
 
         # Manter estas propriedades para compatibilidade com código existente
         self.google_events_cache = {}
         self.outlook_events_cache = {}
+        self._load_caches_from_db()
         self.last_sync_time = datetime.now()
-        self.google_to_outlook_map = {}
-        self.outlook_to_google_map = {}
+
+        # Mapeamentos entre os IDs dos três calendários, carregados uma vez do banco
+        self.mappings = MappingIndex(self.db)
+
+        # Índices de duplicados por calendário e eventos do Expresso do ciclo atual
+        self._match_indexes = {}
+        self._cycle_expresso_events = None
+        # Visão normalizada de cada evento lido, por (calendário, id)
+        self.normalized_events = {}
+        # Último hash de conteúdo gravado de cada evento, por calendário
+        self.content_hashes = {source: self.db.get_content_hashes(source) for source in SOURCES}
+        # Hash do último payload de atualização aceito, por (calendário, id)
+        self.sent_hashes = {}
 
     def _update_caches(self):
         """Atualiza os caches com o estado atual dos calendários"""
         # Obter eventos atuais - usar data atual para pegar eventos recentes
         today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-        google_events = self.google_sync.list_events(today)
-        outlook_events = self.outlook_sync.list_events(today)
+        fetched = self._fetch_all_providers(today)
+
+        # Um calendário que não respondeu a tempo mantém o cache anterior
+        # O token vem junto com o resultado, lido pela própria busca ao terminar
+        # e só é salvo depois dos eventos, que recompõem o cache ao reiniciar
+        tokens = []
+        if "google" in fetched:
+            new_google_cache, google_events, google_token = fetched["google"]
+            tokens.append(("google", self.google_sync.calendar_id, google_token, None))
+        else:
+            new_google_cache, google_events = self.google_events_cache, []
+
+        if "outlook" in fetched:
+            new_outlook_cache, outlook_events, (outlook_token, window_start) = fetched["outlook"]
+            tokens.append(("outlook", self.outlook_sync.calendar_id, outlook_token, window_start))
+        else:
+            new_outlook_cache, outlook_events = self.outlook_events_cache, []
 
         # Adicionado suporte para Expresso (opcional)
-        expresso_events = []
-        if hasattr(self, "expresso_sync") and self.expresso_sync:
-            expresso_events = self.expresso_sync.obterEventos()
+        expresso_events = fetched.get("expresso", [])
 
         print(
-            f"Eventos encontrados - Google: {len(google_events)}, Outlook: {len(outlook_events)}"
+            f"Eventos encontrados - Google: {len(new_google_cache)}, Outlook: {len(new_outlook_cache)}"
         )
-        if hasattr(self, "expresso_sync") and self.expresso_sync:
+        if "expresso" in fetched:
             print(f"Eventos encontrados - Expresso: {len(expresso_events)}")
 
-        # Armazenar todos os eventos no banco de dados
-        for event in google_events:
-            if "id" in event:
-                self.db.store_google_event(event)
-
-        for event in outlook_events:
-            if "id" in event:
-                self.db.store_outlook_event(event)
-
-        if hasattr(self, "expresso_sync") and self.expresso_sync:
-            for event in expresso_events:
-                if "id" in event:
-                    self.db.store_expresso_event(event)
-
-        # Para compatibilidade com o código existente, ainda atualizar os caches
-        new_google_cache = {}
-        for event in google_events:
-            if "id" in event:
-                new_google_cache[event["id"]] = event
-
-        new_outlook_cache = {}
-        for event in outlook_events:
-            if "id" in event:
-                new_outlook_cache[event["id"]] = event
-
         # Continuação da lógica existente para detectar mudanças...
         google_added = {
             id: event
@@ -77,7 +102,7 @@ class CalendarSynchronizer:
             id: event
             for id, event in new_google_cache.items()
             if id in self.google_events_cache
-            and self._is_event_updated(event, self.google_events_cache[id])
+            and self._is_event_updated(event, self.google_events_cache[id], "google")
         }
         google_deleted = {
             id: self.google_events_cache[id]
@@ -94,7 +119,7 @@ class CalendarSynchronizer:
             id: event
             for id, event in new_outlook_cache.items()
             if id in self.outlook_events_cache
-            and self._is_event_updated(event, self.outlook_events_cache[id])
+            and self._is_event_updated(event, self.outlook_events_cache[id], "outlook")
         }
         outlook_deleted = {
             id: self.outlook_events_cache[id]
@@ -102,6 +127,37 @@ class CalendarSynchronizer:
             if id not in new_outlook_cache
         }
 
+        # O Expresso não tem data de modificação: só conta como atualizado o
+        # evento cujo hash de conteúdo mudou desde a última leitura gravada.
+        # As ocorrências de um evento recorrente (mesmo ID) formam um só hash
+        expresso_hashes = self._content_hashes("expresso", expresso_events)
+        expresso_updated = {
+            event["id"]: event
+            for event in expresso_events
+            if "id" in event
+            and self.content_hashes["expresso"].get(event["id"])
+            not in (None, expresso_hashes[event["id"]])
+        }
+
+        # Armazenar os eventos no banco de dados (do Google e Outlook, apenas os alterados),
+        # uma transação por calendário, depois de comparar com os hashes anteriores
+        self._store_events("google", google_events)
+        self._store_events("outlook", outlook_events)
+        self._store_events("expresso", expresso_events, expresso_hashes)
+
+        # Eventos que saíram do calendário (e não só da janela, por já terem
+        # terminado) não podem voltar ao cache na próxima inicialização
+        self.db.mark_events_deleted(
+            "google",
+            [id for id, event in google_deleted.items() if not self._event_ends_before(event, today)],
+        )
+        self.db.mark_events_deleted(
+            "outlook",
+            [id for id, event in outlook_deleted.items() if not self._event_ends_before(event, today)],
+        )
+        for source, calendar_id, token, window_start in tokens:
+            self._store_sync_token(source, calendar_id, token, window_start)
+
         # Debug info
         if google_added:
             print(f"Novos eventos detectados no Google: {len(google_added)}")
@@ -113,13 +169,25 @@ class CalendarSynchronizer:
             for id, event in outlook_added.items():
                 print(f"  - {event.get('subject', 'Sem título')} ({id})")
 
+        if expresso_updated:
+            print(f"Eventos alterados no Expresso: {len(expresso_updated)}")
+
         # Atualizar caches
         self.google_events_cache = new_google_cache
         self.outlook_events_cache = new_outlook_cache
-        self.last_sync_time = datetime.now()
 
-        # Reconstruir os mapas baseado no banco de dados
-        self._rebuild_maps_from_db()
+        # Descartar as visões normalizadas de eventos que saíram dos caches
+        current_ids = {
+            "google": new_google_cache,
+            "outlook": new_outlook_cache,
+            "expresso": {event.get("id") for event in expresso_events},
+        }
+        self.normalized_events = {
+            key: record
+            for key, record in self.normalized_events.items()
+            if key[1] in current_ids[key[0]]
+        }
+        self.last_sync_time = datetime.now()
 
         return {
             "google": {
@@ -132,38 +200,220 @@ class CalendarSynchronizer:
                 "updated": outlook_updated,
                 "deleted": outlook_deleted,
             },
+            "expresso": {"updated": expresso_updated},
+        }
+
+    def _fetch_all_providers(self, today):
+        """
+        Busca os eventos do Google, do Outlook e do Expresso em paralelo.
+
+        Cada provedor tem seu próprio timeout (self.fetch_timeouts). Quem não
+        responde a tempo fica de fora do ciclo e não é consultado de novo
+        enquanto a busca anterior não terminar. O banco de dados só é acessado
+        nesta thread, já que a conexão SQLite não pode ser compartilhada.
+
+        Returns:
+            dict: Resultado de cada provedor que respondeu a tempo
+        """
+        # Descartar as buscas atrasadas que já terminaram; o token não foi
+        # salvo, então as mesmas alterações voltam na próxima busca
+        for provider, future in list(self.pending_fetches.items()):
+            if future.done():
+                del self.pending_fetches[provider]
+
+        tasks = {
+            "google": (
+                self._fetch_google_events,
+                today,
+                self._get_sync_token(
+                    "google", self.google_sync.calendar_id, self.google_events_cache
+                ),
+            ),
+            "outlook": (
+                self._fetch_outlook_events,
+                today,
+                self._get_sync_token(
+                    "outlook", self.outlook_sync.calendar_id, self.outlook_events_cache
+                ),
+                self._get_sync_window_start("outlook", self.outlook_sync.calendar_id),
+            ),
         }
+        if getattr(self, "expresso_sync", None):
+            tasks["expresso"] = (self.expresso_sync.obterEventos,)
+
+        futures = {}
+        for provider, (fetch, *args) in tasks.items():
+            if provider in self.pending_fetches:
+                print(f"Busca anterior do {provider.capitalize()} ainda em andamento, mantendo o cache")
+                continue
+            futures[provider] = self.fetch_executor.submit(fetch, *args)
+
+        results = {}
+        start = time.monotonic()
+        for provider in sorted(futures, key=lambda p: self.fetch_timeouts[p]):
+            remaining = self.fetch_timeouts[provider] - (time.monotonic() - start)
+            try:
+                results[provider] = futures[provider].result(timeout=max(remaining, 0))
+            except FuturesTimeoutError:
+                print(
+                    f"Tempo esgotado ({self.fetch_timeouts[provider]}s) ao buscar eventos do "
+                    f"{provider.capitalize()}, mantendo o cache anterior"
+                )
+                self.pending_fetches[provider] = futures[provider]
+            except Exception as e:
+                print(f"Erro ao buscar eventos do {provider.capitalize()}: {e}")
+
+        return results
+
+    def _load_caches_from_db(self):
+        """
+        Recompõe os caches do Google e do Outlook a partir dos eventos gravados.
+
+        Com o cache recomposto, o token salvo no banco pode ser usado logo na
+        primeira busca após reiniciar, em vez de uma listagem completa. Se o
+        banco não tiver o JSON de todos os eventos ativos, os caches ficam
+        vazios e a primeira busca é completa.
+        """
+        if not self.use_incremental_sync:
+            return
+        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        for source in ("google", "outlook"):
+            events = self.db.get_cached_events(source)
+            if not events:
+                continue
+            cache = {
+                event["id"]: event
+                for event in events
+                if "id" in event and not self._event_ends_before(event, today)
+            }
+            setattr(self, f"{source}_events_cache", cache)
+            print(f"Cache do {source.capitalize()} recomposto do banco: {len(cache)} eventos")
+
+    def _get_sync_token(self, source, calendar_id, current_cache):
+        """Lê do banco o token incremental de um calendário, se houver cache para aplicá-lo"""
+        # Sem cache em memória não há base para aplicar as alterações
+        if not self.use_incremental_sync or not current_cache:
+            return None
+        return self.db.get_sync_token(source, calendar_id)
+
+    def _get_sync_window_start(self, source, calendar_id):
+        """Lê do banco o início da janela coberta pelo token incremental"""
+        if not self.use_incremental_sync:
+            return None
+        return self.db.get_sync_window_start(source, calendar_id)
+
+    def _store_sync_token(self, source, calendar_id, token, window_start=None):
+        """Salva o token incremental depois que as alterações foram aplicadas"""
+        if self.use_incremental_sync:
+            self.db.store_sync_token(source, calendar_id, token, window_start)
+
+    def _fetch_in_progress(self, provider):
+        """Indica se uma busca atrasada do provedor ainda está usando o cliente dele"""
+        pending = self.pending_fetches.get(provider)
+        return pending is not None and not pending.done()
+
+    def _expresso_available(self):
+        """Indica se o Expresso está configurado e livre (sem busca atrasada usando o navegador)"""
+        return bool(getattr(self, "expresso_sync", None)) and not self._fetch_in_progress(
+            "expresso"
+        )
+
+    def _fetch_google_events(self, today, sync_token=None):
+        """
+        Obtém o estado atual do Google Calendar.
+
+        No modo incremental aplica apenas as alterações desde o nextSyncToken
+        informado sobre o cache atual. Roda no pool de threads, sem acessar o banco.
+
+        Returns:
+            (dict, list, str): Novo cache {id: evento}, eventos que mudaram e
+            o nextSyncToken (None fora do modo incremental)
+        """
+        if not self.use_incremental_sync:
+            return self._consume_events(self.google_sync.iter_events(today)) + (None,)
+
+        changes = self.google_sync.iter_changes(sync_token, today)
+        return self._apply_changes(
+            changes,
+            self.google_sync,
+            self.google_events_cache,
+            lambda event: event.get("status") == "cancelled",
+            today,
+        ) + (self.google_sync.next_sync_token,)
+
+    def _fetch_outlook_events(self, today, delta_link=None, window_start=None):
+        """
+        Obtém o estado atual do Outlook Calendar.
 
-    def _rebuild_maps_from_db(self):
-        """Reconstrói os mapas de ID a partir do banco de dados"""
-        mappings = self.db.get_all_mappings()
+        No modo incremental segue o @odata.deltaLink informado e aplica apenas
+        os eventos adicionados, alterados e removidos sobre o cache atual.
+        Roda no pool de threads, sem acessar o banco.
 
-        # Limpar mapas existentes
-        self.google_to_outlook_map = {}
-        self.outlook_to_google_map = {}
+        Returns:
+            (dict, list, tuple): Novo cache {id: evento}, eventos que mudaram e
+            (@odata.deltaLink, início da janela dele); (None, None) fora do
+            modo incremental
+        """
+        if not self.use_incremental_sync:
+            return self._consume_events(self.outlook_sync.iter_events(today)) + ((None, None),)
+
+        changes = self.outlook_sync.iter_changes(delta_link, today, window_start)
+        return self._apply_changes(
+            changes,
+            self.outlook_sync,
+            self.outlook_events_cache,
+            lambda event: "@removed" in event,
+            today,
+        ) + ((self.outlook_sync.next_delta_link, self.outlook_sync.delta_window_start),)
+
+    def _consume_events(self, events):
+        """Consome uma listagem completa, página por página, montando o novo cache"""
+        new_cache = {}
+        for event in events:
+            if "id" in event:
+                new_cache[event["id"]] = event
+        return new_cache, list(new_cache.values())
 
-        # Adicionar mapas para Expresso
-        self.google_to_expresso_map = {}
-        self.outlook_to_expresso_map = {}
-        self.expresso_to_google_map = {}
-        self.expresso_to_outlook_map = {}
+    def _apply_changes(self, changes, client, current_cache, is_removed, today):
+        """
+        Consome um fluxo de alterações e o aplica sobre o cache atual.
 
-        # Reconstruir a partir do banco de dados
-        for mapping in mappings:
-            _, outlook_id, google_id, expresso_id, _, _ = mapping
+        Só depois de consumir o fluxo o cliente informa (last_sync_was_full)
+        se foi feita uma listagem completa, caso em que o cache é substituído.
+        """
+        updated = {}
+        removed = set()
+        for event in changes:
+            if "id" not in event:
+                continue
+            if is_removed(event) or self._event_ends_before(event, today):
+                removed.add(event["id"])
+                updated.pop(event["id"], None)
+            else:
+                removed.discard(event["id"])
+                updated[event["id"]] = event
 
-            if outlook_id and google_id:
-                self.google_to_outlook_map[google_id] = outlook_id
-                self.outlook_to_google_map[outlook_id] = google_id
+        new_cache = {} if client.last_sync_was_full else dict(current_cache)
+        for event_id in removed:
+            new_cache.pop(event_id, None)
+        new_cache.update(updated)
 
-            # Adicionar mapeamentos para Expresso
-            if google_id and expresso_id:
-                self.google_to_expresso_map[google_id] = expresso_id
-                self.expresso_to_google_map[expresso_id] = google_id
+        return new_cache, list(updated.values())
 
-            if outlook_id and expresso_id:
-                self.outlook_to_expresso_map[outlook_id] = expresso_id
-                self.expresso_to_outlook_map[expresso_id] = outlook_id
+    def _event_ends_before(self, event, reference):
+        """Verifica se um evento do Google ou Outlook terminou antes da data de referência"""
+        end = event.get("end", {})
+        try:
+            if "dateTime" in end:
+                # reference é a meia-noite local, sem fuso
+                reference_utc = reference.astimezone(timezone.utc).replace(tzinfo=None)
+                return parse_datetime_utc(end["dateTime"], end.get("timeZone")) < reference_utc
+            if "date" in end:
+                # Em eventos de dia inteiro a data de fim é exclusiva
+                return datetime.fromisoformat(end["date"]) <= reference
+        except (ValueError, TypeError):
+            pass
+        return False
 
     def sync_changes_only(self):
         """Sincroniza apenas as mudanças detectadas desde a última sincronização"""
@@ -171,8 +421,14 @@ class CalendarSynchronizer:
             f"\n=== Verificando mudanças desde {self.last_sync_time.strftime('%H:%M:%S')} ==="
         )
 
+        # O retrato dos eventos do Expresso e os índices de duplicados valem só para um ciclo
+        self._match_indexes = {}
+        self._cycle_expresso_events = None
+        if self._expresso_available():
+            self.expresso_sync.invalidar_eventos()
+
         # Recarregar a página do Expresso antes de começar a sincronização, se existir
-        if hasattr(self, "expresso_sync") and self.expresso_sync and self.expresso_sync.driver:
+        if self._expresso_available() and self.expresso_sync.driver:
             try:
                 print("Atualizando página do Expresso...")
                 self.expresso_sync.selecionarCalendario()  # Isso vai recarregar a página do calendário
@@ -187,16 +443,16 @@ class CalendarSynchronizer:
 
         # Contadores
         stats = {
-            "google_to_outlook": {"created": 0, "updated": 0, "deleted": 0},
-            "outlook_to_google": {"created": 0, "updated": 0, "deleted": 0},
+            "google_to_outlook": {"created": 0, "updated": 0, "deleted": 0, "skipped": 0},
+            "outlook_to_google": {"created": 0, "updated": 0, "deleted": 0, "skipped": 0},
         }
 
         # Adicionar contador para Expresso se necessário
-        if hasattr(self, "expresso_sync") and self.expresso_sync:
-            stats["google_to_expresso"] = {"created": 0, "updated": 0, "deleted": 0}
-            stats["outlook_to_expresso"] = {"created": 0, "updated": 0, "deleted": 0}
-            stats["expresso_to_google"] = {"created": 0, "updated": 0, "deleted": 0}
-            stats["expresso_to_outlook"] = {"created": 0, "updated": 0, "deleted": 0}
+        if self._expresso_available():
+            stats["google_to_expresso"] = {"created": 0, "updated": 0, "deleted": 0, "skipped": 0}
+            stats["outlook_to_expresso"] = {"created": 0, "updated": 0, "deleted": 0, "skipped": 0}
+            stats["expresso_to_google"] = {"created": 0, "updated": 0, "deleted": 0, "skipped": 0}
+            stats["expresso_to_outlook"] = {"created": 0, "updated": 0, "deleted": 0, "skipped": 0}
 
         # Processar eventos adicionados no Google
         for event_id, google_event in changes["google"]["added"].items():
@@ -211,7 +467,7 @@ class CalendarSynchronizer:
             events_being_synced.add(event_id)
             
             # Verificar se já existe no banco de dados antes de tudo
-            mapped_ids = self.db.get_mapped_ids(event_id, "google")
+            mapped_ids = self.mappings.get_mapped_ids(event_id, "google")
             if mapped_ids and mapped_ids[0]:  # Existe mapeamento com Outlook
                 outlook_id = mapped_ids[0]
                 print(f"  - Já mapeado com evento do Outlook ID: {outlook_id}")
@@ -223,7 +479,7 @@ class CalendarSynchronizer:
                 print(
                     f"  - Corresponde a um evento existente no Outlook pelo ID: {outlook_id}"
                 )
-                self.db.map_events(
+                self.mappings.map_events(
                     google_id=event_id, outlook_id=outlook_id, origem="id_match"
                 )
                 self._store_event_mapping(google_id=event_id, outlook_id=outlook_id)
@@ -237,7 +493,7 @@ class CalendarSynchronizer:
                 exists, outlook_id = self._check_event_already_exists(google_event, 'google', self.outlook_events_cache, 'outlook')
                 if exists:
                     print(f"  - Evento já existe no Outlook com ID: {outlook_id}")
-                    self.db.map_events(
+                    self.mappings.map_events(
                         google_id=event_id, outlook_id=outlook_id, origem="match"
                     )
                     self._store_event_mapping(google_id=event_id, outlook_id=outlook_id)
@@ -250,13 +506,12 @@ class CalendarSynchronizer:
                             google_event
                         )
                         if outlook_event_atualizado:
-                            print(
-                                f"  - Atualizando no Outlook: {outlook_event_atualizado.get('subject', 'Sem título')}"
+                            self._queue_update(
+                                "outlook",
+                                outlook_id,
+                                outlook_event_atualizado,
+                                stats["google_to_outlook"],
                             )
-                            self.outlook_sync.update_event(
-                                outlook_id, outlook_event_atualizado
-                            )
-                            stats["google_to_outlook"]["updated"] += 1
                     except Exception as e:
                         print(f"  - Erro ao atualizar evento no Outlook: {e}")
 
@@ -268,34 +523,28 @@ class CalendarSynchronizer:
                             print(
                                 f"  - Criando no Outlook: {outlook_event.get('subject', 'Sem título')}"
                             )
-                            result = self.outlook_sync.create_event(outlook_event)
-                            outlook_id = result.get("id")
-                            if outlook_id:
-                                # Primeiro armazenar o evento no banco
-                                self.db.store_outlook_event(result)
-                                # Depois mapear os eventos
-                                self.db.map_events(
-                                    google_id=event_id,
-                                    outlook_id=outlook_id,
-                                    origem="google",
-                                )
-                                self._store_event_mapping(
-                                    google_id=event_id, outlook_id=outlook_id
-                                )
-                                print(f"  - Criado no Outlook com ID: {outlook_id}")
-                                stats["google_to_outlook"]["created"] += 1
+                            # O mapeamento é gravado quando o $batch devolver o ID
+                            self.outlook_sync.queue_create_event(
+                                outlook_event,
+                                key=event_id,
+                                callback=self._write_callback(
+                                    "Outlook",
+                                    stats["google_to_outlook"],
+                                    "created",
+                                    lambda result, google_id=event_id: self._map_created_outlook_event(
+                                        result, "google", google_id=google_id
+                                    ),
+                                ),
+                            )
                     except Exception as e:
                         print(f"  - Erro ao criar evento no Outlook: {e}")
 
                 # Verificar e processar Expresso independentemente do Outlook
-                if hasattr(self, "expresso_sync") and self.expresso_sync:
+                if self._expresso_available():
                     # Verificar se o evento já existe no Expresso (usando o novo método)
                     expresso_events_cache = {}
                     try:
-                        expresso_events = self.expresso_sync.obterEventos()
-                        for event in expresso_events:
-                            if "id" in event:
-                                expresso_events_cache[event["id"]] = event
+                        expresso_events_cache = self._expresso_events_by_id()
                     except Exception as e:
                         print(f"  - Erro ao obter eventos do Expresso: {e}")
                         # Continuar mesmo com erro
@@ -304,7 +553,7 @@ class CalendarSynchronizer:
                     exists, expresso_id = self._check_event_already_exists(google_event, 'google', expresso_events_cache, 'expresso')
                     if exists:
                         print(f"  - Evento já existe no Expresso com ID: {expresso_id}")
-                        self.db.map_events(
+                        self.mappings.map_events(
                             google_id=event_id,
                             expresso_id=expresso_id,
                             origem="match",
@@ -326,24 +575,17 @@ class CalendarSynchronizer:
                                 print(
                                     f"  - Criando no Expresso: {expresso_event.get('titulo', 'Sem título')}"
                                 )
-                                result = self.expresso_sync.create_event(expresso_event)
-                                expresso_id = result.get("id")
-                                if expresso_id:
-                                    # Aqui também precisamos armazenar o evento no banco antes de mapear
-                                    self.db.store_expresso_event(result)
-                                    # Depois mapear os eventos
-                                    self.db.map_events(
-                                        google_id=event_id,
-                                        expresso_id=expresso_id,
-                                        origem="google",
-                                    )
-                                    self._store_event_mapping(
-                                        google_id=event_id, expresso_id=expresso_id
-                                    )
-                                    print(
-                                        f"  - Criado no Expresso com ID: {expresso_id}"
-                                    )
-                                    stats["google_to_expresso"]["created"] += 1
+                                self.expresso_sync.queue_create_event(
+                                    expresso_event,
+                                    callback=self._write_callback(
+                                        "Expresso",
+                                        stats["google_to_expresso"],
+                                        "created",
+                                        lambda result, google_id=event_id: self._map_created_expresso_event(
+                                            result, "google", google_id=google_id
+                                        ),
+                                    ),
+                                )
                         except Exception as e:
                             print(f"  - Erro ao criar evento no Expresso: {e}")
         else:
@@ -351,16 +593,14 @@ class CalendarSynchronizer:
 
         # Processar eventos atualizados no Google
         for event_id, google_event in changes["google"]["updated"].items():
-            if event_id in self.google_to_outlook_map:
-                outlook_id = self.google_to_outlook_map[event_id]
+            outlook_id = self.mappings.get("google", event_id, "outlook")
+            if outlook_id:
                 try:
                     outlook_event = self._format_google_to_outlook(google_event)
                     if outlook_event:
-                        print(
-                            f"Atualizando no Outlook: {outlook_event.get('subject', 'Sem título')}"
+                        self._queue_update(
+                            "outlook", outlook_id, outlook_event, stats["google_to_outlook"]
                         )
-                        self.outlook_sync.update_event(outlook_id, outlook_event)
-                        stats["google_to_outlook"]["updated"] += 1
                 except Exception as e:
                     print(f"Erro ao atualizar evento no Outlook: {e}")
 
@@ -371,26 +611,32 @@ class CalendarSynchronizer:
             )
 
             # Verificar mapeamentos para Outlook
-            if event_id in self.google_to_outlook_map:
-                outlook_id = self.google_to_outlook_map[event_id]
+            outlook_id = self.mappings.get("google", event_id, "outlook")
+            if outlook_id:
                 try:
                     print(f"  - Excluindo do Outlook: {outlook_id}")
-                    self.outlook_sync.delete_event(outlook_id)
-                    stats["google_to_outlook"]["deleted"] += 1
+                    self.outlook_sync.queue_delete_event(
+                        outlook_id,
+                        callback=self._write_callback(
+                            "Outlook",
+                            stats["google_to_outlook"], "deleted"
+                        ),
+                    )
                 except Exception as e:
                     print(f"  - Erro ao excluir evento do Outlook: {e}")
 
             # Verificar mapeamentos para Expresso
-            if (
-                hasattr(self, "expresso_sync")
-                and self.expresso_sync
-                and event_id in self.google_to_expresso_map
-            ):
-                expresso_id = self.google_to_expresso_map[event_id]
+            expresso_id = self.mappings.get("google", event_id, "expresso")
+            if self._expresso_available() and expresso_id:
                 try:
                     print(f"  - Excluindo do Expresso: {expresso_id}")
-                    self.expresso_sync.delete_event(expresso_id)
-                    stats["google_to_expresso"]["deleted"] += 1
+                    self.expresso_sync.queue_delete_event(
+                        expresso_id,
+                        callback=self._write_callback(
+                            "Expresso",
+                            stats["google_to_expresso"], "deleted"
+                        ),
+                    )
                 except Exception as e:
                     print(f"  - Erro ao excluir evento do Expresso: {e}")
 
@@ -413,9 +659,10 @@ class CalendarSynchronizer:
             events_being_synced.add(event_id)
             
             # Verificar se este evento já tem um mapeamento
-            if event_id in self.outlook_to_google_map:
+            google_id = self.mappings.get("outlook", event_id, "google")
+            if google_id:
                 print(
-                    f"  - Já sincronizado com o Google com ID: {self.outlook_to_google_map[event_id]}"
+                    f"  - Já sincronizado com o Google com ID: {google_id}"
                 )
                 continue
 
@@ -436,31 +683,31 @@ class CalendarSynchronizer:
                         # Log detalhado do evento formatado para depuração
                         print(f"  - Dados do evento para o Google: {json.dumps(google_event, default=str)}")
                         
-                        result = self.google_sync.create_event(google_event)
-                        google_id = result.get("id")
-                        if google_id:
-                            # Primeiro armazenar o evento no banco
-                            self.db.store_google_event(result)
-                            # Depois mapear os eventos
-                            self._store_event_mapping(
-                                google_id=google_id, outlook_id=event_id
-                            )
-                            print(f"  - Criado no Google com ID: {google_id}")
-                            stats["outlook_to_google"]["created"] += 1
-                        else:
-                            print("  - ERRO: Não foi possível obter ID do evento criado no Google")
+                        # O mapeamento é gravado quando o batch devolver o ID
+                        self.google_sync.queue_create_event(
+                            google_event,
+                            key=event_id,
+                            callback=self._write_callback(
+                                "Google",
+                                stats["outlook_to_google"],
+                                "created",
+                                lambda result, outlook_id=event_id: self._map_created_google_event(
+                                    result, "outlook", outlook_id=outlook_id
+                                ),
+                            ),
+                        )
                 except Exception as e:
                     print(f"  - Erro ao criar evento no Google: {str(e)}")
                     if hasattr(e, 'response') and hasattr(e.response, 'text'):
                         print(f"  - Detalhes do erro: {e.response.text}")
 
             # Adicionar sincronização com Expresso
-            if hasattr(self, "expresso_sync") and self.expresso_sync:
+            if self._expresso_available():
                 # Verificar se este evento já tem um mapeamento com Expresso
                 expresso_match_found = False
 
                 # Verificar no banco de dados
-                mapped_ids = self.db.get_mapped_ids(event_id, "outlook")
+                mapped_ids = self.mappings.get_mapped_ids(event_id, "outlook")
                 if (
                     mapped_ids and mapped_ids[1]
                 ):  # [1] corresponde ao expresso_id no retorno de get_mapped_ids
@@ -471,18 +718,15 @@ class CalendarSynchronizer:
                     # Verificar se o evento já existe no Expresso usando o novo método
                     expresso_events_cache = {}
                     try:
-                        expresso_events = self.expresso_sync.obterEventos()
-                        for event in expresso_events:
-                            if "id" in event:
-                                expresso_events_cache[event["id"]] = event
-                        
+                        expresso_events_cache = self._expresso_events_by_id()
+
                         print(f"  - Encontrados {len(expresso_events_cache)} eventos no Expresso para comparação")
                         
                         # Verificar duplicação usando o novo método
                         exists, expresso_id = self._check_event_already_exists(outlook_event, 'outlook', expresso_events_cache, 'expresso')
                         if exists:
                             print(f"  - Evento já existe no Expresso com ID: {expresso_id}")
-                            self.db.map_events(
+                            self.mappings.map_events(
                                 outlook_id=event_id,
                                 expresso_id=expresso_id,
                                 origem="match",
@@ -508,24 +752,17 @@ class CalendarSynchronizer:
                                 # Log detalhado para depuração
                                 print(f"  - Dados do evento para o Expresso: {json.dumps(expresso_event, default=str)}")
                                 
-                                result = self.expresso_sync.create_event(expresso_event)
-                                expresso_id = result.get("id") if isinstance(result, dict) else result
-                                if expresso_id:
-                                    # Armazenar o evento no banco
-                                    self.db.store_expresso_event(result if isinstance(result, dict) else {"id": expresso_id})
-                                    # Mapear os eventos
-                                    self.db.map_events(
-                                        outlook_id=event_id,
-                                        expresso_id=expresso_id,
-                                        origem="outlook",
-                                    )
-                                    self._store_event_mapping(
-                                        outlook_id=event_id, expresso_id=expresso_id
-                                    )
-                                    print(f"  - Criado no Expresso com ID: {expresso_id}")
-                                    stats["outlook_to_expresso"]["created"] += 1
-                                else:
-                                    print("  - ERRO: Não foi possível obter ID do evento criado no Expresso")
+                                self.expresso_sync.queue_create_event(
+                                    expresso_event,
+                                    callback=self._write_callback(
+                                        "Expresso",
+                                        stats["outlook_to_expresso"],
+                                        "created",
+                                        lambda result, outlook_id=event_id: self._map_created_expresso_event(
+                                            result, "outlook", outlook_id=outlook_id
+                                        ),
+                                    ),
+                                )
                             else:
                                 print("  - ERRO: Falha ao formatar evento do Outlook para o Expresso")
                         except Exception as e:
@@ -534,37 +771,42 @@ class CalendarSynchronizer:
 
         # Processar eventos atualizados no Outlook
         for event_id, outlook_event in changes["outlook"]["updated"].items():
-            if event_id in self.outlook_to_google_map:
-                google_id = self.outlook_to_google_map[event_id]
+            google_id = self.mappings.get("outlook", event_id, "google")
+            if google_id:
                 try:
                     google_event = self._format_outlook_to_google(outlook_event)
                     if google_event:
-                        print(
-                            f"Atualizando no Google: {google_event.get('summary', 'Sem título')}"
+                        self._queue_update(
+                            "google", google_id, google_event, stats["outlook_to_google"]
                         )
-                        self.google_sync.update_event(google_id, google_event)
-                        stats["outlook_to_google"]["updated"] += 1
                 except Exception as e:
                     print(f"Erro ao atualizar evento no Google: {e}")
 
         # Processar eventos excluídos no Outlook
         for event_id, outlook_event in changes["outlook"]["deleted"].items():
-            if event_id in self.outlook_to_google_map:
-                google_id = self.outlook_to_google_map[event_id]
+            google_id = self.mappings.get("outlook", event_id, "google")
+            if google_id:
                 try:
                     print(
                         f"Excluindo do Google: {outlook_event.get('subject', 'Sem título')}"
                     )
-                    self.google_sync.delete_event(google_id)
-                    # Remover dos mapeamentos
-                    del self.google_to_outlook_map[google_id]
-                    del self.outlook_to_google_map[event_id]
-                    stats["outlook_to_google"]["deleted"] += 1
+                    # Remover dos mapeamentos depois que a exclusão for confirmada
+                    self.google_sync.queue_delete_event(
+                        google_id,
+                        callback=self._write_callback(
+                            "Google",
+                            stats["outlook_to_google"],
+                            "deleted",
+                            lambda result, google_id=google_id, outlook_id=event_id: self._remove_all_mappings(
+                                google_id=google_id, outlook_id=outlook_id
+                            ),
+                        ),
+                    )
                 except Exception as e:
                     print(f"Erro ao excluir evento do Google: {e}")
 
         # Processar eventos no Expresso, se existir
-        if hasattr(self, "expresso_sync") and self.expresso_sync:
+        if self._expresso_available():
             # Obter cache de eventos do Expresso
             expresso_events_cache = {}
             expresso_events = self.expresso_sync.obterEventos()
@@ -579,7 +821,7 @@ class CalendarSynchronizer:
             # Mapear eventos existentes do Expresso para evitar duplicações
             for event_id, event in expresso_events_cache.items():
                 # Verificar se já está mapeado
-                mapped_ids = self.db.get_mapped_ids(event_id, "expresso")
+                mapped_ids = self.mappings.get_mapped_ids(event_id, "expresso")
                 if mapped_ids:
                     expresso_mapped_ids[event_id] = mapped_ids
                     continue
@@ -602,20 +844,19 @@ class CalendarSynchronizer:
                         print(
                             f"  - Criando no Google: {google_event.get('summary', 'Sem título')}"
                         )
-                        result = self.google_sync.create_event(google_event)
-                        google_id = result.get("id")
-                        if google_id:
-                            # Primeiro armazenar evento na tabela google_events
-                            self.db.store_google_event(result)
-
-                            # Depois mapear os eventos
-                            self.db.map_events(
-                                expresso_id=event_id,
-                                google_id=google_id,
-                                origem="expresso",
-                            )
-                            print(f"  - Criado no Google com ID: {google_id}")
-                            stats["expresso_to_google"]["created"] += 1
+                        # O mapeamento é gravado quando o batch devolver o ID
+                        self.google_sync.queue_create_event(
+                            google_event,
+                            key=event_id,
+                            callback=self._write_callback(
+                                "Google",
+                                stats["expresso_to_google"],
+                                "created",
+                                lambda result, expresso_id=event_id: self._map_created_google_event(
+                                    result, "expresso", expresso_id=expresso_id
+                                ),
+                            ),
+                        )
                 except Exception as e:
                     print(f"  - Erro ao criar evento do Expresso no Google: {e}")
 
@@ -628,25 +869,24 @@ class CalendarSynchronizer:
                         print(
                             f"  - Criando no Outlook: {outlook_event.get('subject', 'Sem título')}"
                         )
-                        result = self.outlook_sync.create_event(outlook_event)
-                        outlook_id = result.get("id")
-                        if outlook_id:
-                            # Primeiro armazenar evento na tabela outlook_events
-                            self.db.store_outlook_event(result)
-
-                            # Depois mapear os eventos
-                            self.db.map_events(
-                                expresso_id=event_id,
-                                outlook_id=outlook_id,
-                                origem="expresso",
-                            )
-                            print(f"  - Criado no Outlook com ID: {outlook_id}")
-                            stats["expresso_to_outlook"]["created"] += 1
+                        # O mapeamento é gravado quando o $batch devolver o ID
+                        self.outlook_sync.queue_create_event(
+                            outlook_event,
+                            key=event_id,
+                            callback=self._write_callback(
+                                "Outlook",
+                                stats["expresso_to_outlook"],
+                                "created",
+                                lambda result, expresso_id=event_id: self._map_created_outlook_event(
+                                    result, "expresso", expresso_id=expresso_id
+                                ),
+                            ),
+                        )
                 except Exception as e:
                     print(f"  - Erro ao criar evento do Expresso no Outlook: {e}")
 
             # Detectar eventos excluídos no Expresso
-            if hasattr(self, "expresso_sync") and self.expresso_sync:
+            if self._expresso_available():
                 # Obter IDs de eventos atuais do Expresso
                 expresso_current_ids = set()
                 expresso_events = self.expresso_sync.obterEventos()
@@ -656,10 +896,9 @@ class CalendarSynchronizer:
                 
                 # Obter todos os mapeamentos relacionados ao Expresso
                 expresso_mappings = {}
-                for mapping in self.db.get_all_mappings():
-                    _, outlook_id, google_id, expresso_id, _, _ = mapping
-                    if expresso_id:
-                        expresso_mappings[expresso_id] = (google_id, outlook_id)
+                for ids in self.mappings.rows.values():
+                    if ids["expresso"]:
+                        expresso_mappings[ids["expresso"]] = (ids["google"], ids["outlook"])
                 
                 # Detectar IDs que estavam mapeados mas não estão mais nos eventos atuais
                 for expresso_id, (google_id, outlook_id) in expresso_mappings.items():
@@ -670,8 +909,12 @@ class CalendarSynchronizer:
                         if google_id:
                             try:
                                 print(f"  - Excluindo do Google: {google_id}")
-                                self.google_sync.delete_event(google_id)
-                                stats["expresso_to_google"]["deleted"] += 1
+                                self.google_sync.queue_delete_event(
+                                    google_id,
+                                    callback=self._write_callback(
+                                        "Google", stats["expresso_to_google"], "deleted"
+                                    ),
+                                )
                             except Exception as e:
                                 print(f"  - Erro ao excluir evento do Google: {e}")
                         
@@ -679,8 +922,13 @@ class CalendarSynchronizer:
                         if outlook_id:
                             try:
                                 print(f"  - Excluindo do Outlook: {outlook_id}")
-                                self.outlook_sync.delete_event(outlook_id)
-                                stats["expresso_to_outlook"]["deleted"] += 1
+                                self.outlook_sync.queue_delete_event(
+                                    outlook_id,
+                                    callback=self._write_callback(
+                                        "Outlook",
+                                        stats["expresso_to_outlook"], "deleted"
+                                    ),
+                                )
                             except Exception as e:
                                 print(f"  - Erro ao excluir evento do Outlook: {e}")
                         
@@ -690,105 +938,248 @@ class CalendarSynchronizer:
                         # Marcar como excluído no banco de dados
                         self.db.mark_event_deleted(expresso_id, "expresso")
 
-        # Detectar e processar eventos atualizados no Expresso
-        if hasattr(self, "expresso_sync") and self.expresso_sync:
-            expresso_events_cache = {}
-            expresso_events = self.expresso_sync.obterEventos()
-            
-            # Mapear todos os eventos do Expresso para verificar atualizações
-            for event in expresso_events:
-                if "id" in event:
-                    expresso_id = event["id"]
-                    expresso_events_cache[expresso_id] = event
+        # Propagar apenas os eventos do Expresso cujo hash de conteúdo mudou
+        if self._expresso_available():
+            for expresso_id, event in changes.get("expresso", {}).get("updated", {}).items():
+                # Verificar se este evento tem mapeamento no banco
+                mapped_ids = self.mappings.get_mapped_ids(expresso_id, "expresso")
+                if mapped_ids and (mapped_ids[0] or mapped_ids[1]): # Se tiver Google ID ou Outlook ID mapeado
+                    google_id = mapped_ids[1]  # No retorno do get_mapped_ids para expresso, [1] é o Google ID
+                    outlook_id = mapped_ids[0]  # [0] é o Outlook ID
                     
-                    # Verificar se este evento tem mapeamento no banco
-                    mapped_ids = self.db.get_mapped_ids(expresso_id, "expresso")
-                    if mapped_ids and (mapped_ids[0] or mapped_ids[1]): # Se tiver Google ID ou Outlook ID mapeado
-                        google_id = mapped_ids[1]  # No retorno do get_mapped_ids para expresso, [1] é o Google ID
-                        outlook_id = mapped_ids[0]  # [0] é o Outlook ID
-                        
-                        # Verificar mudanças no evento do Expresso
-                        # Como não temos um campo de "lastModified" no Expresso, vamos usar um método mais manual
-                        # Podemos obter o evento do banco de dados e comparar campos relevantes
-                        
-                        # Atualizar no Google
-                        if google_id:
-                            try:
-                                # Converter o evento do Expresso para o formato do Google
-                                google_event = self.expresso_sync._format_expresso_to_google(event)
-                                if google_event:
-                                    # Adicionar o campo ID para que a API do Google saiba qual evento atualizar
-                                    google_event["id"] = google_id
-                                    print(f"Atualizando no Google: {google_event.get('summary', 'Sem título')}")
-                                    self.google_sync.update_event(google_id, google_event)
-                                    stats["expresso_to_google"]["updated"] += 1
-                            except Exception as e:
-                                print(f"Erro ao atualizar evento no Google: {e}")
-                        
-                        # Atualizar no Outlook
-                        if outlook_id:
-                            try:
-                                # Converter o evento do Expresso para o formato do Outlook
-                                outlook_event = self.expresso_sync._format_expresso_to_outlook(event)
-                                if outlook_event:
-                                    print(f"Atualizando no Outlook: {outlook_event.get('subject', 'Sem título')}")
-                                    self.outlook_sync.update_event(outlook_id, outlook_event)
-                                    stats["expresso_to_outlook"]["updated"] += 1
-                            except Exception as e:
-                                print(f"Erro ao atualizar evento no Outlook: {e}")
+                    # Atualizar no Google
+                    if google_id:
+                        try:
+                            # Converter o evento do Expresso para o formato do Google
+                            google_event = self.expresso_sync._format_expresso_to_google(event)
+                            if google_event:
+                                # Adicionar o campo ID para que a API do Google saiba qual evento atualizar
+                                google_event["id"] = google_id
+                                self._queue_update(
+                                    "google", google_id, google_event, stats["expresso_to_google"]
+                                )
+                        except Exception as e:
+                            print(f"Erro ao atualizar evento no Google: {e}")
+                    
+                    # Atualizar no Outlook
+                    if outlook_id:
+                        try:
+                            # Converter o evento do Expresso para o formato do Outlook
+                            outlook_event = self.expresso_sync._format_expresso_to_outlook(event)
+                            if outlook_event:
+                                self._queue_update(
+                                    "outlook", outlook_id, outlook_event, stats["expresso_to_outlook"]
+                                )
+                        except Exception as e:
+                            print(f"Erro ao atualizar evento no Outlook: {e}")
+
+        # Enviar ao Google, ao Outlook e ao Expresso, em lotes, todas as escritas enfileiradas no ciclo
+        self._flush_batched_writes()
 
         # Após sincronização completa:
         events_being_synced.clear()
 
         return stats
 
-    def _is_event_updated(self, current_event, cached_event):
-        """Verifica se um evento foi atualizado comparando campos relevantes"""
-        # Para Google
-        if "updated" in current_event and "updated" in cached_event:
-            return current_event["updated"] != cached_event["updated"]
+    def _flush_batched_writes(self):
+        """
+        Envia as escritas pendentes do Google (batch HTTP), do Outlook ($batch)
+        e do Expresso (pool de navegadores).
+
+        Os clientes do Google e do Outlook não podem ser usados por duas
+        threads ao mesmo tempo: enquanto uma busca atrasada ainda roda, as
+        escritas do provedor ficam na fila para o próximo ciclo.
+        """
+        clients = [
+            ("Google", "google", self.google_sync),
+            ("Outlook", "outlook", self.outlook_sync),
+        ]
+        if self._expresso_available():
+            clients.append(("Expresso", "expresso", self.expresso_sync))
+        for name, provider, client in clients:
+            if not client.pending_batch:
+                continue
+            if self._fetch_in_progress(provider):
+                print(
+                    f"Busca do {name} ainda em andamento, "
+                    f"{len(client.pending_batch)} operações adiadas para o próximo ciclo"
+                )
+                continue
+            print(f"Enviando {len(client.pending_batch)} operações ao {name} em lote...")
+            try:
+                client.flush_batch()
+            except Exception as e:
+                print(f"Erro ao enviar operações em lote ao {name}: {e}")
+
+    def _queue_update(self, target, event_id, payload, counters):
+        """
+        Enfileira a atualização de um evento, a menos que ela não mude nada.
+
+        O hash do payload (NormalizedEvent.content_hash) é comparado com o
+        último estado conhecido do evento no destino e com o do último payload
+        aceito por ele. Se for igual a um dos dois, a escrita é descartada e
+        contada em counters["skipped"].
 
-        # Para Outlook
-        if (
-            "lastModifiedDateTime" in current_event
-            and "lastModifiedDateTime" in cached_event
+        Args:
+            target (str): 'google', 'outlook' ou 'expresso'
+            event_id (str): ID do evento no destino
+            payload (dict): Evento já no formato do destino
+            counters (dict): Contadores do par de calendários em stats
+
+        Returns:
+            bool: True se a atualização foi enfileirada
+        """
+        name, client = {
+            "google": ("Google", self.google_sync),
+            "outlook": ("Outlook", self.outlook_sync),
+            "expresso": ("Expresso", self.expresso_sync),
+        }[target]
+        record = NormalizedEvent(payload, target)
+        title = record.title or "Sem título"
+
+        if record.content_hash in (
+            self.content_hashes[target].get(event_id),
+            self.sent_hashes.get((target, event_id)),
         ):
-            return (
-                current_event["lastModifiedDateTime"]
-                != cached_event["lastModifiedDateTime"]
+            print(f"  - Sem alterações no {name}, atualização ignorada: {title}")
+            counters["skipped"] += 1
+            return False
+
+        def on_success(result):
+            self.sent_hashes[(target, event_id)] = record.content_hash
+            # A resposta traz o evento atualizado: com o hash dele gravado, o
+            # eco desta escrita na próxima leitura não conta como mudança
+            if isinstance(result, dict) and result.get("id"):
+                self._store_events(target, [result])
+
+        print(f"  - Atualizando no {name}: {title}")
+        client.queue_update_event(
+            event_id,
+            payload,
+            callback=self._write_callback(name, counters, "updated", on_success=on_success),
+        )
+        return True
+
+    def _write_callback(self, provider, counters, action, on_success=None):
+        """
+        Cria o callback de uma escrita enfileirada no Google, no Outlook ou no Expresso.
+
+        Args:
+            provider (str): Nome do calendário de destino, usado nos logs
+            counters (dict): Contadores do par de calendários em stats
+            action (str): 'created', 'updated' ou 'deleted'
+            on_success (callable): Chamado com o corpo da resposta; se retornar
+                False a operação não é contabilizada
+        """
+        descricao = {"created": "criar", "updated": "atualizar", "deleted": "excluir"}
+
+        def callback(result, error):
+            if error:
+                print(f"  - Erro ao {descricao[action]} evento no {provider}: {error}")
+                return
+            if on_success and on_success(result) is False:
+                return
+            counters[action] += 1
+
+        return callback
+
+    def _map_created_google_event(self, result, origem, outlook_id=None, expresso_id=None):
+        """Armazena e mapeia um evento criado no Google a partir do resultado do batch"""
+        google_id = result.get("id")
+        if not google_id:
+            print("  - ERRO: Não foi possível obter ID do evento criado no Google")
+            return False
+
+        # Primeiro armazenar o evento no banco
+        self._store_events("google", [result])
+        # Depois mapear os eventos
+        if outlook_id:
+            self._store_event_mapping(google_id=google_id, outlook_id=outlook_id)
+        else:
+            self.mappings.map_events(
+                google_id=google_id, expresso_id=expresso_id, origem=origem
             )
+        print(f"  - Criado no Google com ID: {google_id}")
+        return True
+
+    def _map_created_outlook_event(self, result, origem, google_id=None, expresso_id=None):
+        """Armazena e mapeia um evento criado no Outlook a partir do resultado do $batch"""
+        outlook_id = result.get("id")
+        if not outlook_id:
+            print("  - ERRO: Não foi possível obter ID do evento criado no Outlook")
+            return False
 
-        # Comparação manual de campos importantes
-        important_fields = [
-            "summary",
-            "subject",
-            "start",
-            "end",
-            "location",
-            "description",
-        ]
+        # Primeiro armazenar o evento no banco
+        self._store_events("outlook", [result])
+        # Depois mapear os eventos
+        self.mappings.map_events(
+            google_id=google_id,
+            outlook_id=outlook_id,
+            expresso_id=expresso_id,
+            origem=origem,
+        )
+        if google_id:
+            self._store_event_mapping(google_id=google_id, outlook_id=outlook_id)
+        print(f"  - Criado no Outlook com ID: {outlook_id}")
+        return True
+
+    def _map_created_expresso_event(self, result, origem, google_id=None, outlook_id=None):
+        """Armazena e mapeia um evento criado no Expresso a partir do resultado do flush_batch"""
+        expresso_id = result.get("id") if isinstance(result, dict) else result
+        if not expresso_id:
+            print("  - ERRO: Não foi possível obter ID do evento criado no Expresso")
+            return False
 
-        for field in important_fields:
-            if field in current_event and field in cached_event:
-                # Para campos aninhados como start e end
-                if isinstance(current_event[field], dict) and isinstance(
-                    cached_event[field], dict
-                ):
-                    # Comparar dateTime para campos de data/hora
-                    if (
-                        "dateTime" in current_event[field]
-                        and "dateTime" in cached_event[field]
-                    ):
-                        if (
-                            current_event[field]["dateTime"]
-                            != cached_event[field]["dateTime"]
-                        ):
-                            return True
-                # Para campos simples
-                elif current_event[field] != cached_event[field]:
-                    return True
+        # Primeiro armazenar o evento no banco, sem hash: o resultado é o payload
+        # enviado, não o evento como o Expresso o devolve; a próxima leitura grava
+        # o primeiro hash
+        self.db.store_expresso_events(
+            [result if isinstance(result, dict) else {"id": expresso_id}], {}
+        )
+        # Depois mapear os eventos
+        self.mappings.map_events(
+            google_id=google_id,
+            outlook_id=outlook_id,
+            expresso_id=expresso_id,
+            origem=origem,
+        )
+        self._store_event_mapping(
+            google_id=google_id, outlook_id=outlook_id, expresso_id=expresso_id
+        )
+        print(f"  - Criado no Expresso com ID: {expresso_id}")
+        return True
 
-        return False
+    def _is_event_updated(self, current_event, cached_event, provider):
+        """
+        Verifica se o conteúdo de um evento mudou comparando hashes.
+
+        O hash atual (NormalizedEvent.content_hash) é comparado com o último
+        gravado no banco; sem hash gravado, com o do evento em cache. Mudanças
+        que não alteram o conteúdo sincronizado (como a data de modificação
+        que o próprio sincronizador provoca) não contam como atualização.
+        """
+        previous = self.content_hashes[provider].get(current_event.get("id"))
+        if previous is None:
+            previous = self._normalized(provider, cached_event).content_hash
+        return self._normalized(provider, current_event).content_hash != previous
+
+    def _content_hashes(self, provider, events):
+        """Hash de conteúdo de cada ID, combinando as ocorrências repetidas"""
+        return content_hashes(
+            self._normalized(provider, event) for event in events if "id" in event
+        )
+
+    def _store_events(self, provider, events, hashes=None):
+        """Grava os eventos no banco com o hash de conteúdo e guarda os hashes em memória"""
+        if hashes is None:
+            hashes = self._content_hashes(provider, events)
+        store = {
+            "google": self.db.store_google_events,
+            "outlook": self.db.store_outlook_events,
+            "expresso": self.db.store_expresso_events,
+        }[provider]
+        store(events, hashes)
+        self.content_hashes[provider].update(hashes)
 
     def _events_match(self, google_event, outlook_event):
         """Verifica se um evento do Google corresponde a um evento do Outlook"""
@@ -798,20 +1189,14 @@ class CalendarSynchronizer:
             outlook_id = outlook_event["id"]
             
             # Verificar se já existe um mapeamento no banco de dados
-            mapped_ids = self.db.get_mapped_ids(google_id, "google")
+            mapped_ids = self.mappings.get_mapped_ids(google_id, "google")
             if mapped_ids and mapped_ids[0] == outlook_id:
                 print(f"Match por ID no banco: Google {google_id} -> Outlook {outlook_id}")
-                # Atualizar mapas em memória para garantir consistência
-                self.google_to_outlook_map[google_id] = outlook_id
-                self.outlook_to_google_map[outlook_id] = google_id
                 return True
             
-            mapped_ids = self.db.get_mapped_ids(outlook_id, "outlook")
+            mapped_ids = self.mappings.get_mapped_ids(outlook_id, "outlook")
             if mapped_ids and mapped_ids[0] == google_id:
                 print(f"Match por ID no banco: Outlook {outlook_id} -> Google {google_id}")
-                # Atualizar mapas em memória para garantir consistência
-                self.google_to_outlook_map[google_id] = outlook_id
-                self.outlook_to_google_map[outlook_id] = google_id
                 return True
             
             # Verificar se há IDs externos armazenados nos eventos
@@ -831,75 +1216,47 @@ class CalendarSynchronizer:
                         return True
         
         # Se não encontrar mapeamento por ID, continuar com a verificação por conteúdo
-        
-        # Comparar título
-        google_title = google_event.get("summary", "").strip()
-        outlook_title = outlook_event.get("subject", "").strip()
+        google = self._normalized("google", google_event)
+        outlook = self._normalized("outlook", outlook_event)
 
-        if not google_title or not outlook_title:
+        # Comparar título
+        if not google.title or not outlook.title:
             return False
 
-        title_match = google_title.lower() == outlook_title.lower()
+        title_match = google.title_key == outlook.title_key
         if not title_match:
             # Se os títulos não correspondem exatamente, podemos verificar se um contém o outro
             # para eventos que podem ter sido editados ligeiramente
-            if (google_title.lower() in outlook_title.lower() or 
-                outlook_title.lower() in google_title.lower()) and (
-                len(google_title) > 5 and len(outlook_title) > 5):  # Evitar falsos positivos com títulos muito curtos
+            if (google.title_key in outlook.title_key or
+                outlook.title_key in google.title_key) and (
+                len(google.title) > 5 and len(outlook.title) > 5):  # Evitar falsos positivos com títulos muito curtos
                 title_match = True
                 # Neste caso, os títulos são similares mas não idênticos
-                print(f"Títulos similares: '{google_title}' e '{outlook_title}'")
+                print(f"Títulos similares: '{google.title}' e '{outlook.title}'")
                 # Neste caso, precisamos verificar a data/hora com maior rigor
                 # para ter certeza de que é o mesmo evento
             else:
                 return False
-        
-        # Comparar data/hora com maior precisão
-        google_start = google_event.get("start", {}).get("dateTime", "")
-        outlook_start = outlook_event.get("start", {}).get("dateTime", "")
-        
-        # Verificar se ambos são eventos de dia inteiro
-        google_all_day = "date" in google_event.get("start", {}) and "dateTime" not in google_event.get("start", {})
-        outlook_all_day = "date" in outlook_event.get("start", {}) and "dateTime" not in outlook_event.get("start", {})
-        
+
         # Se ambos forem de dia inteiro, comparar as datas
-        if google_all_day and outlook_all_day:
-            google_date = google_event.get("start", {}).get("date", "")
-            outlook_date = outlook_event.get("start", {}).get("date", "")
-            if google_date and outlook_date:
-                date_match = google_date == outlook_date
-                if date_match:
-                    print(f"Match de eventos de dia inteiro: {google_date}")
-                    return True
-                else:
-                    return False
-        
-        # Se chegou aqui, pelo menos um dos eventos não é de dia inteiro
-        if google_start and outlook_start:
-            try:
-                google_dt = datetime.fromisoformat(google_start.replace("Z", "+00:00"))
-                outlook_dt = datetime.fromisoformat(outlook_start.replace("Z", "+00:00"))
-                
-                # Converter para UTC para comparação adequada
-                if hasattr(google_dt, "tzinfo") and google_dt.tzinfo:
-                    google_dt = google_dt.astimezone(timezone.utc)
-                if hasattr(outlook_dt, "tzinfo") and outlook_dt.tzinfo:
-                    outlook_dt = outlook_dt.astimezone(timezone.utc)
-                
-                # Tolerância de 5 minutos (300 segundos)
-                time_diff = abs((google_dt - outlook_dt).total_seconds())
-                if time_diff > 300:
-                    print(f"Horários diferem por {time_diff} segundos")
-                    return False
-                
-                # Se chegou aqui, título e horário correspondem
-                print(f"Match de evento com horário específico: '{google_title}' em {google_dt}")
+        if google.all_day and outlook.all_day and google.start and outlook.start:
+            if google.start.date() == outlook.start.date():
+                print(f"Match de eventos de dia inteiro: {google.start.date()}")
                 return True
-            except (ValueError, TypeError) as e:
-                print(f"Erro ao comparar datas: {e}")
-                # Se houver erro na conversão de data/hora, verificar só o título
-                return title_match
-        
+            return False
+
+        # Se chegou aqui, pelo menos um dos eventos não é de dia inteiro
+        if google.start and outlook.start and not (google.all_day or outlook.all_day):
+            # Tolerância de 5 minutos (300 segundos), com os dois horários em UTC
+            time_diff = abs((google.start - outlook.start).total_seconds())
+            if time_diff > 300:
+                print(f"Horários diferem por {time_diff} segundos")
+                return False
+
+            # Se chegou aqui, título e horário correspondem
+            print(f"Match de evento com horário específico: '{google.title}' em {google.start}")
+            return True
+
         # Se chegou aqui e nenhuma das verificações definiu um match ou não-match,
         # retornar o resultado da verificação de título
         return title_match
@@ -939,7 +1296,7 @@ class CalendarSynchronizer:
                 start_time = time.time()
 
                 # Atualizar a página do Expresso antes de cada sincronização
-                if hasattr(self, "expresso_sync") and self.expresso_sync and self.expresso_sync.driver:
+                if self._expresso_available() and self.expresso_sync.driver:
                     try:
                         print("Atualizando página do Expresso...")
                         self.expresso_sync.selecionarCalendario()
@@ -957,7 +1314,11 @@ class CalendarSynchronizer:
                 stats = self.sync_changes_only()
 
                 # Resumo das operações
-                total_ops = sum(sum(category.values()) for category in stats.values())
+                total_ops = sum(
+                    category["created"] + category["updated"] + category["deleted"]
+                    for category in stats.values()
+                )
+                skipped = sum(category["skipped"] for category in stats.values())
 
                 if total_ops > 0:
                     print(
@@ -977,6 +1338,8 @@ class CalendarSynchronizer:
                     print(
                         f"[{datetime.now().strftime('%H:%M:%S')}] Nenhuma mudança detectada"
                     )
+                if skipped:
+                    print(f"- {skipped} atualizações sem alteração ignoradas")
 
                 # Calcular tempo de espera
                 elapsed = time.time() - start_time
@@ -993,6 +1356,8 @@ class CalendarSynchronizer:
             if hasattr(self, "db"):
                 self.db.close()
                 print("Conexão com o banco de dados fechada.")
+            # Não esperar por buscas que ainda estejam presas em algum provedor
+            self.fetch_executor.shutdown(wait=False)
 
     # Add these methods to your CalendarSynchronizer class
 
@@ -1028,9 +1393,9 @@ class CalendarSynchronizer:
             }
             
             # Se não tiver data de fim, usar a data de início + 1 dia
-            if not data_fim:
-                data_obj = datetime.fromisoformat(data_inicio)
-                data_fim = (data_obj + timedelta(days=1)).date().isoformat()
+            start = self._normalized("google", google_event).start
+            if not data_fim and start:
+                data_fim = (start + timedelta(days=1)).date().isoformat()
             
             outlook_event["end"] = {
                 "dateTime": f"{data_fim}T00:00:00",
@@ -1114,48 +1479,34 @@ class CalendarSynchronizer:
         origem = "sync"
 
         if google_id:
-            google_mapping = self.db.get_mapped_ids(google_id, "google")
+            google_mapping = self.mappings.get_mapped_ids(google_id, "google")
             if google_mapping and (google_mapping[0] or google_mapping[1]):
                 existing_mapping = google_mapping
                 outlook_id = outlook_id or google_mapping[0]
                 expresso_id = expresso_id or google_mapping[1]
 
         if outlook_id and not existing_mapping:
-            outlook_mapping = self.db.get_mapped_ids(outlook_id, "outlook")
+            outlook_mapping = self.mappings.get_mapped_ids(outlook_id, "outlook")
             if outlook_mapping and (outlook_mapping[0] or outlook_mapping[1]):
                 existing_mapping = outlook_mapping
                 google_id = google_id or outlook_mapping[0]
                 expresso_id = expresso_id or outlook_mapping[1]
 
         if expresso_id and not existing_mapping:
-            expresso_mapping = self.db.get_mapped_ids(expresso_id, "expresso")
+            expresso_mapping = self.mappings.get_mapped_ids(expresso_id, "expresso")
             if expresso_mapping and (expresso_mapping[0] or expresso_mapping[1]):
                 existing_mapping = expresso_mapping
                 google_id = google_id or expresso_mapping[1]
                 outlook_id = outlook_id or expresso_mapping[0]
 
-        # Armazenar no banco de dados com todos os IDs disponíveis
-        self.db.map_events(
+        # Armazenar no banco de dados (e no índice em memória) com todos os IDs disponíveis
+        self.mappings.map_events(
             google_id=google_id,
             outlook_id=outlook_id,
             expresso_id=expresso_id,
             origem=origem,
         )
 
-        # Também manter nos mapas em memória para compatibilidade
-        if google_id and outlook_id:
-            self.google_to_outlook_map[google_id] = outlook_id
-            self.outlook_to_google_map[outlook_id] = google_id
-
-        # Adicionar mapeamentos para Expresso
-        if google_id and expresso_id:
-            self.google_to_expresso_map[google_id] = expresso_id
-            self.expresso_to_google_map[expresso_id] = google_id
-
-        if outlook_id and expresso_id:
-            self.outlook_to_expresso_map[outlook_id] = expresso_id
-            self.expresso_to_outlook_map[expresso_id] = outlook_id
-
     def cleanup_database(self, days_to_keep=0):
         """
         Limpa eventos antigos do banco de dados.
@@ -1168,6 +1519,8 @@ class CalendarSynchronizer:
         print(f"Mantendo eventos de hoje e futuros (+ {days_to_keep} dias no passado)")
 
         result = self.db.cleanup_old_events(days_to_keep)
+        # A limpeza apaga mapeamentos direto no SQLite
+        self.mappings.load()
 
         # Após limpar o banco de dados, atualizar os caches em memória
         self._update_caches()
@@ -1187,8 +1540,6 @@ class CalendarSynchronizer:
         Returns:
             (bool, str): Tupla com (existe?, id do evento correspondente)
         """
-        print(f"Verificando duplicação de evento tipo '{source_type}' em '{target_type or 'destino'}'...")
-        
         if not target_type:
             if source_type == 'google':
                 target_type = 'outlook'
@@ -1200,7 +1551,7 @@ class CalendarSynchronizer:
         # Verificar primeiro se já existe um mapeamento no banco de dados
         if source_type == 'google' and 'id' in event:
             google_id = event['id']
-            mapped_ids = self.db.get_mapped_ids(google_id, 'google')
+            mapped_ids = self.mappings.get_mapped_ids(google_id, 'google')
             if mapped_ids and mapped_ids[0] and target_type == 'outlook':
                 outlook_id = mapped_ids[0]
                 if outlook_id in target_cache:
@@ -1209,7 +1560,7 @@ class CalendarSynchronizer:
         
         elif source_type == 'outlook' and 'id' in event:
             outlook_id = event['id']
-            mapped_ids = self.db.get_mapped_ids(outlook_id, 'outlook')
+            mapped_ids = self.mappings.get_mapped_ids(outlook_id, 'outlook')
             if mapped_ids and mapped_ids[0] and target_type == 'google':
                 google_id = mapped_ids[0]
                 if google_id in target_cache:
@@ -1217,166 +1568,73 @@ class CalendarSynchronizer:
                     return True, google_id
         
         # Se não tiver título, não podemos comparar adequadamente
-        event_title = None
-        if source_type == 'google':
-            event_title = event.get('summary', '').strip()
-        elif source_type == 'outlook':
-            event_title = event.get('subject', '').strip()
-        elif source_type == 'expresso':
-            event_title = event.get('titulo', '').strip()
-            
-        if not event_title:
+        record = self._normalized(source_type, event)
+        if not record.title:
             print(f"  - Evento sem título, não é possível verificar duplicação")
             return False, None
-        else:
-            print(f"  - Verificando evento com título: '{event_title}'")
-            
-        # Extração de data/hora depende do tipo de evento
-        event_datetime = None
-        try:
-            if source_type == 'google':
-                if 'dateTime' in event.get('start', {}):
-                    dt_str = event['start']['dateTime']
-                    event_datetime = datetime.fromisoformat(dt_str.replace("Z", "+00:00"))
-                    print(f"  - Data/hora do evento: {event_datetime}")
-                elif 'date' in event.get('start', {}):
-                    # Evento de dia inteiro
-                    dt_str = event['start']['date']
-                    event_datetime = datetime.fromisoformat(dt_str)
-                    print(f"  - Data do evento (dia inteiro): {event_datetime}")
-            elif source_type == 'outlook':
-                if 'dateTime' in event.get('start', {}):
-                    dt_str = event['start']['dateTime']
-                    event_datetime = datetime.fromisoformat(dt_str.replace("Z", "+00:00"))
-                    print(f"  - Data/hora do evento: {event_datetime}")
-                elif 'date' in event.get('start', {}):
-                    # Evento de dia inteiro
-                    dt_str = event['start']['date']
-                    event_datetime = datetime.fromisoformat(dt_str)
-                    print(f"  - Data do evento (dia inteiro): {event_datetime}")
-            elif source_type == 'expresso':
-                if 'data' in event and 'inicio' in event:
-                    data = event['data']
-                    hora = event['inicio']
-                    if data and hora and ':' in hora:
-                        dia, mes, ano = data.split('/')
-                        hora, minuto = hora.split(':')
-                        event_datetime = datetime(int(ano), int(mes), int(dia), int(hora), int(minuto))
-                        print(f"  - Data/hora do evento: {event_datetime}")
-        except (ValueError, TypeError, IndexError) as e:
-            print(f"  - Erro ao extrair data/hora: {e}")
-            # Continuar apenas com verificação de título
-            
-        print(f"  - Cache destino ({target_type}) tem {len(target_cache)} eventos para comparar")
-        
-        # Verificar cada evento no cache de destino
-        for target_id, target_event in target_cache.items():
-            # Extrair título do evento de destino
-            target_title = None
-            if target_type == 'google':
-                target_title = target_event.get('summary', '').strip()
-            elif target_type == 'outlook':
-                target_title = target_event.get('subject', '').strip()
-            elif target_type == 'expresso':
-                target_title = target_event.get('titulo', '').strip()
-                
-            if not target_title:
-                continue
-                
-            # Verificar correspondência de título
-            title_match = event_title.lower() == target_title.lower()
-            if not title_match:
-                # Verificar títulos similares
-                if (event_title.lower() in target_title.lower() or 
-                    target_title.lower() in event_title.lower()) and (
-                    len(event_title) > 5 and len(target_title) > 5):
-                    title_match = True
-                    print(f"  - Títulos similares: '{event_title}' e '{target_title}'")
-                else:
-                    continue
-            else:
-                print(f"  - Títulos idênticos: '{event_title}' e '{target_title}'")
-                    
-            # Se não temos data/hora para comparar, retornar com base apenas no título
-            if not event_datetime:
-                print(f"  - Match por título: '{event_title}' = '{target_title}'")
-                return True, target_id
-                
-            # Extrair data/hora do evento de destino
-            target_datetime = None
-            try:
-                if target_type == 'google':
-                    if 'dateTime' in target_event.get('start', {}):
-                        dt_str = target_event['start']['dateTime']
-                        target_datetime = datetime.fromisoformat(dt_str.replace("Z", "+00:00"))
-                        print(f"  - Data/hora do evento destino: {target_datetime}")
-                    elif 'date' in target_event.get('start', {}):
-                        dt_str = target_event['start']['date']
-                        target_datetime = datetime.fromisoformat(dt_str)
-                        print(f"  - Data do evento destino (dia inteiro): {target_datetime}")
-                elif target_type == 'outlook':
-                    if 'dateTime' in target_event.get('start', {}):
-                        dt_str = target_event['start']['dateTime']
-                        target_datetime = datetime.fromisoformat(dt_str.replace("Z", "+00:00"))
-                        print(f"  - Data/hora do evento destino: {target_datetime}")
-                    elif 'date' in target_event.get('start', {}):
-                        dt_str = target_event['start']['date']
-                        target_datetime = datetime.fromisoformat(dt_str)
-                        print(f"  - Data do evento destino (dia inteiro): {target_datetime}")
-                elif target_type == 'expresso':
-                    if 'data' in target_event and 'inicio' in target_event:
-                        data = target_event['data']
-                        hora = target_event['inicio']
-                        if data and hora and ':' in hora:
-                            dia, mes, ano = data.split('/')
-                            hora, minuto = hora.split(':')
-                            target_datetime = datetime(int(ano), int(mes), int(dia), int(hora), int(minuto))
-                            print(f"  - Data/hora do evento destino: {target_datetime}")
-            except (ValueError, TypeError, IndexError) as e:
-                print(f"  - Erro ao extrair data/hora do evento de destino: {e}")
-                # Se não conseguimos extrair a data do destino, consideramos o match pelo título
-                print(f"  - Match apenas por título (erro na data): '{event_title}'")
-                return True, target_id
-                
-            # Se não conseguimos extrair a data do evento de destino
-            if not target_datetime:
-                print(f"  - Match apenas por título (destino sem data): '{event_title}'")
-                return True, target_id
-            
-            # Garantir que ambos os datetimes são do mesmo tipo (naive ou aware)
-            # Opção 1: Tornar ambos naive (remover timezone)
-            if event_datetime and target_datetime:
-                if event_datetime.tzinfo is not None:
-                    event_datetime = event_datetime.replace(tzinfo=None)
-                if target_datetime.tzinfo is not None:
-                    target_datetime = target_datetime.replace(tzinfo=None)
-                
-            # Comparar as datas/horas com tolerância de 24 horas (86400 segundos)
-            try:
-                time_diff = abs((event_datetime - target_datetime).total_seconds())
-                if time_diff <= 86400:  # 24 horas
-                    print(f"  - Match completo (título e data) para evento: '{event_title}' em {event_datetime}")
-                    print(f"  - Diferença de tempo: {time_diff} segundos ({time_diff/3600:.2f} horas)")
-                    return True, target_id
-                else:
-                    print(f"  - Mesmo título mas data/hora muito diferente: {time_diff/3600:.2f} horas de diferença")
-            except TypeError as e:
-                print(f"  - Erro ao comparar datas: {e}. Assumindo match pelo título.")
-                return True, target_id
-            
-        # Se chegou aqui, nenhum evento correspondente foi encontrado
-        print("  - Nenhum evento correspondente encontrado")
-        return False, None
+
+        # Sem início legível a comparação é feita apenas pelo título
+        index = self._match_index(target_type, target_cache)
+        target_id, same_title = index.find(record)
+        if not target_id:
+            print(f"  - Nenhum evento correspondente a '{record.title}' entre {len(index)} do {target_type}")
+            return False, None
+
+        descricao = "título idêntico" if same_title else "título similar"
+        print(f"  - Match ({descricao}) para '{record.title}' em {record.start or 'data desconhecida'}: {target_id}")
+        return True, target_id
+
+    def _match_index(self, target_type, target_cache):
+        """Índice de duplicados do cache de destino, montado uma vez por ciclo"""
+        index = self._match_indexes.get(target_type)
+        if index is None or index.cache is not target_cache:
+            index = EventMatchIndex(
+                target_cache,
+                [self._normalized(target_type, event) for event in target_cache.values()],
+            )
+            self._match_indexes[target_type] = index
+        return index
+
+    def _normalized(self, provider, event):
+        """
+        Visão normalizada (NormalizedEvent) do evento, montada uma vez por evento lido.
+
+        A visão é reaproveitada enquanto o cache tiver o mesmo objeto do
+        evento; uma nova leitura do calendário traz outro objeto e a refaz.
+        """
+        key = (provider, event.get("id"))
+        record = self.normalized_events.get(key)
+        if record is None or record.raw is not event:
+            record = NormalizedEvent(event, provider)
+            # Eventos ainda sem ID (payloads a enviar) não entram no cache
+            if key[1]:
+                self.normalized_events[key] = record
+        return record
+
+    def _expresso_events_by_id(self):
+        """
+        Eventos do Expresso por ID, lidos uma vez por ciclo.
+
+        As escritas no Expresso só rodam no flush do fim do ciclo, então o
+        retrato continua válido até lá.
+        """
+        if self._cycle_expresso_events is None:
+            self._cycle_expresso_events = {
+                event["id"]: event
+                for event in self.expresso_sync.obterEventos()
+                if "id" in event
+            }
+        return self._cycle_expresso_events
 
     def _find_matching_event_by_id(self, event_id, source_type, target_cache):
         """Tenta encontrar um evento correspondente usando IDs externos armazenados em campos personalizados"""
         # Primeiro verificar no banco de dados
         if source_type == "google":
-            mapped_ids = self.db.get_mapped_ids(event_id, "google")
+            mapped_ids = self.mappings.get_mapped_ids(event_id, "google")
             if mapped_ids and mapped_ids[0]:
                 return mapped_ids[0]  # Retorna o ID do Outlook
         elif source_type == "outlook":
-            mapped_ids = self.db.get_mapped_ids(event_id, "outlook")
+            mapped_ids = self.mappings.get_mapped_ids(event_id, "outlook")
             if mapped_ids and mapped_ids[0]:
                 return mapped_ids[0]  # Retorna o ID do Google
         
@@ -1412,46 +1670,24 @@ class CalendarSynchronizer:
         elif "body" in outlook_event and "content" in outlook_event["body"]:
             expresso_event["descricao"] = outlook_event["body"]["content"]
         
-        # Data e hora
-        try:
-            if "start" in outlook_event:
-                # Verificar se é um evento de dia inteiro
-                if outlook_event.get("isAllDay", False) == True:
-                    # Eventos de dia inteiro
-                    expresso_event["dia_inteiro"] = True
-                    if "date" in outlook_event["start"]:
-                        date_str = outlook_event["start"]["date"]
-                    else:
-                        # Se não há 'date', tentar extrair da data/hora
-                        date_str = outlook_event["start"]["dateTime"].split("T")[0]
-                    
-                    # Converter YYYY-MM-DD para DD/MM/YYYY
-                    ano, mes, dia = date_str.split("-")
-                    expresso_event["data"] = f"{dia}/{mes}/{ano}"
-                else:
-                    # Eventos com horário específico
-                    if "dateTime" in outlook_event["start"]:
-                        start_dt = datetime.fromisoformat(
-                            outlook_event["start"]["dateTime"].replace("Z", "+00:00")
-                        )
-                        start_dt = start_dt.astimezone(tz=None)
-                        
-                        # Extrair data no formato DD/MM/YYYY
-                        expresso_event["data"] = start_dt.strftime("%d/%m/%Y")
-                        
-                        # Extrair hora de início
-                        expresso_event["hora_inicio"] = f"{start_dt.hour:02d}:{start_dt.minute:02d}"
-                    
-                    # Hora de término
-                    if "end" in outlook_event and "dateTime" in outlook_event["end"]:
-                        end_dt = datetime.fromisoformat(
-                            outlook_event["end"]["dateTime"].replace("Z", "+00:00")
-                        )
-                        end_dt = end_dt.astimezone(tz=None)
-                        expresso_event["hora_fim"] = f"{end_dt.hour:02d}:{end_dt.minute:02d}"
-        except Exception as e:
-            print(f"[ERRO] Falha ao processar data/hora do evento Outlook: {e}")
-        
+        # Data e hora, a partir do início e do fim já convertidos para UTC
+        outlook = self._normalized("outlook", outlook_event)
+        if outlook.start:
+            if outlook.all_day:
+                # Eventos de dia inteiro
+                expresso_event["dia_inteiro"] = True
+                expresso_event["data"] = outlook.start.strftime("%d/%m/%Y")
+            else:
+                # Eventos com horário específico, no fuso em que o Expresso mostra os horários
+                start_dt = expresso_local_datetime(outlook.start)
+                expresso_event["data"] = start_dt.strftime("%d/%m/%Y")
+                expresso_event["hora_inicio"] = start_dt.strftime("%H:%M")
+                if outlook.end:
+                    end_dt = expresso_local_datetime(outlook.end)
+                    expresso_event["hora_fim"] = end_dt.strftime("%H:%M")
+        elif "start" in outlook_event:
+            print(f"[ERRO] Falha ao processar data/hora do evento Outlook: {outlook_event['start']}")
+
         # Resto do método continua igual...
         
         # Log do evento convertido para depuração
@@ -1516,45 +1752,5 @@ class CalendarSynchronizer:
         """
         print(f"Removendo mapeamentos para: Google={google_id}, Outlook={outlook_id}, Expresso={expresso_id}")
         
-        # Remover do banco de dados
-        self.db.remove_mappings(google_id=google_id, outlook_id=outlook_id, expresso_id=expresso_id)
-        
-        # Remover dos mapas em memória
-        if google_id:
-            if google_id in self.google_to_outlook_map:
-                outlook_id_to_remove = self.google_to_outlook_map[google_id]
-                del self.google_to_outlook_map[google_id]
-                if outlook_id_to_remove in self.outlook_to_google_map:
-                    del self.outlook_to_google_map[outlook_id_to_remove]
-                
-            if hasattr(self, 'google_to_expresso_map') and google_id in self.google_to_expresso_map:
-                expresso_id_to_remove = self.google_to_expresso_map[google_id]
-                del self.google_to_expresso_map[google_id]
-                if hasattr(self, 'expresso_to_google_map') and expresso_id_to_remove in self.expresso_to_google_map:
-                    del self.expresso_to_google_map[expresso_id_to_remove]
-        
-        if outlook_id:
-            if outlook_id in self.outlook_to_google_map:
-                google_id_to_remove = self.outlook_to_google_map[outlook_id]
-                del self.outlook_to_google_map[outlook_id]
-                if google_id_to_remove in self.google_to_outlook_map:
-                    del self.google_to_outlook_map[google_id_to_remove]
-                
-            if hasattr(self, 'outlook_to_expresso_map') and outlook_id in self.outlook_to_expresso_map:
-                expresso_id_to_remove = self.outlook_to_expresso_map[outlook_id]
-                del self.outlook_to_expresso_map[outlook_id]
-                if hasattr(self, 'expresso_to_outlook_map') and expresso_id_to_remove in self.expresso_to_outlook_map:
-                    del self.expresso_to_outlook_map[expresso_id_to_remove]
-        
-        if expresso_id:
-            if hasattr(self, 'expresso_to_google_map') and expresso_id in self.expresso_to_google_map:
-                google_id_to_remove = self.expresso_to_google_map[expresso_id]
-                del self.expresso_to_google_map[expresso_id]
-                if google_id_to_remove in self.google_to_expresso_map:
-                    del self.google_to_expresso_map[google_id_to_remove]
-                
-            if hasattr(self, 'expresso_to_outlook_map') and expresso_id in self.expresso_to_outlook_map:
-                outlook_id_to_remove = self.expresso_to_outlook_map[expresso_id]
-                del self.expresso_to_outlook_map[expresso_id]
-                if outlook_id_to_remove in self.outlook_to_expresso_map:
-                    del self.outlook_to_expresso_map[outlook_id_to_remove]
+        # Remover do banco de dados e do índice em memória
+        self.mappings.remove(google_id=google_id, outlook_id=outlook_id, expresso_id=expresso_id)
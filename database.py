@@ -1,24 +1,73 @@
+import json
 import sqlite3
 from datetime import datetime, timedelta
 import os
 
+from normalized_event import NormalizedEvent, content_hashes as calcular_hashes, expresso_time
+
 
 class DatabaseManager:
+    # Configuração aplicada a cada conexão aberta por _connect
+    BUSY_TIMEOUT = 5  # segundos esperando um lock antes de desistir
+    PRAGMAS = {
+        "synchronous": "NORMAL",  # com WAL, seguro contra corrupção e sem fsync por commit
+        "cache_size": -16000,  # valor negativo em KiB: 16 MB de cache de páginas
+        "mmap_size": 64 * 1024 * 1024,
+        "temp_store": "MEMORY",
+    }
+
     def __init__(self, db_file="calendar_sync.db"):
         self.db_file = db_file
         self.conn = None
         self.setup_database()
 
+    def _connect(self, read_only=False):
+        """
+        Abre uma conexão com o banco já configurada.
+
+        A conexão de escrita ativa o modo WAL, em que leitores não bloqueiam
+        o escritor nem são bloqueados por ele.
+
+        Args:
+            read_only (bool): Abre o arquivo em modo somente leitura (mode=ro)
+
+        Returns:
+            sqlite3.Connection
+        """
+        if read_only:
+            conn = sqlite3.connect(
+                f"file:{os.path.abspath(self.db_file)}?mode=ro",
+                uri=True,
+                timeout=self.BUSY_TIMEOUT,
+            )
+        else:
+            conn = sqlite3.connect(self.db_file, timeout=self.BUSY_TIMEOUT)
+            # O modo WAL fica gravado no arquivo e vale para as próximas conexões
+            conn.execute("PRAGMA journal_mode = WAL")
+            # Habilitar chaves estrangeiras
+            conn.execute("PRAGMA foreign_keys = ON")
+
+        conn.execute(f"PRAGMA busy_timeout = {self.BUSY_TIMEOUT * 1000}")
+        for pragma, valor in self.PRAGMAS.items():
+            conn.execute(f"PRAGMA {pragma} = {valor}")
+        return conn
+
+    def read_only_connection(self):
+        """
+        Abre uma conexão somente leitura, por exemplo para um painel de status.
+
+        Graças ao WAL ela lê o último estado confirmado sem bloquear as
+        escritas do ciclo de sincronização. Quem abre deve fechar a conexão.
+        """
+        return self._connect(read_only=True)
+
     def setup_database(self):
         """Configura o banco de dados e cria tabelas se não existirem"""
         # Verificar se o banco de dados já existe
         db_exists = os.path.exists(self.db_file)
 
         # Conectar ao banco de dados (será criado se não existir)
-        self.conn = sqlite3.connect(self.db_file)
-
-        # Habilitar chaves estrangeiras
-        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn = self._connect()
 
         cursor = self.conn.cursor()
 
@@ -35,6 +84,8 @@ class DatabaseManager:
             is_all_day BOOLEAN,
             last_modified DATETIME,
             status VARCHAR(50),
+            content_hash VARCHAR(40),
+            raw_json TEXT,
             created_at DATETIME,
             updated_at DATETIME
         )
@@ -53,6 +104,8 @@ class DatabaseManager:
             is_all_day BOOLEAN,
             last_modified DATETIME,
             status VARCHAR(50),
+            content_hash VARCHAR(40),
+            raw_json TEXT,
             created_at DATETIME,
             updated_at DATETIME
         )
@@ -72,6 +125,7 @@ class DatabaseManager:
             participantes TEXT,
             last_modified DATETIME,
             status VARCHAR(50),
+            content_hash VARCHAR(40),
             created_at DATETIME,
             updated_at DATETIME
         )
@@ -94,6 +148,28 @@ class DatabaseManager:
         """
         )
 
+        cursor.execute(
+            """
+        CREATE TABLE IF NOT EXISTS sync_tokens (
+            source VARCHAR(20),
+            calendar_id VARCHAR(255),
+            token TEXT,
+            updated_at DATETIME,
+            window_start DATETIME,
+            PRIMARY KEY (source, calendar_id)
+        )
+        """
+        )
+
+        # Bancos criados antes do hash de conteúdo não têm a coluna
+        for tabela in ("outlook_events", "google_events", "expresso_events"):
+            self._add_column_if_missing(cursor, tabela, "content_hash", "VARCHAR(40)")
+        # Início da janela do deltaLink do Outlook, para refazê-la com o tempo
+        self._add_column_if_missing(cursor, "sync_tokens", "window_start", "DATETIME")
+        # O JSON completo do Google e do Outlook recompõe o cache ao reiniciar
+        for tabela in ("outlook_events", "google_events"):
+            self._add_column_if_missing(cursor, tabela, "raw_json", "TEXT")
+
         # Criar índices para otimização
         cursor.execute(
             "CREATE INDEX IF NOT EXISTS idx_outlook_id ON eventos_sincronizados(outlook_event_id)"
@@ -111,197 +187,189 @@ class DatabaseManager:
         if not db_exists:
             print(f"Banco de dados '{self.db_file}' criado com sucesso.")
 
-    # Métodos para manipular eventos do Outlook
-    def store_outlook_event(self, event):
-        """Armazena ou atualiza um evento do Outlook"""
-        cursor = self.conn.cursor()
+    def _add_column_if_missing(self, cursor, tabela, coluna, tipo):
+        """Adiciona uma coluna a uma tabela já existente, se ela ainda não existir"""
+        cursor.execute(f"PRAGMA table_info({tabela})")
+        if coluna not in [linha[1] for linha in cursor.fetchall()]:
+            cursor.execute(f"ALTER TABLE {tabela} ADD COLUMN {coluna} {tipo}")
+
+    # Colunas de cada tabela de eventos, na ordem usada pelas linhas de _linha_*
+    COLUNAS_OUTLOOK = (
+        "id", "subject", "start_datetime", "end_datetime", "location",
+        "description", "is_all_day", "last_modified", "status", "content_hash",
+        "raw_json",
+    )
+    COLUNAS_GOOGLE = (
+        "id", "summary", "start_datetime", "end_datetime", "location",
+        "description", "is_all_day", "last_modified", "status", "content_hash",
+        "raw_json",
+    )
+    COLUNAS_EXPRESSO = (
+        "id", "titulo", "data_inicio", "data_fim", "local", "descricao",
+        "is_all_day", "participantes", "last_modified", "status", "content_hash",
+    )
+
+    def _upsert_events(self, tabela, colunas, linhas):
+        """
+        Insere ou atualiza várias linhas em uma única transação.
+
+        Usa INSERT ... ON CONFLICT(id) DO UPDATE com executemany, então o
+        banco faz um único commit (e um único fsync) para o lote inteiro.
+        created_at só é preenchido na inserção.
+
+        Returns:
+            int: Quantidade de linhas enviadas
+        """
+        if not linhas:
+            return 0
+
         now = datetime.now().isoformat()
+        atualizacoes = ", ".join(
+            f"{coluna} = excluded.{coluna}" for coluna in colunas[1:] + ("updated_at",)
+        )
+        sql = f"""
+            INSERT INTO {tabela} ({", ".join(colunas)}, created_at, updated_at)
+            VALUES ({", ".join("?" * (len(colunas) + 2))})
+            ON CONFLICT(id) DO UPDATE SET {atualizacoes}
+        """
+        with self.conn:
+            self.conn.executemany(sql, [linha + (now, now) for linha in linhas])
+        return len(linhas)
 
-        # Verificar se o evento já existe
-        cursor.execute("SELECT id FROM outlook_events WHERE id = ?", (event["id"],))
-        exists = cursor.fetchone()
+    def _hashes_das_linhas(self, events, provider, content_hashes):
+        """
+        Hash de conteúdo de cada ID (normalized_event.content_hashes).
 
-        if exists:
-            # Atualizar evento existente
-            cursor.execute(
-                """
-                UPDATE outlook_events SET
-                subject = ?, start_datetime = ?, end_datetime = ?,
-                location = ?, description = ?, is_all_day = ?,
-                last_modified = ?, status = ?, updated_at = ?
-                WHERE id = ?
-            """,
-                (
-                    event.get("subject", ""),
-                    event.get("start", {}).get("dateTime", ""),
-                    event.get("end", {}).get("dateTime", ""),
-                    event.get("location", {}).get("displayName", ""),
-                    event.get("body", {}).get("content", ""),
-                    event.get("isAllDay", False),
-                    event.get("lastModifiedDateTime", now),
-                    "ativo",
-                    now,
-                    event["id"],
-                ),
-            )
-        else:
-            # Inserir novo evento
-            cursor.execute(
-                """
-                INSERT INTO outlook_events (
-                    id, subject, start_datetime, end_datetime,
-                    location, description, is_all_day,
-                    last_modified, status, created_at, updated_at
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-                (
-                    event["id"],
-                    event.get("subject", ""),
-                    event.get("start", {}).get("dateTime", ""),
-                    event.get("end", {}).get("dateTime", ""),
-                    event.get("location", {}).get("displayName", ""),
-                    event.get("body", {}).get("content", ""),
-                    event.get("isAllDay", False),
-                    event.get("lastModifiedDateTime", now),
-                    "ativo",
-                    now,
-                    now,
-                ),
-            )
+        Quem já calculou os hashes passa content_hashes ({id: hash}); um ID
+        ausente do dicionário fica sem hash no banco.
+        """
+        if content_hashes is not None:
+            return content_hashes
+        return calcular_hashes(
+            NormalizedEvent(event, provider) for event in events if "id" in event
+        )
 
-        self.conn.commit()
-        return event["id"]
+    def get_content_hashes(self, source):
+        """
+        Retorna o hash de conteúdo gravado de cada evento de um calendário.
 
-    # Métodos para manipular eventos do Google
-    def store_google_event(self, event):
-        """Armazena ou atualiza um evento do Google"""
+        Args:
+            source (str): 'google', 'outlook' ou 'expresso'
+
+        Returns:
+            dict: {id do evento: hash}, apenas dos eventos que têm hash
+        """
         cursor = self.conn.cursor()
-        now = datetime.now().isoformat()
+        cursor.execute(
+            f"SELECT id, content_hash FROM {source}_events WHERE content_hash IS NOT NULL"
+        )
+        return dict(cursor.fetchall())
 
-        # Verificar se o evento já existe
-        cursor.execute("SELECT id FROM google_events WHERE id = ?", (event["id"],))
-        exists = cursor.fetchone()
+    # Métodos para manipular eventos do Outlook
+    def _linha_outlook(self, event, now, content_hash):
+        return (
+            event["id"],
+            event.get("subject", ""),
+            event.get("start", {}).get("dateTime", ""),
+            event.get("end", {}).get("dateTime", ""),
+            event.get("location", {}).get("displayName", ""),
+            event.get("body", {}).get("content", ""),
+            event.get("isAllDay", False),
+            event.get("lastModifiedDateTime", now),
+            "ativo",
+            content_hash,
+            json.dumps(event),
+        )
 
-        if exists:
-            # Atualizar evento existente
-            cursor.execute(
-                """
-                UPDATE google_events SET
-                summary = ?, start_datetime = ?, end_datetime = ?,
-                location = ?, description = ?, is_all_day = ?,
-                last_modified = ?, status = ?, updated_at = ?
-                WHERE id = ?
-            """,
-                (
-                    event.get("summary", ""),
-                    event.get("start", {}).get("dateTime", ""),
-                    event.get("end", {}).get("dateTime", ""),
-                    event.get("location", ""),
-                    event.get("description", ""),
-                    "dateTime"
-                    not in event.get("start", {}),  # se não tem dateTime, é all day
-                    event.get("updated", now),
-                    "ativo",
-                    now,
-                    event["id"],
-                ),
-            )
-        else:
-            # Inserir novo evento
-            cursor.execute(
-                """
-                INSERT INTO google_events (
-                    id, summary, start_datetime, end_datetime,
-                    location, description, is_all_day,
-                    last_modified, status, created_at, updated_at
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-                (
-                    event["id"],
-                    event.get("summary", ""),
-                    event.get("start", {}).get("dateTime", ""),
-                    event.get("end", {}).get("dateTime", ""),
-                    event.get("location", ""),
-                    event.get("description", ""),
-                    "dateTime" not in event.get("start", {}),
-                    event.get("updated", now),
-                    "ativo",
-                    now,
-                    now,
-                ),
-            )
+    def store_outlook_events(self, events, content_hashes=None):
+        """Armazena ou atualiza vários eventos do Outlook em uma única transação"""
+        now = datetime.now().isoformat()
+        hashes = self._hashes_das_linhas(events, "outlook", content_hashes)
+        linhas = [
+            self._linha_outlook(event, now, hashes.get(event["id"]))
+            for event in events
+            if "id" in event
+        ]
+        return self._upsert_events("outlook_events", self.COLUNAS_OUTLOOK, linhas)
 
-        self.conn.commit()
+    def store_outlook_event(self, event):
+        """Armazena ou atualiza um evento do Outlook"""
+        self.store_outlook_events([event])
         return event["id"]
 
-    # Métodos para manipular eventos do Expresso
-    def store_expresso_event(self, event):
-        """Armazena ou atualiza um evento do Expresso"""
-        cursor = self.conn.cursor()
+    # Métodos para manipular eventos do Google
+    def _linha_google(self, event, now, content_hash):
+        return (
+            event["id"],
+            event.get("summary", ""),
+            event.get("start", {}).get("dateTime", ""),
+            event.get("end", {}).get("dateTime", ""),
+            event.get("location", ""),
+            event.get("description", ""),
+            "dateTime" not in event.get("start", {}),  # se não tem dateTime, é all day
+            event.get("updated", now),
+            "ativo",
+            content_hash,
+            json.dumps(event),
+        )
+
+    def store_google_events(self, events, content_hashes=None):
+        """Armazena ou atualiza vários eventos do Google em uma única transação"""
         now = datetime.now().isoformat()
+        hashes = self._hashes_das_linhas(events, "google", content_hashes)
+        linhas = [
+            self._linha_google(event, now, hashes.get(event["id"]))
+            for event in events
+            if "id" in event
+        ]
+        return self._upsert_events("google_events", self.COLUNAS_GOOGLE, linhas)
 
-        # Verificar se o evento já existe
-        cursor.execute("SELECT id FROM expresso_events WHERE id = ?", (event["id"],))
-        exists = cursor.fetchone()
+    def store_google_event(self, event):
+        """Armazena ou atualiza um evento do Google"""
+        self.store_google_events([event])
+        return event["id"]
 
-        if exists:
-            # Atualizar evento existente
-            cursor.execute(
-                """
-                UPDATE expresso_events SET
-                titulo = ?, data_inicio = ?, data_fim = ?,
-                local = ?, descricao = ?, is_all_day = ?,
-                participantes = ?, last_modified = ?, status = ?, updated_at = ?
-                WHERE id = ?
-            """,
-                (
-                    event.get("titulo", ""),
-                    f"{event.get('data', '')} {event.get('inicio', '')}",
-                    f"{event.get('data', '')} {event.get('fim', '')}",
-                    "",  # local não está disponível no objeto de evento Expresso
-                    event.get("descricao", ""),
-                    False,  # assumindo que eventos no Expresso não são de dia inteiro
-                    event.get("participantes", ""),
-                    now,  # não temos data de modificação no Expresso
-                    "ativo",
-                    now,
-                    event["id"],
-                ),
-            )
-        else:
-            # Inserir novo evento
-            cursor.execute(
-                """
-                INSERT INTO expresso_events (
-                    id, titulo, data_inicio, data_fim,
-                    local, descricao, is_all_day, participantes,
-                    last_modified, status, created_at, updated_at
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-                (
-                    event["id"],
-                    event.get("titulo", ""),
-                    f"{event.get('data', '')} {event.get('inicio', '')}",
-                    f"{event.get('data', '')} {event.get('fim', '')}",
-                    "",  # local não está disponível no objeto de evento Expresso
-                    event.get("descricao", ""),
-                    False,  # assumindo que eventos no Expresso não são de dia inteiro
-                    event.get("participantes", ""),
-                    now,  # não temos data de modificação no Expresso
-                    "ativo",
-                    now,
-                    now,
-                ),
-            )
+    # Métodos para manipular eventos do Expresso
+    def _linha_expresso(self, event, now, content_hash):
+        # A leitura traz inicio/fim; o payload enviado ao Expresso, hora_inicio/hora_fim
+        inicio = expresso_time(event.get("inicio") or event.get("hora_inicio"))
+        fim = expresso_time(event.get("fim") or event.get("hora_fim"))
+        data = event.get("data", "")
+        return (
+            event["id"],
+            event.get("titulo", ""),
+            f"{data} {inicio}".strip(),
+            f"{event.get('data_fim') or data} {fim}".strip(),
+            event.get("localizacao") or "",
+            event.get("descricao", ""),
+            bool(event.get("dia_inteiro")),
+            event.get("participantes", ""),
+            now,  # não temos data de modificação no Expresso
+            "ativo",
+            content_hash,
+        )
 
-        self.conn.commit()
+    def store_expresso_events(self, events, content_hashes=None):
+        """Armazena ou atualiza vários eventos do Expresso em uma única transação"""
+        now = datetime.now().isoformat()
+        hashes = self._hashes_das_linhas(events, "expresso", content_hashes)
+        linhas = [
+            self._linha_expresso(event, now, hashes.get(event["id"]))
+            for event in events
+            if "id" in event
+        ]
+        return self._upsert_events("expresso_events", self.COLUNAS_EXPRESSO, linhas)
+
+    def store_expresso_event(self, event):
+        """Armazena ou atualiza um evento do Expresso"""
+        self.store_expresso_events([event])
         return event["id"]
 
     # Métodos para gerenciar mapeamentos entre eventos
     def map_events(
         self, outlook_id=None, google_id=None, expresso_id=None, origem=None
     ):
-        """Criar ou atualizar mapeamento entre eventos"""
+        """Criar ou atualizar mapeamento entre eventos; retorna o id da linha"""
         cursor = self.conn.cursor()
         try:
             # Iniciar transação
@@ -365,9 +433,11 @@ class DatabaseManager:
                 """,
                     (outlook_id, google_id, expresso_id, now, origem),
                 )
+                mapping_id = cursor.lastrowid
 
             # Confirmar transação
             self.conn.commit()
+            return mapping_id
         except Exception as e:
             # Em caso de erro, reverter
             self.conn.rollback()
@@ -407,6 +477,37 @@ class DatabaseManager:
 
         return cursor.fetchone()
 
+    def mark_events_deleted(self, source, event_ids):
+        """Marca vários eventos de um calendário como excluídos em uma única transação"""
+        if source not in ("outlook", "google", "expresso") or not event_ids:
+            return 0
+        now = datetime.now().isoformat()
+        with self.conn:
+            self.conn.executemany(
+                f"UPDATE {source}_events SET status = 'excluído', updated_at = ? WHERE id = ?",
+                [(now, event_id) for event_id in event_ids],
+            )
+        return len(event_ids)
+
+    def get_cached_events(self, source):
+        """
+        Retorna os eventos ativos do Google ou do Outlook como vieram da API,
+        para recompor o cache em memória ao iniciar.
+
+        Args:
+            source (str): 'google' ou 'outlook'
+
+        Returns:
+            list: Eventos ativos; None se algum deles não tiver o JSON gravado
+            (linhas anteriores à coluna raw_json), pois o cache ficaria incompleto
+        """
+        cursor = self.conn.cursor()
+        cursor.execute(f"SELECT raw_json FROM {source}_events WHERE status = 'ativo'")
+        linhas = cursor.fetchall()
+        if any(raw_json is None for (raw_json,) in linhas):
+            return None
+        return [json.loads(raw_json) for (raw_json,) in linhas]
+
     def mark_event_deleted(self, event_id, source):
         """Marca um evento como excluído"""
         cursor = self.conn.cursor()
@@ -439,6 +540,59 @@ class DatabaseManager:
 
         self.conn.commit()
 
+    # Métodos para tokens de sincronização incremental
+    def get_sync_token(self, source, calendar_id):
+        """Retorna o último token de sincronização incremental de um calendário"""
+        cursor = self.conn.cursor()
+        cursor.execute(
+            "SELECT token FROM sync_tokens WHERE source = ? AND calendar_id = ?",
+            (source, calendar_id),
+        )
+        row = cursor.fetchone()
+        return row[0] if row else None
+
+    def get_sync_window_start(self, source, calendar_id):
+        """Retorna o início da janela coberta pelo token (deltaLink do Outlook), se houver"""
+        cursor = self.conn.cursor()
+        cursor.execute(
+            "SELECT window_start FROM sync_tokens WHERE source = ? AND calendar_id = ?",
+            (source, calendar_id),
+        )
+        row = cursor.fetchone()
+        return datetime.fromisoformat(row[0]) if row and row[0] else None
+
+    def store_sync_token(self, source, calendar_id, token, window_start=None):
+        """Armazena o token de sincronização incremental de um calendário"""
+        if not token:
+            self.clear_sync_token(source, calendar_id)
+            return
+
+        cursor = self.conn.cursor()
+        cursor.execute(
+            """
+            INSERT OR REPLACE INTO sync_tokens
+                (source, calendar_id, token, updated_at, window_start)
+            VALUES (?, ?, ?, ?, ?)
+        """,
+            (
+                source,
+                calendar_id,
+                token,
+                datetime.now().isoformat(),
+                window_start.isoformat() if window_start else None,
+            ),
+        )
+        self.conn.commit()
+
+    def clear_sync_token(self, source, calendar_id):
+        """Remove o token de sincronização, forçando uma listagem completa"""
+        cursor = self.conn.cursor()
+        cursor.execute(
+            "DELETE FROM sync_tokens WHERE source = ? AND calendar_id = ?",
+            (source, calendar_id),
+        )
+        self.conn.commit()
+
     def get_all_mappings(self):
         """Retorna todos os mapeamentos de eventos"""
         cursor = self.conn.cursor()
@@ -599,6 +753,10 @@ class DatabaseManager:
             google_id: ID do evento no Google
             outlook_id: ID do evento no Outlook
             expresso_id: ID do evento no Expresso
+
+        Returns:
+            bool: True se o DELETE foi confirmado; False se falhou ou se
+            nenhum ID foi informado
         """
         try:
             conditions = []
@@ -616,14 +774,18 @@ class DatabaseManager:
             
             if not conditions:
                 print("Nenhum ID fornecido para remover mapeamentos")
-                return
+                return False
             
             where_clause = " OR ".join(conditions)
             
-            self.conn.cursor().execute(
+            cursor = self.conn.cursor()
+            cursor.execute(
                 f"DELETE FROM eventos_sincronizados WHERE {where_clause}", params
             )
             self.conn.commit()
-            print(f"Mapeamentos removidos do banco de dados: {self.conn.cursor().rowcount} registros")
+            print(f"Mapeamentos removidos do banco de dados: {cursor.rowcount} registros")
+            return True
         except Exception as e:
+            self.conn.rollback()
             print(f"Erro ao remover mapeamentos do banco de dados: {e}")
+            return False
@@ -0,0 +1,93 @@
+from datetime import timedelta
+
+# Diferença máxima entre os inícios para eventos de mesmo título serem o mesmo evento
+MATCH_TOLERANCE = timedelta(hours=24)
+
+# Títulos mais curtos que isso só correspondem se forem idênticos
+MIN_SIMILAR_TITLE = 5
+
+
+class EventMatchIndex:
+    """
+    Índice de um cache de eventos para encontrar duplicados sem percorrer tudo.
+
+    Usa a visão normalizada de cada evento (NormalizedEvent): o título vai
+    para um dicionário de títulos e o início, já em UTC, para um balde
+    por dia. Títulos idênticos são achados direto no dicionário; títulos
+    parecidos (um contido no outro) só são procurados nos baldes do dia
+    anterior, do próprio dia e do seguinte.
+    """
+
+    def __init__(self, cache, records):
+        """
+        Args:
+            cache (dict): Eventos por ID (o índice guarda a referência para reuso)
+            records (iterable): NormalizedEvent de cada evento do cache, na ordem do cache
+        """
+        self.cache = cache
+        self.by_title = {}  # título em minúsculas -> entradas
+        self.by_day = {}  # data do início em UTC -> entradas
+        self.undated = []  # entradas sem início legível
+        self.entries = []
+
+        for order, record in enumerate(records):
+            if not record.title:
+                continue
+            entry = (order, record.id, record.title_key, record.start)
+            self.entries.append(entry)
+            self.by_title.setdefault(record.title_key, []).append(entry)
+            if record.start is None:
+                self.undated.append(entry)
+            else:
+                self.by_day.setdefault(record.start.date(), []).append(entry)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def find(self, record):
+        """
+        Procura o evento correspondente, com a mesma regra da busca linear:
+        título idêntico (sem diferenciar maiúsculas) ou um contido no outro,
+        quando ambos têm mais de MIN_SIMILAR_TITLE caracteres, e início a no
+        máximo MATCH_TOLERANCE de distância. Se um dos dois não tem início,
+        vale apenas o título. Entre vários, vence o primeiro do cache.
+
+        Args:
+            record (NormalizedEvent): Evento de origem
+
+        Returns:
+            tuple: (id do evento, True se o título é idêntico) ou (None, False)
+        """
+        title = record.title
+        title_lower = record.title_key
+        start = record.start
+
+        candidates = list(self.by_title.get(title_lower, ()))
+        if len(title) > MIN_SIMILAR_TITLE:
+            if start is None:
+                nearby = self.entries
+            else:
+                nearby = list(self.undated)
+                for offset in (-1, 0, 1):
+                    nearby.extend(self.by_day.get(start.date() + timedelta(days=offset), ()))
+            for entry in nearby:
+                other = entry[2]
+                if (
+                    other != title_lower
+                    and len(other) > MIN_SIMILAR_TITLE
+                    and (title_lower in other or other in title_lower)
+                ):
+                    candidates.append(entry)
+
+        best = None
+        for entry in candidates:
+            entry_start = entry[3]
+            if start is not None and entry_start is not None:
+                if abs(start - entry_start) > MATCH_TOLERANCE:
+                    continue
+            if best is None or entry[0] < best[0]:
+                best = entry
+
+        if best is None:
+            return None, False
+        return best[1], best[2] == title_lower
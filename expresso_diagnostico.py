@@ -0,0 +1,117 @@
+import os
+import queue
+import random
+import threading
+from datetime import datetime
+
+# Pasta onde as páginas capturadas para diagnóstico são guardadas
+DIRETORIO_CAPTURAS = "capturas_expresso"
+
+
+class CapturaPaginas:
+    """
+    Captura de páginas do Expresso para diagnóstico, fora do caminho principal.
+
+    As páginas são gravadas por uma thread em segundo plano em uma pasta
+    rotativa: os arquivos mais antigos são apagados quando a pasta passa de
+    max_arquivos ou de max_bytes. Se a fila estiver cheia a captura é
+    descartada, para que a leitura do calendário nunca espere pelo disco.
+    """
+
+    def __init__(
+        self,
+        diretorio=DIRETORIO_CAPTURAS,
+        amostragem=0.0,
+        max_arquivos=20,
+        max_bytes=20 * 1024 * 1024,
+        max_fila=5,
+    ):
+        """
+        Args:
+            diretorio (str): Pasta das capturas
+            amostragem (float): Fração das leituras normais que é capturada
+                (0 captura apenas em caso de erro, 1 captura todas)
+            max_arquivos (int): Quantidade máxima de arquivos na pasta
+            max_bytes (int): Tamanho máximo da pasta; também limita cada arquivo
+            max_fila (int): Capturas aguardando gravação antes de descartar novas
+        """
+        self.diretorio = diretorio
+        self.amostragem = amostragem
+        self.max_arquivos = max_arquivos
+        self.max_bytes = max_bytes
+        self.fila = queue.Queue(maxsize=max_fila)
+        self.thread = None
+        self.lock = threading.Lock()
+
+    def amostrar(self):
+        """Indica se a leitura atual deve ser capturada pela amostragem"""
+        return self.amostragem > 0 and random.random() < self.amostragem
+
+    def salvar(self, nome, html):
+        """Enfileira a página para gravação em segundo plano; retorna False se descartada"""
+        if not html:
+            return False
+        self._iniciar_thread()
+        try:
+            self.fila.put_nowait((nome, html))
+            return True
+        except queue.Full:
+            print(f"Fila de capturas cheia, página '{nome}' descartada")
+            return False
+
+    def fechar(self, timeout=5):
+        """Grava as capturas pendentes e encerra a thread"""
+        if self.thread is None:
+            return
+        try:
+            self.fila.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        self.thread.join(timeout)
+        self.thread = None
+
+    def _iniciar_thread(self):
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(
+                    target=self._gravar_fila, name="captura-expresso", daemon=True
+                )
+                self.thread.start()
+
+    def _gravar_fila(self):
+        while True:
+            item = self.fila.get()
+            if item is None:
+                return
+            nome, html = item
+            try:
+                self._gravar(nome, html)
+            except Exception as e:
+                print(f"Erro ao gravar captura da página '{nome}': {e}")
+
+    def _gravar(self, nome, html):
+        os.makedirs(self.diretorio, exist_ok=True)
+        conteudo = html.encode("utf-8")[: self.max_bytes]
+        arquivo = os.path.join(
+            self.diretorio,
+            f"{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}_{nome}.html",
+        )
+        with open(arquivo, "wb") as f:
+            f.write(conteudo)
+        print(f"Página '{nome}' salva em {arquivo} para análise")
+        self._rotacionar()
+
+    def _rotacionar(self):
+        """Apaga as capturas mais antigas até respeitar os limites da pasta"""
+        arquivos = []
+        for entrada in os.scandir(self.diretorio):
+            if entrada.is_file() and entrada.name.endswith(".html"):
+                arquivos.append(entrada)
+        # O nome começa com a data e hora, então a ordem alfabética é cronológica
+        arquivos.sort(key=lambda entrada: entrada.name)
+
+        total = sum(entrada.stat().st_size for entrada in arquivos)
+        while arquivos and (len(arquivos) > self.max_arquivos or total > self.max_bytes):
+            antigo = arquivos.pop(0)
+            total -= antigo.stat().st_size
+            os.remove(antigo.path)
@@ -0,0 +1,269 @@
+import requests
+from itertools import chain
+from datetime import datetime
+from lxml import html as lxml_html
+from urllib.parse import urlparse, parse_qs, urljoin
+from expresso_parser import URL_BASE_EXPRESSO, extrair_eventos_html
+
+# Formulário "Exportar todos" da página do calendário, que devolve um arquivo .ics
+URL_EXPORTACAO_ICAL = "/index.php?menuaction=calendar.uicalendar.export_all"
+
+# Nomes dos campos do formulário de evento. A edição (uicalendar.edit) usa o
+# mesmo formulário da inclusão (uicalendar.add), então os nomes valem para os dois
+CAMPOS_FORMULARIO_EVENTO = {
+    "titulo": "cal[title]",
+    "descricao": "cal[description]",
+    "localizacao": "cal[location]",
+    "data_inicio": "start[str]",
+    "data_fim": "end[str]",
+    "hora_inicio": "start[hour]",
+    "minuto_inicio": "start[min]",
+    "hora_fim": "end[hour]",
+    "minuto_fim": "end[min]",
+}
+
+
+def campos_formulario_evento(event_data, horarios, completo=False):
+    """
+    Monta os campos do formulário de evento a partir dos dados informados.
+
+    Usado tanto pelo envio HTTP quanto pelo preenchimento no navegador.
+
+    Args:
+        event_data (dict): Evento no formato do Expresso
+        horarios (callable): Retorna (hora_inicio, minuto_inicio, hora_fim,
+            minuto_fim) de event_data
+        completo (bool): Inclui os campos vazios (formulário de inclusão);
+            sem ele, só entram os campos informados em event_data
+
+    Returns:
+        dict: {nome do campo no formulário: valor}
+    """
+    valores = {}
+    for chave in ("titulo", "descricao", "localizacao"):
+        if completo or event_data.get(chave):
+            valores[chave] = event_data.get(chave, "")
+    if event_data.get("data"):
+        valores["data_inicio"] = event_data["data"]
+        valores["data_fim"] = event_data["data"]
+
+    if completo or any(
+        event_data.get(chave) for chave in ("inicio", "fim", "hora_inicio", "hora_fim")
+    ):
+        (
+            valores["hora_inicio"],
+            valores["minuto_inicio"],
+            valores["hora_fim"],
+            valores["minuto_fim"],
+        ) = horarios(event_data)
+
+    return {CAMPOS_FORMULARIO_EVENTO[chave]: valor for chave, valor in valores.items()}
+
+
+class ExpressoHttp:
+    """
+    Cliente HTTP direto para o calendário do Expresso (eGroupWare).
+
+    Reaproveita os cookies do navegador já logado e lista, cria, edita e
+    exclui eventos com requisições GET/POST aos formulários de
+    menuaction=calendar.uicalendar.*, sem carregar páginas no Chrome. O
+    navegador só é usado de novo para refazer o login quando a sessão expira.
+    """
+
+    def __init__(self, expresso_sync, url_base=URL_BASE_EXPRESSO, timeout=30):
+        """
+        Args:
+            expresso_sync (sincronizarExpresso): Instância já logada no navegador
+            url_base (str): Endereço do Expresso
+            timeout (int): Tempo máximo, em segundos, de cada requisição
+        """
+        self.expresso_sync = expresso_sync
+        self.url_base = url_base
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.importar_cookies()
+
+    def importar_cookies(self):
+        """Copia os cookies e o User-Agent do navegador para a sessão HTTP"""
+        driver = self.expresso_sync.driver
+        self.session.cookies.clear()
+        for cookie in driver.get_cookies():
+            self.session.cookies.set(
+                cookie["name"],
+                cookie["value"],
+                domain=cookie.get("domain"),
+                path=cookie.get("path", "/"),
+            )
+        self.session.headers["User-Agent"] = driver.execute_script(
+            "return navigator.userAgent"
+        )
+
+    def listar_eventos(self, data=None):
+        """Lista os eventos do mês da data informada (padrão: mês atual)"""
+        data = data or datetime.now()
+        response = self._request(
+            "GET",
+            "/index.php",
+            params={
+                "menuaction": "calendar.uicalendar.month",
+                "date": data.strftime("%Y%m%d"),
+            },
+        )
+        eventos = extrair_eventos_html(response.text, self.url_base)
+        print(f"Encontrados {len(eventos)} eventos no Expresso (HTTP)")
+        return eventos
+
+    def exportar_ical(self, url_exportacao=URL_EXPORTACAO_ICAL):
+        """
+        Baixa a exportação iCalendar do calendário em uma única requisição.
+
+        Returns:
+            iterator: Linhas do arquivo .ics, lidas à medida que chegam
+        """
+        response = self._request(
+            "POST", url_exportacao, data={"exportUserId": ""}, stream=True
+        )
+        response.encoding = response.encoding or "utf-8"
+        linhas = response.iter_lines(decode_unicode=True)
+
+        primeira = next(linhas, "")
+        if "BEGIN:VCALENDAR" not in primeira:
+            response.close()
+            raise Exception("A exportação do Expresso não retornou um arquivo iCalendar")
+        return chain([primeira], linhas)
+
+    def criar_evento(self, event_data):
+        """Cria um evento enviando o formulário de inclusão; retorna event_data com o id"""
+        params = {"menuaction": "calendar.uicalendar.add"}
+        data = self._data_parametro(event_data.get("data"))
+        if data:
+            params["date"] = data
+
+        formulario = self._abrir_formulario(params, CAMPOS_FORMULARIO_EVENTO["titulo"])
+        response = self._enviar_formulario(
+            formulario, self._campos_evento(event_data, completo=True)
+        )
+
+        event_data["id"] = self._cal_id(response.url)
+        print(f"Evento criado no Expresso (HTTP) com ID: {event_data['id']}")
+        return event_data
+
+    def atualizar_evento(self, event_id, event_data):
+        """Atualiza um evento enviando o formulário de edição"""
+        params = {"menuaction": "calendar.uicalendar.edit", "cal_id": event_id}
+        data = self._data_parametro(event_data.get("data"))
+        if data:
+            params["date"] = data
+
+        formulario = self._abrir_formulario(params, CAMPOS_FORMULARIO_EVENTO["titulo"])
+        self._enviar_formulario(formulario, self._campos_evento(event_data))
+        print(f"Evento atualizado no Expresso (HTTP): {event_id}")
+        return True
+
+    def excluir_evento(self, event_id, data=None):
+        """Exclui um evento enviando o formulário com o botão de remover"""
+        params = {"menuaction": "calendar.uicalendar.view", "cal_id": event_id}
+        data = self._data_parametro(data)
+        if data:
+            params["date"] = data
+
+        response = self._request("GET", "/index.php", params=params)
+        documento = lxml_html.fromstring(response.text, base_url=response.url)
+        botoes = documento.xpath(
+            "//form//input[translate(@value, 'R', 'r')='remover']"
+        )
+        if not botoes:
+            raise Exception(f"Botão de remover não encontrado para o evento {event_id}")
+
+        # A confirmação é só um alerta em JavaScript; basta enviar o formulário
+        formulario = botoes[0].xpath("ancestor::form[1]")[0]
+        self._enviar_formulario(formulario, {}, botao=botoes[0])
+        print(f"Evento deletado no Expresso (HTTP): {event_id}")
+        return True
+
+    def _request(self, method, url, **kwargs):
+        """Faz a requisição e, se a sessão tiver expirado, refaz o login pelo navegador"""
+        url = urljoin(self.url_base, url)
+        response = self.session.request(method, url, timeout=self.timeout, **kwargs)
+
+        if self._sessao_expirada(response):
+            print("Sessão do Expresso expirada, refazendo o login pelo navegador")
+            self._renovar_sessao()
+            response = self.session.request(method, url, timeout=self.timeout, **kwargs)
+            if self._sessao_expirada(response):
+                raise Exception("Não foi possível renovar a sessão do Expresso")
+
+        if response.status_code >= 400:
+            raise Exception(
+                f"Erro {response.status_code} na requisição ao Expresso: {response.url}"
+            )
+        return response
+
+    def _renovar_sessao(self):
+        """
+        Refaz o login apenas no navegador principal e copia os novos cookies.
+
+        Não usa expresso_sync.fechar(), que também encerraria o pool de
+        escrita e a thread de capturas.
+        """
+        try:
+            self.expresso_sync._fazer_login()
+        except Exception as e:
+            # Navegador travado ou encerrado: abrir outro no lugar dele
+            print(f"Navegador do Expresso sem resposta ({e}), abrindo outro")
+            try:
+                self.expresso_sync.driver.quit()
+            except Exception:
+                pass
+            self.expresso_sync.login()
+        self.importar_cookies()
+
+    def _sessao_expirada(self, response):
+        """O eGroupWare redireciona para a tela de login quando a sessão acaba"""
+        return "login.php" in urlparse(response.url).path
+
+    def _abrir_formulario(self, params, campo):
+        """Carrega uma página e retorna o formulário que contém o campo informado"""
+        response = self._request("GET", "/index.php", params=params)
+        documento = lxml_html.fromstring(response.text, base_url=response.url)
+        formularios = documento.xpath(f"//form[.//*[@name='{campo}']]")
+        if not formularios:
+            raise Exception(f"Formulário com o campo {campo} não encontrado em {response.url}")
+        return formularios[0]
+
+    def _enviar_formulario(self, formulario, campos, botao=None):
+        """Envia o formulário mantendo os campos ocultos e aplicando os valores informados"""
+        valores = dict(formulario.form_values())
+        valores.update(campos)
+
+        # O botão de envio não entra em form_values, mas o servidor pode verificá-lo
+        if botao is None:
+            botoes = formulario.xpath(".//input[@id='submit_button']")
+            botao = botoes[0] if botoes else None
+        if botao is not None and botao.get("name"):
+            valores[botao.get("name")] = botao.get("value", "")
+
+        metodo = (formulario.get("method") or "GET").upper()
+        acao = urljoin(formulario.base_url, formulario.get("action") or "")
+        if metodo == "POST":
+            return self._request("POST", acao, data=valores)
+        return self._request("GET", acao, params=valores)
+
+    def _campos_evento(self, event_data, completo=False):
+        """Monta os campos do formulário de evento a partir dos dados informados"""
+        return campos_formulario_evento(
+            event_data, self.expresso_sync._horarios_do_evento, completo
+        )
+
+    def _data_parametro(self, data):
+        """Converte dd/mm/aaaa para o formato aaaammdd usado nas URLs do calendário"""
+        if not data:
+            return ""
+        try:
+            return datetime.strptime(data, "%d/%m/%Y").strftime("%Y%m%d")
+        except ValueError:
+            return data
+
+    def _cal_id(self, url):
+        """Obtém o cal_id da URL de resposta"""
+        return parse_qs(urlparse(url).query).get("cal_id", [""])[0]
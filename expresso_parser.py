@@ -0,0 +1,273 @@
+from lxml import html as lxml_html
+from urllib.parse import urlparse, parse_qs, urljoin
+from datetime import datetime, date, timezone
+from dateutil.rrule import rrulestr
+from zoneinfo import ZoneInfo
+import re
+
+# Endereço usado para transformar os links relativos da página em URLs completas
+URL_BASE_EXPRESSO = "https://www.expresso.pe.gov.br"
+
+# Fuso em que o Expresso mostra os horários na página do calendário
+FUSO_EXPRESSO = ZoneInfo("America/Recife")
+
+
+# Função para formatar a data
+def formatar_data(data_str):
+    # More robust date formatting
+    if not data_str:
+        return ""
+
+    # Handle YYYYMMDD format
+    if len(data_str) == 8:
+        ano = data_str[:4]
+        mes = data_str[4:6]
+        dia = data_str[6:8]
+        return f"{dia}/{mes}/{ano}"
+
+    # Try to handle other formats or return original
+    return data_str
+
+
+def _texto(elementos):
+    """Retorna o texto do primeiro elemento encontrado, sem espaços extras"""
+    if not elementos:
+        return ""
+    return " ".join(elementos[0].text_content().split())
+
+
+def _extrair_horario(entrada):
+    """Extrai o horário de início e fim no formato "14:00-16:00" """
+    # Abordagem 1: span com cor preta; Abordagem 2: procurar o padrão no texto da tag font
+    texto = _texto(entrada.xpath(".//span[contains(@style, 'color: black')]"))
+    if "-" not in texto:
+        texto = _texto(entrada.xpath(".//font"))
+
+    padrao_hora = re.search(r"(\d{1,2}:\d{2})\s*-\s*(\d{1,2}:\d{2})", texto)
+    if padrao_hora:
+        return padrao_hora.group(1), padrao_hora.group(2)
+    return "", ""
+
+
+def extrair_eventos_html(html, url_base=URL_BASE_EXPRESSO):
+    """
+    Extrai os eventos da página mensal do calendário do Expresso.
+
+    Lê todo o HTML de uma vez (driver.page_source), sem consultar o navegador
+    elemento por elemento. Os dicionários retornados têm apenas valores
+    simples, então podem ser guardados em cache ou serializados.
+
+    Args:
+        html (str): Código-fonte da página do calendário
+        url_base (str): Endereço usado para completar os links relativos
+
+    Returns:
+        list: Eventos com id, data, inicio, fim, titulo, descricao, url e participantes
+    """
+    documento = lxml_html.fromstring(html)
+
+    entradas = documento.xpath("//div[@id='calendar_event_entry']/a[@class='event_entry']")
+    if not entradas:
+        # Tentar encontrar elementos div que contêm eventos
+        entradas = documento.xpath("//div[contains(@id, 'calendar_event_entry')]")
+
+    eventos_lista = []
+    for entrada in entradas:
+        # Se a própria entrada não é uma tag <a>, usar o primeiro link dentro dela
+        link = entrada if entrada.tag == "a" else next(iter(entrada.xpath(".//a")), None)
+        href = link.get("href", "") if link is not None else ""
+        url_completa = urljoin(url_base, href) if href else ""
+
+        horario_inicio, horario_fim = _extrair_horario(entrada)
+
+        # A segunda imagem da entrada traz os participantes no atributo title
+        imagens = entrada.xpath(".//img")
+        participantes = imagens[1].get("title", "") if len(imagens) >= 2 else ""
+
+        # Parsear URL para obter id e data
+        params = parse_qs(urlparse(url_completa).query)
+        data = params.get("date", [""])[0]
+
+        eventos_lista.append(
+            {
+                "id": params.get("cal_id", [""])[0],
+                "data": formatar_data(data),
+                "inicio": horario_inicio,
+                "fim": horario_fim,
+                "titulo": _texto(entrada.xpath(".//b")),
+                "descricao": _texto(entrada.xpath(".//i")),
+                "url": url_completa,
+                "participantes": participantes,
+            }
+        )
+
+    return eventos_lista
+
+
+def _linhas_ical(linhas):
+    """Desdobra as linhas continuadas do iCalendar (RFC 5545), uma propriedade por vez"""
+    atual = None
+    for linha in linhas:
+        if isinstance(linha, bytes):
+            linha = linha.decode("utf-8", errors="replace")
+        linha = linha.rstrip("\r\n")
+        if linha[:1] in (" ", "\t") and atual is not None:
+            atual += linha[1:]
+            continue
+        if atual is not None:
+            yield atual
+        atual = linha
+    if atual:
+        yield atual
+
+
+def _propriedade_ical(linha):
+    """Separa 'NOME;PARAM=VALOR:conteúdo' em (nome, parâmetros, conteúdo)"""
+    cabecalho, _, valor = linha.partition(":")
+    nome, *params = cabecalho.split(";")
+    parametros = {}
+    for param in params:
+        chave, _, conteudo = param.partition("=")
+        parametros[chave.upper()] = conteudo.strip('"')
+    return nome.upper(), parametros, valor
+
+
+def _texto_ical(valor):
+    """Remove os escapes de texto do iCalendar (\\n, \\, \\; e \\\\)"""
+    return re.sub(
+        r"\\(.)", lambda m: "\n" if m.group(1) in "nN" else m.group(1), valor
+    )
+
+
+def _valor_ical(propriedades, nome):
+    """Retorna o conteúdo da primeira ocorrência de uma propriedade"""
+    return propriedades[nome][0][1] if nome in propriedades else ""
+
+
+def _dia(valor):
+    """Retorna a data de um date ou datetime"""
+    return valor.date() if isinstance(valor, datetime) else valor
+
+
+def _data_ical(valor, parametros):
+    """Converte DTSTART/DTEND para datetime no fuso do Expresso (ou date, se for dia inteiro)"""
+    if parametros.get("VALUE") == "DATE" or len(valor) == 8:
+        return datetime.strptime(valor[:8], "%Y%m%d").date()
+
+    momento = datetime.strptime(valor.rstrip("Z")[:15], "%Y%m%dT%H%M%S")
+    if valor.endswith("Z"):
+        momento = momento.replace(tzinfo=timezone.utc)
+    elif parametros.get("TZID"):
+        try:
+            momento = momento.replace(tzinfo=ZoneInfo(parametros["TZID"]))
+        except Exception:
+            momento = momento.replace(tzinfo=FUSO_EXPRESSO)
+    else:
+        momento = momento.replace(tzinfo=FUSO_EXPRESSO)
+    return momento.astimezone(FUSO_EXPRESSO).replace(tzinfo=None)
+
+
+def _cal_id_ical(uid):
+    """Extrai o cal_id numérico do UID gerado pelo eGroupWare"""
+    encontrado = re.search(r"calendar-(\d+)", uid) or re.search(r"(\d+)", uid)
+    return encontrado.group(1) if encontrado else uid
+
+
+def _evento_ical(propriedades, data_inicio, data_fim, url_base):
+    """Gera um dicionário por ocorrência do VEVENT dentro do período"""
+    if "DTSTART" not in propriedades:
+        return
+    parametros, valor = propriedades["DTSTART"][0]
+    inicio = _data_ical(valor, parametros)
+    fim = inicio
+    if "DTEND" in propriedades:
+        parametros, valor = propriedades["DTEND"][0]
+        fim = _data_ical(valor, parametros)
+    dia_inteiro = not isinstance(inicio, datetime)
+    duracao = fim - inicio
+    cal_id = _cal_id_ical(_valor_ical(propriedades, "UID"))
+
+    ocorrencias = [inicio]
+    if "RRULE" in propriedades:
+        # Eventos recorrentes aparecem na página uma vez por dia; expandir da mesma forma
+        inicio_regra = inicio
+        if dia_inteiro:
+            inicio_regra = datetime.combine(inicio, datetime.min.time())
+        regra = rrulestr(_valor_ical(propriedades, "RRULE"), dtstart=inicio_regra)
+
+        excecoes = set()
+        for parametros, valor in propriedades.get("EXDATE", []):
+            for item in valor.split(","):
+                excecoes.add(_dia(_data_ical(item, parametros)))
+
+        ocorrencias = []
+        for ocorrencia in regra.between(
+            datetime.combine(data_inicio, datetime.min.time()),
+            datetime.combine(data_fim, datetime.max.time()),
+            inc=True,
+        ):
+            if ocorrencia.date() not in excecoes:
+                ocorrencias.append(ocorrencia.date() if dia_inteiro else ocorrencia)
+
+    participantes = ",\n".join(
+        parametros.get("CN", valor.replace("mailto:", ""))
+        for parametros, valor in propriedades.get("ATTENDEE", [])
+    )
+
+    for ocorrencia in ocorrencias:
+        dia = _dia(ocorrencia)
+        if not (data_inicio <= dia <= data_fim):
+            continue
+        termino = ocorrencia + duracao
+        dia_fim = _dia(termino)
+        if dia_inteiro and dia_fim > dia:
+            # Em eventos de dia inteiro a data de fim do iCalendar é exclusiva
+            dia_fim = date.fromordinal(dia_fim.toordinal() - 1)
+
+        yield {
+            "id": cal_id,
+            "data": dia.strftime("%d/%m/%Y"),
+            "inicio": "" if dia_inteiro else ocorrencia.strftime("%H:%M"),
+            "fim": "" if dia_inteiro else termino.strftime("%H:%M"),
+            "titulo": _texto_ical(_valor_ical(propriedades, "SUMMARY")),
+            "descricao": _texto_ical(_valor_ical(propriedades, "DESCRIPTION")),
+            "url": urljoin(
+                url_base,
+                "/index.php?menuaction=calendar.uicalendar.view"
+                f"&cal_id={cal_id}&date={dia.strftime('%Y%m%d')}",
+            ),
+            "participantes": participantes,
+            "localizacao": _texto_ical(_valor_ical(propriedades, "LOCATION")),
+            "data_fim": dia_fim.strftime("%d/%m/%Y"),
+            "dia_inteiro": dia_inteiro,
+        }
+
+
+def extrair_eventos_ical(linhas, data_inicio, data_fim, url_base=URL_BASE_EXPRESSO):
+    """
+    Extrai os eventos de uma exportação iCalendar do Expresso, linha por linha.
+
+    As linhas são consumidas à medida que chegam, então a exportação não
+    precisa ficar inteira na memória. Cada ocorrência dentro do período vira
+    um dicionário no mesmo formato de extrair_eventos_html, com os campos
+    extras localizacao, data_fim e dia_inteiro.
+
+    Args:
+        linhas (iterable): Linhas do arquivo .ics (str ou bytes)
+        data_inicio (date): Primeiro dia do período
+        data_fim (date): Último dia do período
+        url_base (str): Endereço usado para montar a URL de cada evento
+    """
+    propriedades = None
+    for linha in _linhas_ical(linhas):
+        nome, parametros, valor = _propriedade_ical(linha)
+        if nome == "BEGIN" and valor.upper() == "VEVENT":
+            propriedades = {}
+        elif nome == "END" and valor.upper() == "VEVENT" and propriedades is not None:
+            try:
+                yield from _evento_ical(propriedades, data_inicio, data_fim, url_base)
+            except (ValueError, TypeError) as e:
+                print(f"Evento do iCalendar ignorado: {e}")
+            propriedades = None
+        elif propriedades is not None:
+            propriedades.setdefault(nome, []).append((parametros, valor))
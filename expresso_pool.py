@@ -0,0 +1,116 @@
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+
+class PoolExpresso:
+    """
+    Conjunto de navegadores logados no Expresso para escritas em paralelo.
+
+    Cada navegador é uma instância própria de sincronizarExpresso, criada sob
+    demanda até o tamanho do pool. Antes de ser entregue, a instância passa
+    por uma verificação de saúde e, se a sessão tiver caído, faz login de novo.
+    """
+
+    def __init__(self, fabrica, tamanho=2):
+        """
+        Args:
+            fabrica (callable): Cria uma instância de sincronizarExpresso ainda não logada
+            tamanho (int): Máximo de navegadores abertos ao mesmo tempo; deve
+                respeitar o que o servidor do Expresso suporta
+        """
+        self.fabrica = fabrica
+        self.tamanho = tamanho
+        self.livres = queue.Queue()
+        self.instancias = []
+        self.lock = threading.Lock()
+
+    def checkout(self, timeout=None):
+        """Retira um navegador saudável do pool, criando um novo se houver vaga"""
+        with self.lock:
+            criar = self.livres.empty() and len(self.instancias) < self.tamanho
+            if criar:
+                # Reservar a vaga antes do login, que é demorado
+                instancia = self.fabrica()
+                self.instancias.append(instancia)
+
+        if criar:
+            try:
+                instancia.login()
+            except Exception:
+                with self.lock:
+                    self.instancias.remove(instancia)
+                raise
+            return instancia
+
+        instancia = self.livres.get(timeout=timeout)
+        if not self._saudavel(instancia):
+            print("Navegador do pool sem sessão válida, refazendo o login")
+            try:
+                instancia.fechar()
+                instancia.login()
+            except Exception:
+                with self.lock:
+                    self.instancias.remove(instancia)
+                raise
+        return instancia
+
+    def checkin(self, instancia):
+        """Devolve o navegador ao pool"""
+        self.livres.put(instancia)
+
+    @contextmanager
+    def usar(self, timeout=None):
+        """Empresta um navegador durante o bloco with"""
+        instancia = self.checkout(timeout)
+        try:
+            yield instancia
+        finally:
+            self.checkin(instancia)
+
+    def executar(self, tarefas):
+        """
+        Executa as tarefas até 'tamanho' de cada vez, uma por navegador.
+
+        Args:
+            tarefas (list): Tuplas (metodo, args, kwargs) de sincronizarExpresso
+
+        Returns:
+            list: (resultado, erro) de cada tarefa, na mesma ordem
+        """
+
+        def executar_tarefa(tarefa):
+            metodo, args, kwargs = tarefa
+            try:
+                with self.usar() as instancia:
+                    return getattr(instancia, metodo)(*args, **kwargs), None
+            except Exception as e:
+                return None, str(e)
+
+        if not tarefas:
+            return []
+        with ThreadPoolExecutor(max_workers=min(self.tamanho, len(tarefas))) as executor:
+            return list(executor.map(executar_tarefa, tarefas))
+
+    def fechar(self):
+        """Fecha todos os navegadores do pool"""
+        with self.lock:
+            instancias, self.instancias = self.instancias, []
+        for instancia in instancias:
+            try:
+                instancia.fechar()
+            except Exception as e:
+                print(f"Erro ao fechar navegador do pool: {e}")
+
+    def _saudavel(self, instancia):
+        """Verifica se o navegador responde e não caiu na tela de login"""
+        if not instancia.driver:
+            return False
+        try:
+            # Ler o título exige uma resposta da página: um navegador travado
+            # ou encerrado falha aqui mesmo que a última URL pareça válida
+            instancia.driver.title
+            return "login.php" not in instancia.driver.current_url
+        except Exception:
+            return False
@@ -13,10 +13,16 @@ class GoogleCalendarSync:
     # Define SCOPES as a class attribute
     SCOPES = ["https://www.googleapis.com/auth/calendar"]
 
+    # Máximo de operações enviadas em cada requisição batch
+    BATCH_LIMIT = 50
+
     def __init__(self, credentials_file, token_file, calendar_id="primary"):
         self.credentials_file = credentials_file
         self.token_file = token_file
         self.calendar_id = calendar_id
+        self.next_sync_token = None
+        self.last_sync_was_full = False
+        self.pending_batch = []  # Operações aguardando o próximo flush_batch
         self.service = self.authenticate()
 
     def authenticate(self):
@@ -44,8 +50,8 @@ class GoogleCalendarSync:
         # Construa o serviço
         return build("calendar", "v3", credentials=creds)
 
-    def list_events(self, from_date=None):
-        """Lista eventos a partir de uma data específica"""
+    def iter_events(self, from_date=None):
+        """Gera os eventos a partir de uma data específica, página por página"""
         # Se from_date não for fornecido, usar a data atual
         if from_date is None:
             from_date = datetime.now().replace(
@@ -59,20 +65,11 @@ class GoogleCalendarSync:
             f"Buscando eventos do Google a partir de: {from_date.strftime('%d/%m/%Y')}"
         )
 
-        # Listar eventos
-        events_result = (
-            self.service.events()
-            .list(
-                calendarId=self.calendar_id,
-                timeMin=time_min,
-                maxResults=100,  # Aumentar para pegar mais eventos
-                singleEvents=True,
-                orderBy="startTime",
-            )
-            .execute()
-        )
+        yield from self._iter_pages(timeMin=time_min, orderBy="startTime")
 
-        events = events_result.get("items", [])
+    def list_events(self, from_date=None):
+        """Lista eventos a partir de uma data específica"""
+        events = list(self.iter_events(from_date))
         print(f"Encontrados {len(events)} eventos no Google Calendar")
 
         # Debug: mostrar os eventos encontrados
@@ -83,6 +80,100 @@ class GoogleCalendarSync:
 
         return events
 
+    def iter_changes(self, sync_token=None, from_date=None):
+        """
+        Gera apenas os eventos alterados desde a última sincronização.
+
+        Sem token, ou com o token expirado (HTTP 410), faz uma listagem completa
+        a partir de from_date. Ao final da iteração, self.next_sync_token tem o
+        token para a próxima chamada e self.last_sync_was_full indica se a
+        listagem foi completa. O 410 só é tratado na primeira página, antes de
+        qualquer evento ser gerado; depois disso o erro é propagado, para que
+        o chamador descarte o que recebeu.
+
+        Args:
+            sync_token (str): nextSyncToken retornado pela chamada anterior
+            from_date (datetime): Data inicial usada na listagem completa
+        """
+        self.next_sync_token = None
+
+        if sync_token:
+            self.last_sync_was_full = False
+            pages = self._pages(syncToken=sync_token)
+            try:
+                # A primeira página é lida antes de gerar qualquer evento: o 410
+                # vem nela, e assim nada do delta se mistura à listagem completa
+                first_page = next(pages, None)
+            except HttpError as error:
+                # 410 (Gone) indica que o token expirou e é preciso refazer tudo
+                if error.resp.status != 410:
+                    raise
+                print("Token de sincronização do Google expirado, refazendo listagem completa")
+            else:
+                yield from self._iter_sync_pages(first_page, pages)
+                return
+
+        if from_date is None:
+            from_date = datetime.now().replace(
+                hour=0, minute=0, second=0, microsecond=0
+            )
+
+        print(
+            f"Listagem completa do Google a partir de: {from_date.strftime('%d/%m/%Y')}"
+        )
+        self.last_sync_was_full = True
+        # orderBy não pode ser usado aqui, senão a API não devolve o nextSyncToken
+        pages = self._pages(timeMin=from_date.isoformat() + "Z")
+        yield from self._iter_sync_pages(next(pages, None), pages)
+
+    def list_changes(self, sync_token=None, from_date=None):
+        """
+        Lista apenas os eventos alterados desde a última sincronização.
+
+        Returns:
+            (list, str, bool): Eventos alterados (os excluídos vêm com
+            status 'cancelled'), próximo token e se a listagem foi completa
+        """
+        events = list(self.iter_changes(sync_token, from_date))
+        print(f"Encontradas {len(events)} alterações no Google Calendar")
+        return events, self.next_sync_token, self.last_sync_was_full
+
+    def _pages(self, **params):
+        """Percorre todas as páginas de events().list, gerando a resposta de cada uma"""
+        page_token = None
+        while True:
+            result = (
+                self.service.events()
+                .list(
+                    calendarId=self.calendar_id,
+                    singleEvents=True,
+                    maxResults=250,
+                    pageToken=page_token,
+                    **params,
+                )
+                .execute()
+            )
+            yield result
+
+            page_token = result.get("nextPageToken")
+            if not page_token:
+                return
+
+    def _iter_pages(self, **params):
+        """Gera os eventos de todas as páginas de events().list, um por vez"""
+        for result in self._pages(**params):
+            yield from result.get("items", [])
+
+    def _iter_sync_pages(self, first_page, pages):
+        """Gera os eventos das páginas de uma sincronização e guarda o nextSyncToken"""
+        result = first_page
+        while result is not None:
+            yield from result.get("items", [])
+            # O nextSyncToken só vem na última página
+            if not result.get("nextPageToken"):
+                self.next_sync_token = result.get("nextSyncToken")
+            result = next(pages, None)
+
     # Certifique-se de que o método create_event retorna o evento criado com seu ID
     def create_event(self, event_data):
         """Cria um evento no Google Calendar"""
@@ -129,3 +220,72 @@ class GoogleCalendarSync:
         except Exception as e:
             print(f"Erro ao excluir evento do Google: {e}")
             return False
+
+    def queue_create_event(self, event_data, key=None, callback=None):
+        """Enfileira a criação de um evento para o próximo flush_batch"""
+        request = self.service.events().insert(
+            calendarId=self.calendar_id, body=event_data
+        )
+        self.pending_batch.append((key, request, callback, False))
+
+    def queue_update_event(self, event_id, event, key=None, callback=None):
+        """Enfileira a atualização de um evento para o próximo flush_batch"""
+        request = self.service.events().update(
+            calendarId=self.calendar_id, eventId=event_id, body=event
+        )
+        self.pending_batch.append((key or event_id, request, callback, False))
+
+    def queue_delete_event(self, event_id, key=None, callback=None):
+        """Enfileira a exclusão de um evento para o próximo flush_batch"""
+        request = self.service.events().delete(
+            calendarId=self.calendar_id, eventId=event_id
+        )
+        self.pending_batch.append((key or event_id, request, callback, True))
+
+    def flush_batch(self):
+        """
+        Envia as operações enfileiradas em requisições batch de até BATCH_LIMIT.
+
+        Cada resultado é entregue ao callback da operação como
+        callback(evento, erro), com erro None em caso de sucesso.
+
+        Returns:
+            dict: {chave: {"event": dict, "error": str}} para cada operação
+        """
+        pending, self.pending_batch = self.pending_batch, []
+        results = {}
+
+        for offset in range(0, len(pending), self.BATCH_LIMIT):
+            chunk = pending[offset : offset + self.BATCH_LIMIT]
+            responses = {}
+
+            def on_response(request_id, response, exception):
+                responses[request_id] = (response, exception)
+
+            batch = self.service.new_batch_http_request(callback=on_response)
+            for i, (_, request, _, _) in enumerate(chunk):
+                batch.add(request, request_id=str(i))
+
+            try:
+                batch.execute()
+                print(f"Batch do Google enviado com {len(chunk)} operações")
+            except Exception as e:
+                print(f"Erro ao executar batch no Google Calendar: {e}")
+
+            for i, (key, _, callback, is_delete) in enumerate(chunk):
+                response, exception = responses.get(
+                    str(i), (None, Exception("Operação sem resposta no batch"))
+                )
+                error = None
+                if exception is not None:
+                    # 410 (Gone) na exclusão significa que o evento já não existe
+                    gone = isinstance(exception, HttpError) and exception.resp.status == 410
+                    if not (is_delete and gone):
+                        error = str(exception)
+
+                result = {"event": response or {}, "error": error}
+                results[key if key is not None else offset + i] = result
+                if callback:
+                    callback(result["event"], error)
+
+        return results
@@ -51,7 +51,12 @@ def testar_sincronizacao_outlook():
     expresso_sync = None
     try:
         print("\n=== Autenticando no Expresso ===")
-        expresso_sync = sincronizarExpresso("pablo.henrique1", "@Taisatt84671514")
+        expresso_sync = sincronizarExpresso(
+            "pablo.henrique1",
+            "@Taisatt84671514",
+            perfil_chrome="perfil_chrome_expresso",  # Reaproveita a sessão entre execuções
+            tamanho_pool_escrita=1,  # Acima de 1, abre navegadores (e sessões) extras para escritas em paralelo
+        )
         expresso_sync.login()
         expresso_sync.selecionarCalendario()
     except Exception as e:
@@ -119,7 +124,7 @@ def testar_sincronizacao_outlook():
         print(f"Resultado da sincronização: {stats}")
         
         # Verificar se o evento foi mapeado corretamente
-        mapped_ids = synchronizer.db.get_mapped_ids(outlook_id, "outlook")
+        mapped_ids = synchronizer.mappings.get_mapped_ids(outlook_id, "outlook")
         if mapped_ids and mapped_ids[0]:  # Google ID
             print(f"✅ Evento do Outlook mapeado para o Google com ID: {mapped_ids[0]}")
             # Verificar se podemos recuperar o evento do Google
@@ -183,7 +188,12 @@ def main():
     expresso_sync = None
     try:
         print("\n=== Autenticando no Expresso ===")
-        expresso_sync = sincronizarExpresso("pablo.henrique1", "@Taisatt84671514")
+        expresso_sync = sincronizarExpresso(
+            "pablo.henrique1",
+            "@Taisatt84671514",
+            perfil_chrome="perfil_chrome_expresso",  # Reaproveita a sessão entre execuções
+            tamanho_pool_escrita=1,  # Acima de 1, abre navegadores (e sessões) extras para escritas em paralelo
+        )
         expresso_sync.login()
         expresso_sync.selecionarCalendario()
     except Exception as e:
@@ -0,0 +1,113 @@
+SOURCES = ("outlook", "google", "expresso")
+
+# Ordem dos IDs devolvidos por get_mapped_ids, igual à de DatabaseManager.get_mapped_ids
+MAPPED_ORDER = {
+    "outlook": ("google", "expresso"),
+    "google": ("outlook", "expresso"),
+    "expresso": ("outlook", "google"),
+}
+
+
+class MappingIndex:
+    """
+    Índice em memória da tabela eventos_sincronizados.
+
+    Cada linha liga os IDs de um mesmo evento no Outlook, no Google e no
+    Expresso, e pode ser encontrada pelo ID de qualquer um dos três. O índice
+    é carregado uma vez do banco; as alterações passam por map_events e
+    remove, que gravam no banco e depois atualizam a memória (write-through).
+    """
+
+    def __init__(self, db):
+        """
+        Args:
+            db (DatabaseManager): Banco onde os mapeamentos são persistidos
+        """
+        self.db = db
+        self.rows = {}  # id da linha -> {"outlook": id, "google": id, "expresso": id}
+        self.by_source = {source: {} for source in SOURCES}  # id do evento -> ids das linhas
+        self.load()
+
+    def load(self):
+        """Recarrega todo o índice do banco (após alterações feitas direto no SQLite)"""
+        self.rows = {}
+        self.by_source = {source: {} for source in SOURCES}
+        for row_id, outlook_id, google_id, expresso_id, _, _ in self.db.get_all_mappings():
+            self._add_row(
+                row_id, {"outlook": outlook_id, "google": google_id, "expresso": expresso_id}
+            )
+
+    def get(self, source, event_id, target):
+        """Retorna o ID no calendário 'target' do evento 'event_id' de 'source', ou None"""
+        row_id = self._find_row(source, event_id)
+        return self.rows[row_id][target] if row_id is not None else None
+
+    def get_mapped_ids(self, event_id, source):
+        """Retorna os IDs mapeados de um evento, como DatabaseManager.get_mapped_ids"""
+        if source not in MAPPED_ORDER:
+            return None
+        row_id = self._find_row(source, event_id)
+        if row_id is None:
+            return None
+        return tuple(self.rows[row_id][other] for other in MAPPED_ORDER[source])
+
+    def map_events(self, outlook_id=None, google_id=None, expresso_id=None, origem=None):
+        """Cria ou completa um mapeamento no banco e no índice"""
+        row_id = self.db.map_events(
+            outlook_id=outlook_id, google_id=google_id, expresso_id=expresso_id, origem=origem
+        )
+        ids = {"outlook": outlook_id, "google": google_id, "expresso": expresso_id}
+        existing = self._drop_row(row_id)
+        if existing:
+            # Mesmo COALESCE do UPDATE: IDs não informados continuam como estavam
+            ids = {source: ids[source] or existing[source] for source in SOURCES}
+        self._add_row(row_id, ids)
+        return row_id
+
+    def remove(self, google_id=None, outlook_id=None, expresso_id=None):
+        """
+        Remove do banco e do índice todas as linhas que contêm algum dos IDs.
+
+        Se o DELETE falhar, o índice fica como está, igual ao banco.
+
+        Returns:
+            bool: True se as linhas foram removidas
+        """
+        if not self.db.remove_mappings(
+            google_id=google_id, outlook_id=outlook_id, expresso_id=expresso_id
+        ):
+            return False
+        row_ids = set()
+        for source, event_id in (
+            ("google", google_id), ("outlook", outlook_id), ("expresso", expresso_id)
+        ):
+            if event_id:
+                row_ids |= self.by_source[source].get(event_id, set())
+        for row_id in row_ids:
+            self._drop_row(row_id)
+        return True
+
+    def __len__(self):
+        return len(self.rows)
+
+    def _find_row(self, source, event_id):
+        # Com IDs repetidos em mais de uma linha, o SQLite devolve a mais antiga
+        row_ids = self.by_source[source].get(event_id) if event_id else None
+        return min(row_ids) if row_ids else None
+
+    def _add_row(self, row_id, ids):
+        self.rows[row_id] = ids
+        for source, event_id in ids.items():
+            if event_id:
+                self.by_source[source].setdefault(event_id, set()).add(row_id)
+
+    def _drop_row(self, row_id):
+        ids = self.rows.pop(row_id, None)
+        if ids:
+            for source, event_id in ids.items():
+                row_ids = self.by_source[source].get(event_id)
+                if row_ids:
+                    row_ids.discard(row_id)
+                    if not row_ids:
+                        del self.by_source[source][event_id]
+        return ids
@@ -0,0 +1,222 @@
+import hashlib
+import html
+import re
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+
+from expresso_parser import FUSO_EXPRESSO
+
+
+def parse_datetime_utc(value, tz_name=None):
+    """
+    Converte o dateTime do Google ou do Outlook para UTC (datetime sem fuso).
+
+    Frações de segundo são descartadas (o Outlook usa 7 casas decimais). Sem
+    fuso no texto, usa tz_name (o campo timeZone da API) e, se ele não existir
+    no zoneinfo, como acontece com os nomes do Windows, assume UTC.
+
+    Raises:
+        ValueError: Se o texto não estiver em formato ISO 8601
+    """
+    value = re.sub(r"\.\d+", "", value.replace("Z", "+00:00"))
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        try:
+            parsed = parsed.replace(tzinfo=ZoneInfo(tz_name or "UTC"))
+        except Exception:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def expresso_local_datetime(value_utc):
+    """Converte um datetime UTC sem fuso para o fuso em que o Expresso mostra os horários"""
+    return value_utc.replace(tzinfo=timezone.utc).astimezone(FUSO_EXPRESSO)
+
+
+def expresso_time(value):
+    """Hora HH:MM do Expresso a partir de texto, datetime ou time (vazio se não houver)"""
+    if hasattr(value, "strftime"):
+        return value.strftime("%H:%M")
+    return value or ""
+
+
+def content_hashes(records):
+    """
+    Hash de conteúdo de cada evento, por ID.
+
+    Um evento recorrente do Expresso aparece uma vez por dia com o mesmo ID
+    (cal_id); nesse caso os hashes de todas as ocorrências são combinados,
+    em ordem, em um único hash, que só muda quando alguma delas muda.
+
+    Args:
+        records (iterable): NormalizedEvent com ID
+
+    Returns:
+        dict: {id do evento: hash}
+    """
+    por_id = {}
+    for record in records:
+        por_id.setdefault(record.id, []).append(record.content_hash)
+
+    hashes = {}
+    for event_id, ocorrencias in por_id.items():
+        if len(ocorrencias) == 1:
+            hashes[event_id] = ocorrencias[0]
+        else:
+            hashes[event_id] = hashlib.sha1(
+                "\x1f".join(sorted(ocorrencias)).encode("utf-8")
+            ).hexdigest()
+    return hashes
+
+
+def _expresso_datetime_utc(data, hora):
+    """Converte data dd/mm/aaaa e hora HH:MM do Expresso para UTC"""
+    dia, mes, ano = data.split("/")
+    hora, minuto = hora.split(":")
+    local = datetime(int(ano), int(mes), int(dia), int(hora), int(minuto), tzinfo=FUSO_EXPRESSO)
+    return local.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _plain_text(texto, is_html):
+    """
+    Texto da descrição para o hash de conteúdo.
+
+    O Graph sempre devolve o corpo do evento em HTML, mesmo quando foi gravado
+    como texto, e o Google guarda a descrição em HTML; sem tirar as tags e as
+    entidades, a mesma descrição teria hashes diferentes em cada calendário.
+    Espaços e quebras de linha são reduzidos a um espaço.
+    """
+    texto = texto or ""
+    if is_html:
+        texto = re.sub(
+            r"<(head|style|script)\b.*?</\1\s*>|<!--.*?-->",
+            " ",
+            texto,
+            flags=re.IGNORECASE | re.DOTALL,
+        )
+        texto = html.unescape(re.sub(r"<[^>]*>", " ", texto))
+    return " ".join(texto.split())
+
+
+def _expresso_date(data):
+    dia, mes, ano = data.split("/")
+    return datetime(int(ano), int(mes), int(dia))
+
+
+class NormalizedEvent:
+    """
+    Visão normalizada de um evento de qualquer calendário.
+
+    É montada uma vez por evento lido (ver CalendarSynchronizer._normalized) e
+    guarda o que a comparação e a detecção de mudanças precisam: título,
+    início e fim em UTC (datetime sem fuso; meia-noite nos eventos de dia
+    inteiro), se é de dia inteiro e um hash do conteúdo. Datas em formato
+    inválido ficam como None.
+    """
+
+    __slots__ = (
+        "provider",
+        "id",
+        "title",
+        "title_key",
+        "start",
+        "end",
+        "all_day",
+        "location",
+        "description",
+        "content_hash",
+        "raw",
+    )
+
+    def __init__(self, event, provider):
+        """
+        Args:
+            event (dict): Evento como retornado pelo calendário
+            provider (str): 'google', 'outlook' ou 'expresso'
+        """
+        self.provider = provider
+        self.id = event.get("id")
+        self.raw = event
+        self.start = None
+        self.end = None
+
+        if provider == "expresso":
+            self._from_expresso(event)
+        else:
+            self._from_api(event, provider)
+
+        self.title = (self.title or "").strip()
+        self.title_key = self.title.lower()
+        self.location = (self.location or "").strip()
+        self.content_hash = hashlib.sha1(
+            "\x1f".join(
+                (
+                    self.title,
+                    self.start.isoformat() if self.start else "",
+                    self.end.isoformat() if self.end else "",
+                    "1" if self.all_day else "0",
+                    self.location,
+                    self.description,
+                )
+            ).encode("utf-8")
+        ).hexdigest()
+
+    def _from_api(self, event, provider):
+        """Google e Outlook usam start/end com dateTime (ou date no Google)"""
+        if provider == "google":
+            self.title = event.get("summary")
+            self.location = event.get("location")
+            self.description = _plain_text(event.get("description"), True)
+            self.all_day = "dateTime" not in event.get("start", {})
+        else:
+            self.title = event.get("subject")
+            self.location = (event.get("location") or {}).get("displayName")
+            body = event.get("body") or {}
+            self.description = _plain_text(
+                body.get("content"), (body.get("contentType") or "html").lower() == "html"
+            )
+            self.all_day = bool(event.get("isAllDay", False))
+
+        for field in ("start", "end"):
+            value = event.get(field) or {}
+            try:
+                if "dateTime" in value:
+                    if self.all_day:
+                        # O Outlook representa o dia inteiro como meia-noite a meia-noite
+                        parsed = datetime.fromisoformat(value["dateTime"][:10])
+                    else:
+                        parsed = parse_datetime_utc(value["dateTime"], value.get("timeZone"))
+                elif "date" in value:
+                    parsed = datetime.fromisoformat(value["date"])
+                else:
+                    parsed = None
+            except (ValueError, TypeError):
+                parsed = None
+            setattr(self, field, parsed)
+
+    def _from_expresso(self, event):
+        """O Expresso traz data dd/mm/aaaa e horários HH:MM separados"""
+        self.title = event.get("titulo")
+        self.location = event.get("localizacao")
+        self.description = _plain_text(event.get("descricao"), False)
+
+        data = event.get("data") or ""
+        data_fim = event.get("data_fim") or data
+
+        try:
+            inicio = expresso_time(event.get("inicio") or event.get("hora_inicio"))
+            fim = expresso_time(event.get("fim") or event.get("hora_fim"))
+            self.all_day = bool(event.get("dia_inteiro")) or (bool(data) and ":" not in inicio)
+            if self.all_day:
+                self.start = _expresso_date(data)
+                self.end = _expresso_date(data_fim)
+            else:
+                self.start = _expresso_datetime_utc(data, inicio)
+                if ":" in fim:
+                    self.end = _expresso_datetime_utc(data_fim, fim)
+        except (ValueError, TypeError, IndexError):
+            self.start = None
+            self.end = None
+
+    def __repr__(self):
+        return f"NormalizedEvent({self.provider}, {self.id!r}, {self.title!r}, {self.start})"
@@ -1,5 +1,6 @@
 # outlook_calendar_sync.py
 import requests
+from requests.adapters import HTTPAdapter
 import json
 import msal
 import webbrowser
@@ -7,6 +8,19 @@ from datetime import datetime, timedelta
 
 
 class OutlookCalendarSync:
+    # Janela (em dias a partir de from_date) acompanhada pela consulta delta
+    DELTA_WINDOW_DAYS = 365
+
+    # O deltaLink mantém a janela de quando foi criado; passados estes dias
+    # ela é refeita a partir de hoje, para continuar cobrindo o ano seguinte
+    DELTA_REBASELINE_DAYS = 30
+
+    # Conexões mantidas abertas com graph.microsoft.com
+    POOL_SIZE = 10
+
+    # Máximo de requisições aceitas pelo Graph em uma chamada $batch
+    BATCH_LIMIT = 20
+
     def __init__(self, client_id, client_secret, tenant_id, redirect_uri=None):
         self.client_id = client_id
         self.client_secret = client_secret
@@ -15,8 +29,41 @@ class OutlookCalendarSync:
         self.token = None
         self.calendar_id = None
         self.user_id = None
+        self.next_delta_link = None
+        self.delta_window_start = None  # Início da janela do deltaLink atual
+        self.last_sync_was_full = False
+        self.pending_batch = []  # Operações aguardando o próximo flush_batch
+        self.session = self._create_session()
         self.authenticate()
 
+    def _create_session(self):
+        """
+        Cria a sessão HTTP usada em todas as chamadas ao Microsoft Graph.
+
+        A sessão reaproveita as conexões TCP/TLS (keep-alive) entre as
+        requisições e concentra os cabeçalhos comuns, inclusive o de
+        autorização, atualizado por _set_token.
+        """
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1, pool_maxsize=self.POOL_SIZE, pool_block=False
+        )
+        session.mount("https://", adapter)
+        session.headers.update(
+            {
+                "Content-Type": "application/json",
+                "Accept": "application/json",
+                "Accept-Encoding": "gzip, deflate",
+                "Connection": "keep-alive",
+            }
+        )
+        return session
+
+    def _set_token(self, token):
+        """Atualiza o token de acesso e o cabeçalho de autorização da sessão"""
+        self.token = token
+        self.session.headers["Authorization"] = f"Bearer {token}"
+
     def authenticate(self):
         # Usando o fluxo de autenticação de dispositivo
         app = msal.PublicClientApplication(
@@ -31,7 +78,7 @@ class OutlookCalendarSync:
                 ["https://graph.microsoft.com/.default"], account=accounts[0]
             )
             if result and "access_token" in result:
-                self.token = result["access_token"]
+                self._set_token(result["access_token"])
                 try:
                     self.user_id = self._get_user_id()
                     return  # Autenticação bem-sucedida com token em cache
@@ -58,7 +105,7 @@ class OutlookCalendarSync:
         result = app.acquire_token_by_device_flow(flow)
 
         if "access_token" in result:
-            self.token = result["access_token"]
+            self._set_token(result["access_token"])
             # Obter ID do usuário
             self.user_id = self._get_user_id()
         else:
@@ -69,11 +116,7 @@ class OutlookCalendarSync:
     def _get_user_id(self):
         """Obter ID do usuário autenticado"""
         url = "https://graph.microsoft.com/v1.0/me"
-        headers = {
-            "Authorization": f"Bearer {self.token}",
-            "Content-Type": "application/json",
-        }
-        response = requests.get(url, headers=headers)
+        response = self.session.get(url)
         if response.status_code == 200:
             return response.json().get("id")
         else:
@@ -84,11 +127,7 @@ class OutlookCalendarSync:
     def list_calendars(self):
         """Listar calendários disponíveis"""
         url = "https://graph.microsoft.com/v1.0/me/calendars"
-        headers = {
-            "Authorization": f"Bearer {self.token}",
-            "Content-Type": "application/json",
-        }
-        response = requests.get(url, headers=headers)
+        response = self.session.get(url)
         if response.status_code == 200:
             calendars = response.json().get("value", [])
             return [{"id": cal["id"], "name": cal["name"]} for cal in calendars]
@@ -103,8 +142,8 @@ class OutlookCalendarSync:
         """Definir o ID do calendário a ser usado"""
         self.calendar_id = calendar_id
 
-    def list_events(self, from_date=None):
-        """Lista eventos a partir de uma data específica"""
+    def iter_events(self, from_date=None):
+        """Gera os eventos a partir de uma data específica, página por página"""
         if not self.calendar_id:
             raise Exception(
                 "ID do calendário não definido. Use set_calendar_id() primeiro."
@@ -117,10 +156,6 @@ class OutlookCalendarSync:
             )
 
         url = f"https://graph.microsoft.com/v1.0/me/calendars/{self.calendar_id}/events"
-        headers = {
-            "Authorization": f"Bearer {self.token}",
-            "Content-Type": "application/json",
-        }
 
         # Converter a data para formato ISO 8601
         start_datetime = from_date.isoformat()
@@ -129,30 +164,160 @@ class OutlookCalendarSync:
         params = {
             "$filter": f"start/dateTime ge '{start_datetime}'",
             "$orderby": "start/dateTime asc",
-            "$top": 100,  # Limitar número de resultados para melhor performance
+            "$top": 100,  # Tamanho de cada página; as demais vêm pelo @odata.nextLink
         }
 
         print(
             f"Buscando eventos do Outlook a partir de: {from_date.strftime('%d/%m/%Y')}"
         )
 
-        response = requests.get(url, headers=headers, params=params)
-        if response.status_code == 200:
-            events = response.json().get("value", [])
-            print(f"Encontrados {len(events)} eventos no Outlook Calendar")
+        yield from self._iter_pages(url, params)
 
-            # Debug: mostrar os eventos encontrados
-            for event in events:
-                print(
-                    f"  - Outlook Event: {event.get('subject', 'Sem título')} (ID: {event.get('id', 'N/A')})"
-                )
+    def list_events(self, from_date=None):
+        """Lista eventos a partir de uma data específica"""
+        events = list(self.iter_events(from_date))
+        print(f"Encontrados {len(events)} eventos no Outlook Calendar")
 
-            return events
-        else:
-            # Adicionar mais detalhes sobre o erro
-            error_message = f"Erro ao listar eventos na API do Outlook. Status: {response.status_code}, Resposta: {response.text}"
-            print(error_message)  # Imprimir o erro para debug
-            raise Exception(error_message)
+        # Debug: mostrar os eventos encontrados
+        for event in events:
+            print(
+                f"  - Outlook Event: {event.get('subject', 'Sem título')} (ID: {event.get('id', 'N/A')})"
+            )
+
+        return events
+
+    def iter_changes(self, delta_link=None, from_date=None, window_start=None):
+        """
+        Gera apenas os eventos adicionados, alterados ou removidos desde a
+        última consulta, usando calendarView/delta do Microsoft Graph.
+
+        Sem deltaLink, ou com o estado de sincronização expirado (HTTP 410),
+        refaz a consulta completa para a janela a partir de from_date. Ao final
+        da iteração, self.next_delta_link tem o link para a próxima chamada e
+        self.last_sync_was_full indica se a consulta foi completa. O 410 só é
+        tratado na primeira página, antes de qualquer evento ser gerado; depois
+        disso vira exceção, para que o chamador descarte o que recebeu.
+
+        A janela do deltaLink não anda sozinha: quando from_date passa
+        DELTA_REBASELINE_DAYS do início dela (ou o início é desconhecido), o
+        link é descartado e a consulta completa cria uma janela nova, cujo
+        início fica em self.delta_window_start.
+
+        Args:
+            delta_link (str): @odata.deltaLink retornado pela chamada anterior
+            from_date (datetime): Início da janela usada na consulta completa
+            window_start (datetime): Início da janela do delta_link, se salvo
+                fora desta instância
+        """
+        if not self.calendar_id:
+            raise Exception(
+                "ID do calendário não definido. Use set_calendar_id() primeiro."
+            )
+
+        self.next_delta_link = None
+
+        if from_date is None:
+            from_date = datetime.now().replace(
+                hour=0, minute=0, second=0, microsecond=0
+            )
+
+        window_start = window_start or self.delta_window_start
+        if delta_link and (
+            window_start is None
+            or from_date >= window_start + timedelta(days=self.DELTA_REBASELINE_DAYS)
+        ):
+            print("Janela da consulta delta do Outlook desatualizada, refazendo consulta completa")
+            delta_link = None
+
+        if delta_link:
+            self.last_sync_was_full = False
+            pages = self._pages(delta_link)
+            # A primeira página é lida antes de gerar qualquer evento: o 410
+            # vem nela, e assim nada do delta se mistura à consulta completa
+            first_page = next(pages, None)
+            if first_page is not None:
+                yield from self._iter_delta_pages(first_page, pages)
+                self.delta_window_start = window_start
+                return
+            print("Estado delta do Outlook expirado, refazendo consulta completa")
+
+        print(
+            f"Consulta delta completa do Outlook a partir de: {from_date.strftime('%d/%m/%Y')}"
+        )
+        url = f"https://graph.microsoft.com/v1.0/me/calendars/{self.calendar_id}/calendarView/delta"
+        params = {
+            "startDateTime": from_date.isoformat(),
+            "endDateTime": (
+                from_date + timedelta(days=self.DELTA_WINDOW_DAYS)
+            ).isoformat(),
+        }
+        self.last_sync_was_full = True
+        pages = self._pages(url, params)
+        yield from self._iter_delta_pages(next(pages, None), pages)
+        self.delta_window_start = from_date
+
+    def list_changes(self, delta_link=None, from_date=None):
+        """
+        Lista apenas os eventos alterados desde a última consulta delta.
+
+        Returns:
+            (list, str, bool): Eventos alterados (os removidos trazem a chave
+            '@removed'), próximo deltaLink e se a consulta foi completa
+        """
+        events = list(self.iter_changes(delta_link, from_date))
+        print(f"Encontradas {len(events)} alterações no Outlook Calendar")
+        return events, self.next_delta_link, self.last_sync_was_full
+
+    def _pages(self, url, params=None):
+        """
+        Percorre as páginas (@odata.nextLink) de uma listagem do Graph, gerando
+        a resposta de cada uma.
+
+        Se o Graph informar que o estado delta expirou (HTTP 410), encerra a
+        iteração sem gerar a página.
+        """
+        headers = {"Prefer": "odata.maxpagesize=100"}
+
+        while True:
+            response = self.session.get(url, headers=headers, params=params)
+            if response.status_code == 410:
+                return
+            if response.status_code != 200:
+                # Adicionar mais detalhes sobre o erro
+                error_message = f"Erro ao listar eventos na API do Outlook. Status: {response.status_code}, Resposta: {response.text}"
+                print(error_message)  # Imprimir o erro para debug
+                raise Exception(error_message)
+
+            data = response.json()
+            yield data
+
+            # nextLink e deltaLink já trazem todos os parâmetros da consulta
+            params = None
+            url = data.get("@odata.nextLink")
+            if not url:
+                return
+
+    def _iter_pages(self, url, params=None):
+        """Gera os eventos de todas as páginas de uma listagem do Graph, um por vez"""
+        for data in self._pages(url, params):
+            yield from data.get("value", [])
+
+    def _iter_delta_pages(self, first_page, pages):
+        """
+        Gera os eventos das páginas de uma consulta delta e guarda o
+        @odata.deltaLink da última em self.next_delta_link.
+
+        Raises:
+            Exception: Se o estado delta expirar no meio da consulta
+        """
+        data = first_page
+        while data is not None:
+            yield from data.get("value", [])
+            if not data.get("@odata.nextLink"):
+                self.next_delta_link = data.get("@odata.deltaLink")
+                return
+            data = next(pages, None)
+        raise Exception("Erro na consulta delta do Outlook: estado expirado")
 
     # Certifique-se de que o método create_event retorna o evento criado com seu ID
     def create_event(self, event_data):
@@ -163,12 +328,8 @@ class OutlookCalendarSync:
             )
 
         url = f"https://graph.microsoft.com/v1.0/me/calendars/{self.calendar_id}/events"
-        headers = {
-            "Authorization": f"Bearer {self.token}",
-            "Content-Type": "application/json",
-        }
 
-        response = requests.post(url, headers=headers, json=event_data)
+        response = self.session.post(url, json=event_data)
         if response.status_code == 201:  # 201 Created
             created_event = response.json()
             print(
@@ -183,12 +344,21 @@ class OutlookCalendarSync:
     def update_event(self, event_id, event):
         """Atualiza um evento existente"""
         url = f"https://graph.microsoft.com/v1.0/me/calendars/{self.calendar_id}/events/{event_id}"
-        headers = {
-            "Authorization": f"Bearer {self.token}",
-            "Content-Type": "application/json",
-        }
 
         # Garantir a formatação correta para eventos de dia inteiro antes de enviar
+        self._prepare_update_payload(event)
+
+        print(f"Outlook Update Payload: {json.dumps(event, indent=2)}") # Log para depuração
+        response = self.session.patch(url, data=json.dumps(event))
+        if response.status_code in (200, 201, 204):
+            return response.json() if response.text else {}
+        else:
+            error_message = f"Erro ao atualizar evento na API do Outlook. Status: {response.status_code}, Resposta: {response.text}"
+            print(error_message)
+            raise Exception(error_message)
+
+    def _prepare_update_payload(self, event):
+        """Ajusta início e fim de eventos de dia inteiro para o formato esperado pelo Outlook"""
         if event.get("isAllDay"):
             # Start time deve ser meia-noite UTC
             if "start" in event and "dateTime" in event["start"]:
@@ -242,26 +412,130 @@ class OutlookCalendarSync:
                 except Exception as e:
                     print(f"Erro ao processar end dateTime para evento all-day: {e}")
 
-        print(f"Outlook Update Payload: {json.dumps(event, indent=2)}") # Log para depuração
-        response = requests.patch(url, headers=headers, data=json.dumps(event))
-        if response.status_code in (200, 201, 204):
-            return response.json() if response.text else {}
-        else:
-            error_message = f"Erro ao atualizar evento na API do Outlook. Status: {response.status_code}, Resposta: {response.text}"
-            print(error_message)
-            raise Exception(error_message)
-
     def delete_event(self, event_id):
         """Exclui um evento"""
         url = f"https://graph.microsoft.com/v1.0/me/calendars/{self.calendar_id}/events/{event_id}"
-        headers = {
-            "Authorization": f"Bearer {self.token}",
-            "Content-Type": "application/json",
-        }
-        response = requests.delete(url, headers=headers)
+        response = self.session.delete(url)
         if response.status_code in (200, 201, 204):
             return True
         else:
             error_message = f"Erro ao excluir evento na API do Outlook. Status: {response.status_code}, Resposta: {response.text}"
             print(error_message)
             raise Exception(error_message)
+
+    def queue_create_event(self, event_data, key=None, callback=None):
+        """Enfileira a criação de um evento para o próximo flush_batch"""
+        if not self.calendar_id:
+            raise Exception(
+                "ID do calendário não definido. Use set_calendar_id() primeiro."
+            )
+        self._queue_request(
+            "POST", f"/me/calendars/{self.calendar_id}/events", event_data, key, callback
+        )
+
+    def queue_update_event(self, event_id, event, key=None, callback=None):
+        """Enfileira a atualização de um evento para o próximo flush_batch"""
+        self._prepare_update_payload(event)
+        self._queue_request(
+            "PATCH",
+            f"/me/calendars/{self.calendar_id}/events/{event_id}",
+            event,
+            key or event_id,
+            callback,
+        )
+
+    def queue_delete_event(self, event_id, key=None, callback=None):
+        """Enfileira a exclusão de um evento para o próximo flush_batch"""
+        self._queue_request(
+            "DELETE",
+            f"/me/calendars/{self.calendar_id}/events/{event_id}",
+            None,
+            key or event_id,
+            callback,
+        )
+
+    def _queue_request(self, method, url, body, key, callback):
+        """Adiciona uma requisição (URL relativa a /v1.0) à fila do $batch"""
+        request = {"method": method, "url": url}
+        if body is not None:
+            request["body"] = body
+            request["headers"] = {"Content-Type": "application/json"}
+        self.pending_batch.append((key, request, callback))
+
+    def flush_batch(self):
+        """
+        Envia as operações enfileiradas em chamadas $batch do Graph.
+
+        Cada resultado é entregue ao callback da operação como
+        callback(corpo_da_resposta, erro), com erro None em caso de sucesso.
+
+        Returns:
+            dict: {chave: {"status": int, "body": dict}} para cada operação
+        """
+        pending, self.pending_batch = self.pending_batch, []
+        if not pending:
+            return {}
+
+        results = self.batch_requests([request for _, request, _ in pending])
+
+        keyed_results = {}
+        for index, (key, request, callback) in enumerate(pending):
+            result = results[index]
+            keyed_results[key if key is not None else index] = result
+            if callback:
+                if 200 <= result["status"] < 300:
+                    callback(result["body"], None)
+                else:
+                    callback(
+                        result["body"],
+                        f"Status: {result['status']}, Resposta: {json.dumps(result['body'])}",
+                    )
+        return keyed_results
+
+    def batch_requests(self, requests_list):
+        """
+        Executa uma lista de requisições em grupos de BATCH_LIMIT via $batch.
+
+        Args:
+            requests_list (list): Dicts com "method", "url" (relativa a /v1.0)
+                e, opcionalmente, "body" e "headers"
+
+        Returns:
+            list: {"status": int, "body": dict} na mesma ordem da entrada
+        """
+        url = "https://graph.microsoft.com/v1.0/$batch"
+        results = [None] * len(requests_list)
+
+        for offset in range(0, len(requests_list), self.BATCH_LIMIT):
+            chunk = requests_list[offset : offset + self.BATCH_LIMIT]
+            # O id de cada item só precisa ser único dentro da chamada
+            payload = {
+                "requests": [
+                    dict(request, id=str(offset + i)) for i, request in enumerate(chunk)
+                ]
+            }
+
+            response = self.session.post(url, json=payload)
+            if response.status_code != 200:
+                error_message = f"Erro ao executar $batch na API do Outlook. Status: {response.status_code}, Resposta: {response.text}"
+                print(error_message)
+                for i in range(len(chunk)):
+                    results[offset + i] = {
+                        "status": response.status_code,
+                        "body": {"error": response.text},
+                    }
+                continue
+
+            for item in response.json().get("responses", []):
+                results[int(item["id"])] = {
+                    "status": item.get("status", 500),
+                    "body": item.get("body") or {},
+                }
+
+            print(f"$batch do Outlook enviado com {len(chunk)} operações")
+
+        # Operações sem resposta no $batch são tratadas como falha
+        return [
+            result if result is not None else {"status": 500, "body": {}}
+            for result in results
+        ]
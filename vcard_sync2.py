@@ -4,74 +4,130 @@ from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.service import Service
+from selenium.common.exceptions import TimeoutException
 from webdriver_manager.chrome import ChromeDriverManager
 from urllib.parse import urlparse, parse_qs
+import os
 import time
 import keyboard
 from datetime import datetime, timedelta
+from collections import deque
+from itertools import count
+from concurrent.futures import ThreadPoolExecutor
 import re
+from expresso_parser import extrair_eventos_html, extrair_eventos_ical, formatar_data
+from expresso_http import ExpressoHttp, URL_EXPORTACAO_ICAL, campos_formulario_evento
+from expresso_pool import PoolExpresso
+from expresso_diagnostico import CapturaPaginas, DIRETORIO_CAPTURAS
+from normalized_event import expresso_local_datetime, parse_datetime_utc
 
-
-
-# Função para formatar a data
-def formatar_data(data_str):
-    # More robust date formatting
-    if not data_str:
-        return ""
-
-    # Handle YYYYMMDD format
-    if len(data_str) == 8:
-        ano = data_str[:4]
-        mes = data_str[4:6]
-        dia = data_str[6:8]
-        return f"{dia}/{mes}/{ano}"
-
-    # Try to handle other formats or return original
-    return data_str
+try:
+    import psutil  # Opcional: usado apenas para medir a memória do navegador
+except ImportError:
+    psutil = None
 
 
 class sincronizarExpresso:
 
-    def __init__(self, username, password):
+    # Recursos que o modo leve não baixa (imagens, fontes e o script de PNG do IE)
+    RECURSOS_BLOQUEADOS = [
+        "*.png",
+        "*.gif",
+        "*.jpg",
+        "*.jpeg",
+        "*.ico",
+        "*.woff",
+        "*.woff2",
+        "*.ttf",
+        "*.otf",
+        "*pngfix.js",
+    ]
+
+    # Quantidade máxima de meses lidos ao mesmo tempo (abas ou requisições HTTP)
+    MAX_ABAS = 4
+
+    # Tempo máximo, em segundos, de cada tipo de espera no navegador
+    TEMPOS_ESPERA = {"pagina": 30, "formulario": 20, "salvar": 30, "alerta": 10}
+
+    def __init__(
+        self,
+        username,
+        password,
+        tempos_espera=None,
+        usar_http=False,
+        perfil_chrome=None,
+        cache_chromedriver="chromedriver_path.txt",
+        modo_leve=False,
+        meses_sincronizados=1,
+        usar_ical=False,
+        url_exportacao_ical=URL_EXPORTACAO_ICAL,
+        tamanho_pool_escrita=1,
+        amostragem_capturas=0.0,
+        diretorio_capturas=DIRETORIO_CAPTURAS,
+    ):
+        """
+        Args:
+            username (str): Usuário do Expresso
+            password (str): Senha do Expresso
+            tempos_espera (dict): Tempos máximos de espera por tipo (ver TEMPOS_ESPERA)
+            usar_http (bool): Depois do login, operar por HTTP em vez do navegador
+            perfil_chrome (str): Pasta do perfil persistente do Chrome (user-data-dir);
+                permite reaproveitar a sessão entre execuções
+            cache_chromedriver (str): Arquivo onde o caminho do ChromeDriver é
+                guardado; None consulta o WebDriver Manager a cada login
+            modo_leve (bool): Chrome headless, sem imagens nem fontes e com
+                pageLoadStrategy=eager, para economizar memória e tempo
+            meses_sincronizados (int): Meses lidos por obterEventos() sem período,
+                a partir do mês atual; 1 lê apenas a página do mês aberta
+            usar_ical (bool): Ler os eventos da exportação iCalendar, usando a
+                página HTML apenas se a exportação falhar
+            url_exportacao_ical (str): Endereço da exportação iCalendar
+            tamanho_pool_escrita (int): Navegadores usados em paralelo por
+                flush_batch; 1 executa as escritas em sequência neste navegador
+            amostragem_capturas (float): Fração das leituras do calendário salvas
+                para diagnóstico; com 0 a página só é salva quando a leitura falha
+            diretorio_capturas (str): Pasta rotativa das páginas salvas
+        """
         self.username = username
         self.password = password
         self.driver = None
+        self.perfil_chrome = perfil_chrome
+        self.cache_chromedriver = cache_chromedriver
+        self.modo_leve = modo_leve
+        self.meses_sincronizados = meses_sincronizados
+        self.usar_ical = usar_ical
+        self.url_exportacao_ical = url_exportacao_ical
+        # Com usar_http, depois do login as operações vão direto por HTTP (ExpressoHttp)
+        self.usar_http = usar_http
+        self.http = None
+        self.tempos_espera = dict(self.TEMPOS_ESPERA, **(tempos_espera or {}))
+        # Duração real das últimas esperas: (nome, segundos, concluída)
+        self.esperas_registradas = deque(maxlen=500)
+        # Eventos lidos do calendário por período, reaproveitados durante o ciclo
+        self.eventos_cache = {}
+        # Escritas aguardando o próximo flush_batch e navegadores extras para executá-las
+        self.tamanho_pool_escrita = tamanho_pool_escrita
+        self.pending_batch = []
+        self.pool_escrita = None
+        # Páginas salvas para diagnóstico, gravadas em segundo plano
+        self.capturas = CapturaPaginas(diretorio_capturas, amostragem_capturas)
 
     def login(self):
         try:
-            # Configurações do Chrome
-            chrome_options = webdriver.ChromeOptions()
-            chrome_options.add_argument('--no-sandbox')
-            chrome_options.add_argument('--disable-dev-shm-usage')
-            chrome_options.add_argument('--disable-gpu')
-            chrome_options.add_argument('--window-size=1920,1080')
-            
-            # Instalar o ChromeDriver usando WebDriver Manager
-            driver_path = ChromeDriverManager().install()
-            service = Service(driver_path)
-            
-            # Inicializar o driver com as opções
-            self.driver = webdriver.Chrome(service=service, options=chrome_options)
+            self.driver = self._iniciar_chrome()
             
             # Configurar timeout
             self.driver.set_page_load_timeout(60)
-            
-            # Acessar a página
-            self.driver.get("https://www.expresso.pe.gov.br/login.php?cd=1")
-            time.sleep(5)  # Esperar um pouco mais para a página carregar
-            
-            # Resto do código de login...
-            inputlogin = self.driver.find_element(By.XPATH, "//input[@name='user']")
-            inputlogin.clear()
-            inputlogin.send_keys(self.username)
-            inputSenha = self.driver.find_element(By.XPATH, "//input[@type='password']")
-            inputSenha.clear()
-            inputSenha.send_keys(self.password)
-            botaoConectar = self.driver.find_element(
-                By.XPATH, "//div[@class='botao-conectar']//input[@type='submit']"
-            )
-            botaoConectar.click()
-            time.sleep(5)
+
+            # Com perfil persistente, o cookie da sessão anterior pode continuar válido
+            if self.perfil_chrome and self._sessao_valida():
+                print("Sessão do Expresso ainda válida, login dispensado")
+            else:
+                self._fazer_login()
+
+            # Reaproveitar os cookies do navegador em uma sessão HTTP
+            if self.usar_http and self.http is None:
+                self.http = ExpressoHttp(self)
             
         except Exception as e:
             print(f"Erro ao inicializar o Chrome: {e}")
@@ -79,253 +135,504 @@ class sincronizarExpresso:
                 self.driver.quit()
             raise
 
+    def _iniciar_chrome(self):
+        """Inicia o Chrome, reaproveitando o caminho do ChromeDriver já resolvido"""
+        # Configurações do Chrome
+        chrome_options = webdriver.ChromeOptions()
+        chrome_options.add_argument('--no-sandbox')
+        chrome_options.add_argument('--disable-dev-shm-usage')
+        chrome_options.add_argument('--disable-gpu')
+        if self.modo_leve:
+            chrome_options.add_argument('--headless=new')
+            chrome_options.add_argument('--window-size=1280,800')
+            chrome_options.add_argument('--disable-extensions')
+            # Não esperar imagens e folhas de estilo para liberar a página
+            chrome_options.page_load_strategy = "eager"
+            chrome_options.add_experimental_option(
+                "prefs", {"profile.managed_default_content_settings.images": 2}
+            )
+        else:
+            chrome_options.add_argument('--window-size=1920,1080')
+        if self.perfil_chrome:
+            # Perfil persistente: cookies e cache sobrevivem entre execuções
+            chrome_options.add_argument(
+                f"--user-data-dir={os.path.abspath(self.perfil_chrome)}"
+            )
+
+        driver_path = self._caminho_chromedriver()
+        try:
+            driver = webdriver.Chrome(service=Service(driver_path), options=chrome_options)
+        except Exception as e:
+            if not self.cache_chromedriver:
+                raise
+            # O driver em cache pode não ser mais compatível com o Chrome instalado
+            print(f"Erro ao usar o ChromeDriver em cache ({e}), instalando novamente")
+            driver_path = self._caminho_chromedriver(instalar=True)
+            driver = webdriver.Chrome(service=Service(driver_path), options=chrome_options)
+
+        if self.modo_leve:
+            # Bloquear também as fontes e o que escapar da preferência de imagens
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd(
+                "Network.setBlockedURLs", {"urls": self.RECURSOS_BLOQUEADOS}
+            )
+        return driver
+
+    def metricas_navegador(self):
+        """
+        Mede o custo da última página carregada no navegador.
+
+        Returns:
+            dict: modo, tempos de carregamento (ms), heap do JavaScript (MB) e,
+            com psutil instalado, a memória RSS do Chrome e do ChromeDriver (MB)
+        """
+        metricas = {"modo": "leve" if self.modo_leve else "completo"}
+        tempos = self.driver.execute_script(
+            "var t = performance.timing;"
+            "return [t.navigationStart, t.domContentLoadedEventEnd, t.loadEventEnd];"
+        )
+        inicio, dom_pronto, carregado = tempos
+        metricas["dom_pronto_ms"] = dom_pronto - inicio if dom_pronto else None
+        metricas["carregamento_ms"] = carregado - inicio if carregado else None
+
+        heap = self.driver.execute_script(
+            "return performance.memory ? performance.memory.usedJSHeapSize : null;"
+        )
+        metricas["heap_js_mb"] = round(heap / 1024 / 1024, 1) if heap else None
+
+        metricas["rss_mb"] = None
+        if psutil:
+            # O ChromeDriver é o processo pai de todos os processos do Chrome
+            processo = psutil.Process(self.driver.service.process.pid)
+            rss = 0
+            for p in [processo] + processo.children(recursive=True):
+                try:
+                    rss += p.memory_info().rss
+                except psutil.Error:
+                    pass
+            metricas["rss_mb"] = round(rss / 1024 / 1024, 1)
+
+        print(
+            f"Navegador ({metricas['modo']}): DOM pronto em {metricas['dom_pronto_ms']} ms, "
+            f"carregado em {metricas['carregamento_ms']} ms, heap JS {metricas['heap_js_mb']} MB, "
+            f"RSS {metricas['rss_mb']} MB"
+        )
+        return metricas
+
+    def _caminho_chromedriver(self, instalar=False):
+        """Retorna o caminho do ChromeDriver, consultando o WebDriver Manager só quando preciso"""
+        if self.cache_chromedriver and not instalar and os.path.exists(self.cache_chromedriver):
+            with open(self.cache_chromedriver, encoding="utf-8") as f:
+                driver_path = f.read().strip()
+            if os.path.exists(driver_path):
+                return driver_path
+
+        # Instalar o ChromeDriver usando WebDriver Manager
+        driver_path = ChromeDriverManager().install()
+        if self.cache_chromedriver:
+            with open(self.cache_chromedriver, "w", encoding="utf-8") as f:
+                f.write(driver_path)
+        return driver_path
+
+    def _sessao_valida(self):
+        """Verifica se o cookie de sessão guardado no perfil ainda dá acesso ao Expresso"""
+        try:
+            self.driver.get("https://www.expresso.pe.gov.br/home.php")
+            # Sessão expirada redireciona para a tela de login
+            self.esperar(
+                "verificação da sessão",
+                EC.any_of(
+                    EC.url_contains("login.php"),
+                    EC.presence_of_element_located((By.ID, "calendarid")),
+                ),
+            )
+            return "login.php" not in self.driver.current_url
+        except TimeoutException:
+            return False
+
+    def _fazer_login(self):
+        """Preenche e envia o formulário de login"""
+        # Acessar a página
+        self.driver.get("https://www.expresso.pe.gov.br/login.php?cd=1")
+        self.esperar(
+            "página de login",
+            EC.visibility_of_element_located((By.XPATH, "//input[@name='user']")),
+        )
+
+        # Resto do código de login...
+        inputlogin = self.driver.find_element(By.XPATH, "//input[@name='user']")
+        inputlogin.clear()
+        inputlogin.send_keys(self.username)
+        inputSenha = self.driver.find_element(By.XPATH, "//input[@type='password']")
+        inputSenha.clear()
+        inputSenha.send_keys(self.password)
+        botaoConectar = self.driver.find_element(
+            By.XPATH, "//div[@class='botao-conectar']//input[@type='submit']"
+        )
+        botaoConectar.click()
+        self.esperar(
+            "login concluído", lambda driver: "login.php" not in driver.current_url
+        )
+
     def selecionarCalendario(self):
+        if self.http:
+            # Por HTTP cada leitura já busca a página do mês atualizada
+            self.invalidar_eventos()
+            return
+
+        if self.modo_leve:
+            # Sem imagens os botões do menu não servem de referência; abrir a visão mensal direto
+            self.driver.get(
+                "https://www.expresso.pe.gov.br/index.php?menuaction=calendar.uicalendar.month"
+            )
+            self.esperar(
+                "visão mensal",
+                EC.presence_of_element_located(
+                    (By.XPATH, "//td[contains(@class, 'calendar_m_w_tablecell')]")
+                ),
+            )
+            self.invalidar_eventos()
+            return
+
         botaoCalendario = self.driver.find_element(
             By.XPATH, "//a[@href='/calendar/index.php']//img[@id='calendarid']"
         )
         botaoCalendario.click()
-        time.sleep(3)
-        calendarioEsteMes = self.driver.find_element(
-            By.XPATH, "//img[@title='Este mês']"
+        calendarioEsteMes = self.esperar(
+            "botão 'Este mês'",
+            EC.element_to_be_clickable((By.XPATH, "//img[@title='Este mês']")),
         )
         calendarioEsteMes.click()
-        time.sleep(3)
-
-    def obterEventos(self):
-        time.sleep(5)
-
-        try:
-            # Esperar até que os elementos de eventos estejam presentes
-            wait = WebDriverWait(self.driver, 30)
-
-            # Tentar encontrar os eventos com diferentes seletores
-            try:
-                eventos = wait.until(
-                    EC.presence_of_all_elements_located(
-                        (
-                            By.XPATH,
-                            "//div[@id='calendar_event_entry']/a[@class='event_entry']",
-                        )
-                    )
-                )
-                print(f"Encontrados {len(eventos)} eventos com class='event_entry'")
-            except:
-                print("Não foi possível encontrar elementos com class='event_entry'")
-                # Tentar encontrar elementos div que contêm eventos
-                eventos = wait.until(
-                    EC.presence_of_all_elements_located(
-                        (By.XPATH, "//div[contains(@id, 'calendar_event_entry')]")
-                    )
-                )
-                print(
-                    f"Encontrados {len(eventos)} eventos com div[id*='calendar_event_entry']"
-                )
-
-            # Salvar HTML da página para análise
-            with open("pagina_calendario.html", "w", encoding="utf-8") as f:
-                f.write(self.driver.page_source)
-            print("HTML da página salvo em pagina_calendario.html para análise")
+        # A visão mensal está carregada quando a página anterior some e a tabela aparece
+        self.esperar(
+            "visão mensal",
+            lambda driver: EC.staleness_of(calendarioEsteMes)(driver)
+            and driver.find_elements(
+                By.XPATH, "//td[contains(@class, 'calendar_m_w_tablecell')]"
+            ),
+        )
+        # A página foi recarregada: o próximo obterEventos lê os eventos de novo
+        self.invalidar_eventos()
+
+    def obterEventos(self, recarregar=False, data_inicio=None, data_fim=None):
+        """
+        Retorna os eventos do calendário.
+
+        As páginas só são lidas na primeira chamada depois de selecionarCalendario
+        ou de uma escrita no Expresso; as demais reaproveitam o mesmo retrato.
+
+        Sem período, lê a página do mês aberta ou, com meses_sincronizados > 1,
+        os meses seguintes ao atual. Com período, lê todas as visões mensais
+        que o cobrem ao mesmo tempo (abas no navegador ou requisições HTTP).
+
+        Args:
+            recarregar (bool): Ignora o retrato em memória e lê as páginas de novo
+            data_inicio (date): Primeiro dia do período
+            data_fim (date): Último dia do período (padrão: fim do mês de data_inicio)
+        """
+        if data_inicio is None and self.meses_sincronizados > 1:
+            data_inicio = datetime.now().date().replace(day=1)
+            data_fim = self._somar_meses(data_inicio, self.meses_sincronizados) - timedelta(
+                days=1
+            )
 
-            eventos_lista = []
+        periodo = None
+        if data_inicio is not None:
+            if isinstance(data_inicio, datetime):
+                data_inicio = data_inicio.date()
+            if data_fim is None:
+                data_fim = self._somar_meses(data_inicio.replace(day=1), 1) - timedelta(days=1)
+            elif isinstance(data_fim, datetime):
+                data_fim = data_fim.date()
+            periodo = (data_inicio, data_fim)
+
+        if not recarregar and periodo in self.eventos_cache:
+            eventos = self.eventos_cache[periodo]
+            print(f"Usando {len(eventos)} eventos do Expresso já lidos neste ciclo")
+            return list(eventos)
+
+        eventos = None
+        if self.usar_ical:
+            # Sem período, a exportação cobre o mesmo mês que a página aberta
+            inicio_ical = data_inicio or datetime.now().date().replace(day=1)
+            fim_ical = data_fim or self._somar_meses(inicio_ical, 1) - timedelta(days=1)
+            eventos = self._ler_ical(inicio_ical, fim_ical)
+
+        if eventos is None:
+            if periodo is None:
+                eventos = self._ler_eventos_da_pagina()
+            else:
+                eventos = self._ler_periodo(data_inicio, data_fim)
+
+        # Uma leitura que falhou não deve ser reaproveitada
+        if eventos:
+            self.eventos_cache[periodo] = eventos
+        else:
+            self.eventos_cache.pop(periodo, None)
+        return list(eventos)
+
+    def invalidar_eventos(self):
+        """Descarta o retrato dos eventos, forçando uma nova leitura das páginas"""
+        self.eventos_cache = {}
+
+    def _somar_meses(self, data, meses):
+        """Retorna o primeiro dia do mês que fica 'meses' depois de data"""
+        indice = data.year * 12 + data.month - 1 + meses
+        return data.replace(year=indice // 12, month=indice % 12 + 1, day=1)
+
+    def _ler_periodo(self, data_inicio, data_fim):
+        """Lê as visões mensais do período em paralelo e junta os eventos"""
+        meses = []
+        mes = data_inicio.replace(day=1)
+        while mes <= data_fim:
+            meses.append(mes)
+            mes = self._somar_meses(mes, 1)
+        print(
+            f"Lendo {len(meses)} meses do Expresso: "
+            f"{data_inicio.strftime('%d/%m/%Y')} a {data_fim.strftime('%d/%m/%Y')}"
+        )
 
-            # Iterar sobre os eventos
-            for i, evento in enumerate(eventos):
-                print(f"\nProcessando evento {i+1}:")
+        if self.http:
+            with ThreadPoolExecutor(max_workers=min(len(meses), self.MAX_ABAS)) as executor:
+                paginas = list(executor.map(self._listar_mes_http, meses))
+        else:
+            paginas = self._ler_meses_em_abas(meses)
 
-                # Extrair URL completa
+        # Eventos recorrentes repetem o cal_id em cada dia, então a chave inclui a data
+        eventos = {}
+        for pagina in paginas:
+            for evento in pagina:
                 try:
-                    # Tentar diferentes abordagens para encontrar o link
-                    try:
-                        tag_url = evento.find_element(By.TAG_NAME, "a")
-                    except:
-                        # Se o próprio evento é uma tag <a>
-                        tag_url = evento if evento.tag_name == "a" else None
-
-                    if tag_url:
-                        url_completa = tag_url.get_attribute("href")
-                        print(f"URL encontrada: {url_completa}")
-                    else:
-                        url_completa = ""
-                        print("Não foi possível encontrar URL")
-                except Exception as e:
-                    url_completa = ""
-                    tag_url = None
-                    print(f"Erro ao extrair URL: {e}")
+                    dia = datetime.strptime(evento["data"], "%d/%m/%Y").date()
+                except ValueError:
+                    continue
+                if data_inicio <= dia <= data_fim:
+                    eventos.setdefault((evento["id"], evento["data"]), evento)
 
-                # Extrair horário - versão mais robusta
-                try:
-                    # Tentar várias abordagens para encontrar o horário
-                    # Abordagem 1: Buscar diretamente por span com cor preta
-                    try:
-                        span_horario = evento.find_element(
-                            By.CSS_SELECTOR, "span[style*='color: black']"
-                        )
-                        horario_texto = span_horario.text.strip()
-                    except:
-                        # Abordagem 2: Buscar font e depois span
-                        try:
-                            font_tag = evento.find_element(By.TAG_NAME, "font")
-                            span_horario = font_tag.find_element(By.TAG_NAME, "span")
-                            horario_texto = span_horario.text.strip()
-                        except:
-                            # Abordagem 3: Tentar extrair de todo o texto da tag font
-                            try:
-                                font_tag = evento.find_element(By.TAG_NAME, "font")
-                                texto_completo = font_tag.text
-                                # Procurar por padrão de hora (HH:MM-HH:MM)
-                                padrao_hora = re.search(
-                                    r"(\d{1,2}:\d{2})-(\d{1,2}:\d{2})", texto_completo
-                                )
-                                if padrao_hora:
-                                    horario_inicio = padrao_hora.group(1)
-                                    horario_fim = padrao_hora.group(2)
-                                else:
-                                    horario_inicio = ""
-                                    horario_fim = ""
-                            except:
-                                horario_inicio = ""
-                                horario_fim = ""
+        print(f"Encontrados {len(eventos)} eventos no período")
+        return list(eventos.values())
 
-                except Exception as e:
-                    # Bloco except para o try principal
-                    horario_inicio = ""
-                    horario_fim = ""
-                    print(f"Erro ao extrair horário: {e}")
-
-                # Se encontrou o texto de horário no formato "14:00-16:00"
-                if "horario_texto" in locals() and "-" in horario_texto:
-                    horarios = horario_texto.split("-")
-                    horario_inicio = horarios[0].strip()
-                    horario_fim = horarios[1].strip()
-
-                # Extrair título
-                try:
-                    titulo_el = evento.find_element(By.TAG_NAME, "b")
-                    titulo = titulo_el.text.strip()
-                except Exception as e:
-                    titulo = ""
-                    print(f"Erro ao extrair título: {e}")
+    def _ler_ical(self, data_inicio, data_fim):
+        """Lê o período da exportação iCalendar; retorna None para usar a página HTML"""
+        try:
+            # A exportação precisa da sessão HTTP; sem usar_http, criar uma só para ela
+            if self.http is None and getattr(self, "_http_ical", None) is None:
+                self._http_ical = ExpressoHttp(self)
+            cliente = self.http or self._http_ical
+
+            eventos = {}
+            linhas = cliente.exportar_ical(self.url_exportacao_ical)
+            for evento in extrair_eventos_ical(linhas, data_inicio, data_fim):
+                eventos.setdefault((evento["id"], evento["data"]), evento)
+
+            print(f"Encontrados {len(eventos)} eventos na exportação iCalendar do Expresso")
+            return list(eventos.values())
+        except Exception as e:
+            print(f"Erro ao ler a exportação iCalendar, usando a página do calendário: {e}")
+            return None
 
-                # Extrair descrição
-                try:
-                    descricao_el = evento.find_element(By.TAG_NAME, "i")
-                    descricao = descricao_el.text.strip()
-                except Exception as e:
-                    descricao = ""
-                    print(f"Erro ao extrair descrição: {e}")
+    def _listar_mes_http(self, mes):
+        """Lista um mês por HTTP; uma falha não impede a leitura dos outros meses"""
+        try:
+            return self.http.listar_eventos(mes)
+        except Exception as e:
+            print(f"Erro ao obter eventos de {mes.strftime('%m/%Y')}: {e}")
+            return []
 
-                # Extrair participantes
-                try:
-                    imagens = evento.find_elements(By.TAG_NAME, "img")
-                    participantes = (
-                        imagens[1].get_attribute("title") if len(imagens) >= 2 else ""
+    def _ler_meses_em_abas(self, meses):
+        """Abre a visão mensal de cada mês em uma aba, em lotes de MAX_ABAS, e extrai os eventos"""
+        aba_principal = self.driver.current_window_handle
+        paginas = []
+        try:
+            for inicio in range(0, len(meses), self.MAX_ABAS):
+                # Abrir todas as abas do lote antes de ler, para que carreguem juntas
+                abas = []
+                for mes in meses[inicio : inicio + self.MAX_ABAS]:
+                    antes = set(self.driver.window_handles)
+                    self.driver.execute_script(
+                        "window.open(arguments[0], '_blank');",
+                        "https://www.expresso.pe.gov.br/index.php?menuaction="
+                        f"calendar.uicalendar.month&date={mes.strftime('%Y%m%d')}",
                     )
-                except Exception as e:
-                    participantes = ""
-                    print(f"Erro ao extrair participantes: {e}")
-
-                # Parsear URL para obter id e data
-                id_evento = ""
-                data = ""
-                data_formatada = ""
-                if url_completa:
+                    nova_aba = (set(self.driver.window_handles) - antes).pop()
+                    abas.append((mes, nova_aba))
+
+                for mes, aba in abas:
+                    self.driver.switch_to.window(aba)
                     try:
-                        parsed_url = urlparse(url_completa)
-                        params = parse_qs(parsed_url.query)
-                        print(f"Parâmetros da URL: {params}")
-                        id_evento = (
-                            params.get("cal_id", [""])[0] if "cal_id" in params else ""
+                        self.esperar(
+                            f"visão mensal {mes.strftime('%m/%Y')}",
+                            EC.presence_of_element_located(
+                                (By.XPATH, "//td[contains(@class, 'calendar_m_w_tablecell')]")
+                            ),
                         )
-                        data = params.get("date", [""])[0] if "date" in params else ""
-                        data_formatada = formatar_data(data)
-                        print(f"ID extraído: {id_evento}")
-                        print(f"Data extraída: {data} -> {data_formatada}")
-                    except (IndexError, KeyError) as e:
-                        print(f"Erro ao processar URL: {e}")
-
-                # Criar dicionário do evento
-                evento_info = {
-                    "id": id_evento,
-                    "data": data_formatada,
-                    "inicio": horario_inicio,
-                    "fim": horario_fim,
-                    "titulo": titulo,
-                    "descricao": descricao,
-                    "url": url_completa,
-                    "participantes": participantes,
-                    "tag_url": tag_url,
-                }
+                        paginas.append(extrair_eventos_html(self.driver.page_source))
+                    except Exception as e:
+                        print(f"Erro ao obter eventos de {mes.strftime('%m/%Y')}: {e}")
+                    finally:
+                        self.driver.close()
+        finally:
+            self.driver.switch_to.window(aba_principal)
+        return paginas
+
+    def esperar(self, nome, condicao, tipo="pagina"):
+        """
+        Espera uma condição do WebDriverWait em vez de uma pausa fixa.
+
+        Args:
+            nome (str): Descrição da espera, usada no log e no registro
+            condicao (callable): Condição do expected_conditions ou função(driver)
+            tipo (str): Chave de self.tempos_espera com o tempo máximo
+
+        Returns:
+            O valor retornado pela condição (por exemplo, o elemento encontrado)
+
+        Raises:
+            TimeoutException: Se a condição não for satisfeita no tempo máximo
+        """
+        inicio = time.monotonic()
+        concluida = False
+        try:
+            resultado = WebDriverWait(self.driver, self.tempos_espera[tipo]).until(
+                condicao
+            )
+            concluida = True
+            return resultado
+        finally:
+            duracao = time.monotonic() - inicio
+            self.esperas_registradas.append((nome, duracao, concluida))
+            situacao = "ok" if concluida else "tempo esgotado"
+            print(f"Espera '{nome}': {duracao:.2f}s ({situacao})")
+
+    def _ler_eventos_da_pagina(self):
+        if self.http:
+            try:
+                return self.http.listar_eventos()
+            except Exception as e:
+                print(f"Erro geral ao obter eventos: {e}")
+                return []
 
-                print(f"Horário extraído: início={horario_inicio}, fim={horario_fim}")
+        try:
+            # Esperar até que os eventos, ou ao menos a tabela do mês vazia, estejam presentes
+            self.esperar(
+                "eventos do calendário",
+                EC.any_of(
+                    EC.presence_of_element_located(
+                        (
+                            By.XPATH,
+                            "//div[@id='calendar_event_entry']/a[@class='event_entry']",
+                        )
+                    ),
+                    EC.presence_of_element_located(
+                        (By.XPATH, "//div[contains(@id, 'calendar_event_entry')]")
+                    ),
+                    EC.presence_of_element_located(
+                        (By.XPATH, "//td[contains(@class, 'calendar_m_w_tablecell')]")
+                    ),
+                ),
+            )
 
-                eventos_lista.append(evento_info)
+            # Ler a página inteira de uma vez e extrair os eventos com lxml
+            pagina = self.driver.page_source
+            if self.capturas.amostrar():
+                self.capturas.salvar("calendario", pagina)
 
+            eventos_lista = extrair_eventos_html(pagina)
+            print(f"Encontrados {len(eventos_lista)} eventos no Expresso")
             return eventos_lista
 
         except Exception as e:
             print(f"Erro geral ao obter eventos: {e}")
+            self._capturar_pagina("erro_calendario")
             return []
 
+    def _capturar_pagina(self, nome):
+        """Salva a página aberta no navegador para diagnóstico de uma falha"""
+        try:
+            self.capturas.salvar(nome, self.driver.page_source)
+        except Exception as e:
+            print(f"Não foi possível capturar a página: {e}")
+
     def fechar(self):
+        self.capturas.fechar()
+        if self.pool_escrita:
+            self.pool_escrita.fechar()
+            self.pool_escrita = None
         if self.driver:
             self.driver.quit()
 
-    def create_event(self, event_data):
+    def _evento_existente(self, event_data, eventos):
+        """Retorna o evento da lista com mesmo título, data e início (tolerância de 5 minutos)"""
+        for evento in eventos:
+            if evento.get("titulo", "") == event_data.get(
+                "titulo", ""
+            ) and evento.get("data", "") == event_data.get("data", ""):
+                # Verificar horário com tolerância de 5 minutos
+                hora_evento = evento.get("inicio", "").split(":")
+
+                # Obter o horário de início do evento a ser criado
+                hora_novo = None
+                if "inicio" in event_data and event_data["inicio"]:
+                    if (
+                        isinstance(event_data["inicio"], str)
+                        and ":" in event_data["inicio"]
+                    ):
+                        hora_novo = event_data["inicio"].split(":")
+                    elif isinstance(event_data["inicio"], datetime):
+                        hora_novo = [
+                            str(event_data["inicio"].hour),
+                            str(event_data["inicio"].minute),
+                        ]
+                elif "hora_inicio" in event_data and event_data["hora_inicio"]:
+                    if (
+                        isinstance(event_data["hora_inicio"], str)
+                        and ":" in event_data["hora_inicio"]
+                    ):
+                        hora_novo = event_data["hora_inicio"].split(":")
+                    elif isinstance(event_data["hora_inicio"], datetime):
+                        hora_novo = [
+                            str(event_data["hora_inicio"].hour),
+                            str(event_data["hora_inicio"].minute),
+                        ]
+
+                if len(hora_evento) == 2 and hora_novo and len(hora_novo) == 2:
+                    minutos_evento = int(hora_evento[0]) * 60 + int(hora_evento[1])
+                    minutos_novo = int(hora_novo[0]) * 60 + int(hora_novo[1])
+
+                    if abs(minutos_evento - minutos_novo) <= 5:
+                        print(
+                            f"Evento já existe no Expresso: {evento['titulo']} em {evento['data']} {evento['inicio']}"
+                        )
+                        return evento
+
+        return None
+
+    def create_event(self, event_data, verificar_duplicado=True):
         # Verificar se o evento já existe antes de criar
         try:
-            # Primeiro obter eventos existentes
-            eventos = self.obterEventos()
-
-            # Verificar se já existe um evento com o mesmo título e data/hora
-            for evento in eventos:
-                if evento.get("titulo", "") == event_data.get(
-                    "titulo", ""
-                ) and evento.get("data", "") == event_data.get("data", ""):
-                    # Verificar horário com tolerância de 5 minutos
-                    hora_evento = evento.get("inicio", "").split(":")
-
-                    # Obter o horário de início do evento a ser criado
-                    hora_novo = None
-                    if "inicio" in event_data and event_data["inicio"]:
-                        if (
-                            isinstance(event_data["inicio"], str)
-                            and ":" in event_data["inicio"]
-                        ):
-                            hora_novo = event_data["inicio"].split(":")
-                        elif isinstance(event_data["inicio"], datetime):
-                            hora_novo = [
-                                str(event_data["inicio"].hour),
-                                str(event_data["inicio"].minute),
-                            ]
-                    elif "hora_inicio" in event_data and event_data["hora_inicio"]:
-                        if (
-                            isinstance(event_data["hora_inicio"], str)
-                            and ":" in event_data["hora_inicio"]
-                        ):
-                            hora_novo = event_data["hora_inicio"].split(":")
-                        elif isinstance(event_data["hora_inicio"], datetime):
-                            hora_novo = [
-                                str(event_data["hora_inicio"].hour),
-                                str(event_data["hora_inicio"].minute),
-                            ]
-
-                    if len(hora_evento) == 2 and hora_novo and len(hora_novo) == 2:
-                        minutos_evento = int(hora_evento[0]) * 60 + int(hora_evento[1])
-                        minutos_novo = int(hora_novo[0]) * 60 + int(hora_novo[1])
-
-                        if abs(minutos_evento - minutos_novo) <= 5:
-                            print(
-                                f"Evento já existe no Expresso: {evento['titulo']} em {evento['data']} {evento['inicio']}"
-                            )
-                            # Retornar o evento existente em vez de criar um novo
-                            return evento
+            # Nas escritas em lote a verificação é feita em flush_batch, antes de despachar
+            if verificar_duplicado:
+                existente = self._evento_existente(event_data, self.obterEventos())
+                if existente:
+                    # Retornar o evento existente em vez de criar um novo
+                    return existente
 
             # Se não encontrou evento duplicado, continuar com a criação
+            if self.http:
+                self.invalidar_eventos()
+                return self.http.criar_evento(event_data)
+
             # Navegando até a página de criação de eventos
             self.driver.get(
                 "https://www.expresso.pe.gov.br/index.php?menuaction=calendar.uicalendar.add&date=20250423"
             )
-            time.sleep(10)
+            self.esperar(
+                "formulário de criação",
+                EC.visibility_of_element_located(
+                    (By.XPATH, "//input[@name='cal[title]']")
+                ),
+                "formulario",
+            )
 
             # Preenchendo o formulário
             input_titulo = self.driver.find_element(
@@ -362,63 +669,9 @@ class sincronizarExpresso:
             input_data_fim.clear()
             input_data_fim.send_keys(event_data["data"])
 
-            # Inicializar as variáveis de horário com valores padrão
-            hora_inicio = "00"
-            minuto_inicio = "00"
-            hora_fim = "00"
-            minuto_fim = "00"
-
-            # Verificar se é um evento de dia inteiro
-            if event_data.get("dia_inteiro", False):
-                # Para eventos de dia inteiro
-                hora_inicio = "00"
-                minuto_inicio = "00"
-                hora_fim = "23"
-                minuto_fim = "59"
-            else:
-                # Para eventos com horário específico - verificar múltiplos campos possíveis
-                # Primeiro tentar 'inicio'
-                if "inicio" in event_data and event_data["inicio"]:
-                    if (
-                        isinstance(event_data["inicio"], str)
-                        and ":" in event_data["inicio"]
-                    ):
-                        hora_inicio, minuto_inicio = event_data["inicio"].split(":")
-                    elif isinstance(event_data["inicio"], datetime):
-                        hora_inicio = str(event_data["inicio"].hour).zfill(2)
-                        minuto_inicio = str(event_data["inicio"].minute).zfill(2)
-                # Depois tentar 'hora_inicio'
-                elif "hora_inicio" in event_data and event_data["hora_inicio"]:
-                    if (
-                        isinstance(event_data["hora_inicio"], str)
-                        and ":" in event_data["hora_inicio"]
-                    ):
-                        hora_inicio, minuto_inicio = event_data["hora_inicio"].split(
-                            ":"
-                        )
-                    elif isinstance(event_data["hora_inicio"], datetime):
-                        hora_inicio = str(event_data["hora_inicio"].hour).zfill(2)
-                        minuto_inicio = str(event_data["hora_inicio"].minute).zfill(2)
-                # Caso contrário, usar o valor padrão já definido
-
-                # Primeiro tentar 'fim'
-                if "fim" in event_data and event_data["fim"]:
-                    if isinstance(event_data["fim"], str) and ":" in event_data["fim"]:
-                        hora_fim, minuto_fim = event_data["fim"].split(":")
-                    elif isinstance(event_data["fim"], datetime):
-                        hora_fim = str(event_data["fim"].hour).zfill(2)
-                        minuto_fim = str(event_data["fim"].minute).zfill(2)
-                # Depois tentar 'hora_fim'
-                elif "hora_fim" in event_data and event_data["hora_fim"]:
-                    if (
-                        isinstance(event_data["hora_fim"], str)
-                        and ":" in event_data["hora_fim"]
-                    ):
-                        hora_fim, minuto_fim = event_data["hora_fim"].split(":")
-                    elif isinstance(event_data["hora_fim"], datetime):
-                        hora_fim = str(event_data["hora_fim"].hour).zfill(2)
-                        minuto_fim = str(event_data["hora_fim"].minute).zfill(2)
-                # Caso contrário, usar o valor padrão já definido
+            hora_inicio, minuto_inicio, hora_fim, minuto_fim = self._horarios_do_evento(
+                event_data
+            )
 
             # Selecionando o horário de inicio
             input_horario_inicio_horas = self.driver.find_element(
@@ -453,7 +706,11 @@ class sincronizarExpresso:
 
             input_submit_salvar = self.driver.find_element(By.ID, "submit_button")
             input_submit_salvar.click()
-            time.sleep(10)
+            self.invalidar_eventos()
+            try:
+                self.esperar("evento criado", EC.url_contains("cal_id"), "salvar")
+            except TimeoutException:
+                print("A URL não trouxe o cal_id do evento criado")
 
             # Tentar obter o ID do evento criado da URL
             current_url = self.driver.current_url
@@ -481,10 +738,78 @@ class sincronizarExpresso:
 
         except Exception as e:
             print(f"Erro ao criar evento no Expresso: {e}")
+            if not self.http:
+                self._capturar_pagina("erro_criar")
             raise e
 
+    def _horarios_do_evento(self, event_data):
+        """Retorna (hora_inicio, minuto_inicio, hora_fim, minuto_fim) para o formulário do Expresso"""
+        # Inicializar as variáveis de horário com valores padrão
+        hora_inicio = "00"
+        minuto_inicio = "00"
+        hora_fim = "00"
+        minuto_fim = "00"
+
+        # Verificar se é um evento de dia inteiro
+        if event_data.get("dia_inteiro", False):
+            # Para eventos de dia inteiro
+            hora_inicio = "00"
+            minuto_inicio = "00"
+            hora_fim = "23"
+            minuto_fim = "59"
+        else:
+            # Para eventos com horário específico - verificar múltiplos campos possíveis
+            # Primeiro tentar 'inicio'
+            if "inicio" in event_data and event_data["inicio"]:
+                if (
+                    isinstance(event_data["inicio"], str)
+                    and ":" in event_data["inicio"]
+                ):
+                    hora_inicio, minuto_inicio = event_data["inicio"].split(":")
+                elif isinstance(event_data["inicio"], datetime):
+                    hora_inicio = str(event_data["inicio"].hour).zfill(2)
+                    minuto_inicio = str(event_data["inicio"].minute).zfill(2)
+            # Depois tentar 'hora_inicio'
+            elif "hora_inicio" in event_data and event_data["hora_inicio"]:
+                if (
+                    isinstance(event_data["hora_inicio"], str)
+                    and ":" in event_data["hora_inicio"]
+                ):
+                    hora_inicio, minuto_inicio = event_data["hora_inicio"].split(
+                        ":"
+                    )
+                elif isinstance(event_data["hora_inicio"], datetime):
+                    hora_inicio = str(event_data["hora_inicio"].hour).zfill(2)
+                    minuto_inicio = str(event_data["hora_inicio"].minute).zfill(2)
+            # Caso contrário, usar o valor padrão já definido
+
+            # Primeiro tentar 'fim'
+            if "fim" in event_data and event_data["fim"]:
+                if isinstance(event_data["fim"], str) and ":" in event_data["fim"]:
+                    hora_fim, minuto_fim = event_data["fim"].split(":")
+                elif isinstance(event_data["fim"], datetime):
+                    hora_fim = str(event_data["fim"].hour).zfill(2)
+                    minuto_fim = str(event_data["fim"].minute).zfill(2)
+            # Depois tentar 'hora_fim'
+            elif "hora_fim" in event_data and event_data["hora_fim"]:
+                if (
+                    isinstance(event_data["hora_fim"], str)
+                    and ":" in event_data["hora_fim"]
+                ):
+                    hora_fim, minuto_fim = event_data["hora_fim"].split(":")
+                elif isinstance(event_data["hora_fim"], datetime):
+                    hora_fim = str(event_data["hora_fim"].hour).zfill(2)
+                    minuto_fim = str(event_data["hora_fim"].minute).zfill(2)
+            # Caso contrário, usar o valor padrão já definido
+
+        return hora_inicio, minuto_inicio, hora_fim, minuto_fim
+
     def update_event(self, event_id, event_data):
         try:
+            if self.http:
+                self.invalidar_eventos()
+                return self.http.atualizar_evento(event_id, event_data)
+
             # Garantir que estamos na página de calendário
             if not self.driver.current_url.startswith(
                 "https://www.expresso.pe.gov.br/calendar/"
@@ -497,63 +822,19 @@ class sincronizarExpresso:
                 edit_url += f"&date={event_data['data']}"
 
             self.driver.get(edit_url)
-            time.sleep(2)
+            self.esperar(
+                "formulário de edição",
+                EC.presence_of_element_located((By.XPATH, "//input[@id='submit_button']")),
+                "formulario",
+            )
 
-            # Atualizar os campos
+            # Atualizar os campos (mesmos nomes do formulário de inclusão)
             try:
-                # Título
-                if "titulo" in event_data and event_data["titulo"]:
-                    titulo_input = self.driver.find_element(By.NAME, "title")
-                    titulo_input.clear()
-                    titulo_input.send_keys(event_data["titulo"])
-
-                # Descrição
-                if "descricao" in event_data and event_data["descricao"]:
-                    descricao_input = self.driver.find_element(By.NAME, "description")
-                    descricao_input.clear()
-                    descricao_input.send_keys(event_data["descricao"])
-
-                # Data
-                if "data" in event_data and event_data["data"]:
-                    data_input = self.driver.find_element(By.NAME, "date")
-                    data_input.clear()
-                    data_input.send_keys(event_data["data"])
-
-                # Hora de início
-                if "hora_inicio" in event_data and event_data["hora_inicio"]:
-                    if isinstance(event_data["hora_inicio"], str):
-                        hora_inicio = event_data["hora_inicio"].split(":")
-                    else:
-                        hora_inicio = [
-                            str(event_data["hora_inicio"].hour),
-                            str(event_data["hora_inicio"].minute),
-                        ]
-
-                    hora_input = self.driver.find_element(By.NAME, "hour")
-                    hora_input.clear()
-                    hora_input.send_keys(hora_inicio[0])
-
-                    minuto_input = self.driver.find_element(By.NAME, "minute")
-                    minuto_input.clear()
-                    minuto_input.send_keys(hora_inicio[1])
-
-                # Hora de término
-                if "hora_fim" in event_data and event_data["hora_fim"]:
-                    if isinstance(event_data["hora_fim"], str):
-                        hora_fim = event_data["hora_fim"].split(":")
-                    else:
-                        hora_fim = [
-                            str(event_data["hora_fim"].hour),
-                            str(event_data["hora_fim"].minute),
-                        ]
-
-                    hora_fim_input = self.driver.find_element(By.NAME, "endhour")
-                    hora_fim_input.clear()
-                    hora_fim_input.send_keys(hora_fim[0])
-
-                    minuto_fim_input = self.driver.find_element(By.NAME, "endminute")
-                    minuto_fim_input.clear()
-                    minuto_fim_input.send_keys(hora_fim[1])
+                campos = campos_formulario_evento(event_data, self._horarios_do_evento)
+                for nome, valor in campos.items():
+                    campo = self.driver.find_element(By.NAME, nome)
+                    campo.clear()
+                    campo.send_keys(valor)
 
                 # Participantes
                 """ if 'participantes' in event_data and event_data['participantes']:
@@ -567,7 +848,8 @@ class sincronizarExpresso:
                     By.XPATH, "//input[@id='submit_button']"
                 )
                 salvar_button.click()
-                time.sleep(10)
+                self.invalidar_eventos()
+                self.esperar("evento atualizado", EC.staleness_of(salvar_button), "salvar")
 
                 print(f"Evento atualizado no Expresso: {event_id}")
                 return True
@@ -578,6 +860,8 @@ class sincronizarExpresso:
 
         except Exception as e:
             print(f"Erro ao atualizar evento no Expresso: {e}")
+            if not self.http:
+                self._capturar_pagina("erro_atualizar")
             raise e
 
     def delete_event(self, event_id, event_data=None):
@@ -586,6 +870,10 @@ class sincronizarExpresso:
             if event_data is None:
                 event_data = {"data": ""}
 
+            if self.http:
+                self.invalidar_eventos()
+                return self.http.excluir_evento(event_id, event_data.get("data"))
+
             # Garantir que estamos na página de calendário
             if not self.driver.current_url.startswith(
                 "https://www.expresso.pe.gov.br/calendar/"
@@ -598,7 +886,18 @@ class sincronizarExpresso:
                 view_url += f"&date={event_data['data']}"
 
             self.driver.get(view_url)
-            time.sleep(10)
+            try:
+                self.esperar(
+                    "página do evento",
+                    EC.presence_of_element_located(
+                        (By.XPATH, "//input[@value='remover' or @value='Remover']")
+                    ),
+                )
+            except TimeoutException:
+                print("Botão de remover não apareceu na página do evento")
+
+            # Mesmo que a exclusão falhe no meio, a página pode ter mudado
+            self.invalidar_eventos()
 
             # Clicar no botão de deletar
             try:
@@ -606,12 +905,13 @@ class sincronizarExpresso:
                     By.XPATH, "//input[@value='remover']"
                 )
                 botao_deletar.click()
-                time.sleep(10)
 
                 # Aceitar o alerta de confirmação
-                alert = self.driver.switch_to.alert
+                alert = self.esperar(
+                    "confirmação de exclusão", EC.alert_is_present(), "alerta"
+                )
                 alert.accept()
-                time.sleep(10)
+                self.esperar("evento excluído", EC.staleness_of(botao_deletar), "salvar")
             except:
                 # Se não encontrar o botão ou não houver alerta, tentar pressionar Enter
                 try:
@@ -620,26 +920,143 @@ class sincronizarExpresso:
                         By.XPATH, "//input[@value='Remover']"
                     )
                     botao_deletar.click()
-                    time.sleep(10)
 
                     # Tentar aceitar alerta, se houver
                     try:
-                        alert = self.driver.switch_to.alert
+                        alert = self.esperar(
+                            "confirmação de exclusão", EC.alert_is_present(), "alerta"
+                        )
                         alert.accept()
                     except:
                         pass
+                    self.esperar(
+                        "evento excluído", EC.staleness_of(botao_deletar), "salvar"
+                    )
                 except:
                     # Se ainda não conseguir, pressionar Enter
-                    self.driver.find_element(By.TAG_NAME, "body").send_keys(Keys.ENTER)
-                    time.sleep(10)
+                    corpo = self.driver.find_element(By.TAG_NAME, "body")
+                    corpo.send_keys(Keys.ENTER)
+                    try:
+                        self.esperar("evento excluído", EC.staleness_of(corpo), "salvar")
+                    except TimeoutException:
+                        print("A página não mudou depois de pressionar Enter")
 
             print(f"Evento deletado no Expresso: {event_id}")
             return True
 
         except Exception as e:
             print(f"Erro ao deletar evento no Expresso: {e}")
+            if not self.http:
+                self._capturar_pagina("erro_deletar")
             raise e
 
+    def queue_create_event(self, event_data, key=None, callback=None):
+        """Enfileira a criação de um evento para o próximo flush_batch"""
+        self.pending_batch.append((key, "create_event", (event_data,), callback))
+
+    def queue_update_event(self, event_id, event_data, key=None, callback=None):
+        """Enfileira a atualização de um evento para o próximo flush_batch"""
+        self.pending_batch.append(
+            (key or event_id, "update_event", (event_id, event_data), callback)
+        )
+
+    def queue_delete_event(self, event_id, event_data=None, key=None, callback=None):
+        """Enfileira a exclusão de um evento para o próximo flush_batch"""
+        self.pending_batch.append(
+            (key or event_id, "delete_event", (event_id, event_data), callback)
+        )
+
+    def flush_batch(self):
+        """
+        Executa as escritas enfileiradas.
+
+        Com tamanho_pool_escrita > 1 as operações são distribuídas entre
+        navegadores logados do pool, até tamanho_pool_escrita ao mesmo tempo;
+        caso contrário rodam em sequência neste navegador. As operações de um
+        mesmo lote devem ser independentes entre si. Os callbacks são chamados
+        na thread de quem chamou flush_batch, como callback(resultado, erro).
+
+        Returns:
+            dict: {chave: {"event": resultado, "error": str}} para cada operação
+        """
+        pending, self.pending_batch = self.pending_batch, []
+        if not pending:
+            return {}
+
+        # A verificação de duplicados usa a leitura do calendário deste navegador,
+        # feita uma vez para o lote inteiro
+        eventos = []
+        if any(metodo == "create_event" for _, metodo, _, _ in pending):
+            eventos = self.obterEventos()
+
+        saidas = [None] * len(pending)
+        tarefas = []
+        for i, (_, metodo, args, _) in enumerate(pending):
+            kwargs = {}
+            if metodo == "create_event":
+                existente = self._evento_existente(args[0], eventos)
+                if existente:
+                    saidas[i] = (existente, None)
+                    continue
+                kwargs["verificar_duplicado"] = False
+            tarefas.append((i, (metodo, args, kwargs)))
+
+        if self.tamanho_pool_escrita > 1 and len(tarefas) > 1:
+            print(
+                f"Executando {len(tarefas)} escritas no Expresso com até "
+                f"{self.tamanho_pool_escrita} navegadores"
+            )
+            resultados = self._pool().executar([tarefa for _, tarefa in tarefas])
+        else:
+            resultados = []
+            for _, (metodo, args, kwargs) in tarefas:
+                try:
+                    resultados.append((getattr(self, metodo)(*args, **kwargs), None))
+                except Exception as e:
+                    resultados.append((None, str(e)))
+
+        for (i, _), saida in zip(tarefas, resultados):
+            saidas[i] = saida
+
+        # Os outros navegadores alteraram o calendário; a leitura deste ficou velha
+        self.invalidar_eventos()
+
+        results = {}
+        for i, ((key, _, _, callback), (resultado, erro)) in enumerate(zip(pending, saidas)):
+            results[key if key is not None else i] = {"event": resultado, "error": erro}
+            if callback:
+                callback(resultado, erro)
+        return results
+
+    def _pool(self):
+        """Cria o pool de navegadores de escrita na primeira vez que é usado"""
+        if self.pool_escrita is None:
+            numeros = count(1)
+
+            def fabrica():
+                # Cada navegador precisa do seu próprio perfil do Chrome
+                perfil = None
+                if self.perfil_chrome:
+                    perfil = f"{self.perfil_chrome}_escrita_{next(numeros)}"
+                return sincronizarExpresso(
+                    self.username,
+                    self.password,
+                    tempos_espera=self.tempos_espera,
+                    usar_http=self.usar_http,
+                    perfil_chrome=perfil,
+                    cache_chromedriver=self.cache_chromedriver,
+                    modo_leve=self.modo_leve,
+                )
+
+            self.pool_escrita = PoolExpresso(fabrica, self.tamanho_pool_escrita)
+        return self.pool_escrita
+
+    def _horario_expresso(self, horario):
+        """Converte o start/end do Google ou do Outlook para o fuso do Expresso"""
+        return expresso_local_datetime(
+            parse_datetime_utc(horario["dateTime"], horario.get("timeZone"))
+        )
+
     def _format_google_to_expresso(self, google_event):
         """Converte um evento do Google Calendar para o formato do Expresso"""
         expresso_event = {}
@@ -655,19 +1072,14 @@ class sincronizarExpresso:
         # Data e hora
         if "start" in google_event:
             if "dateTime" in google_event["start"]:
-                # Evento com horário específico
-                start_dt = datetime.fromisoformat(
-                    google_event["start"]["dateTime"].replace("Z", "+00:00")
-                )
-
-                # Convertendo para o fuso horário local se necessário
-                start_dt = start_dt.astimezone(tz=None)
+                # Evento com horário específico, no fuso em que o Expresso mostra os horários
+                start_dt = self._horario_expresso(google_event["start"])
 
                 # Extraindo data no formato DD/MM/YYYY
                 expresso_event["data"] = start_dt.strftime("%d/%m/%Y")
 
                 # Extraindo hora de início
-                expresso_event["hora_inicio"] = start_dt
+                expresso_event["hora_inicio"] = start_dt.strftime("%H:%M")
             elif "date" in google_event["start"]:
                 # Evento de dia inteiro
                 date_obj = datetime.fromisoformat(google_event["start"]["date"])
@@ -678,11 +1090,8 @@ class sincronizarExpresso:
         # Hora de término
         if "end" in google_event:
             if "dateTime" in google_event["end"]:
-                end_dt = datetime.fromisoformat(
-                    google_event["end"]["dateTime"].replace("Z", "+00:00")
-                )
-                end_dt = end_dt.astimezone(tz=None)
-                expresso_event["hora_fim"] = end_dt
+                end_dt = self._horario_expresso(google_event["end"])
+                expresso_event["hora_fim"] = end_dt.strftime("%H:%M")
             elif "date" in google_event["end"]:
                 # Para eventos de dia inteiro, definir o final do dia
                 expresso_event["hora_fim"] = "23:59"
@@ -721,24 +1130,18 @@ class sincronizarExpresso:
 
         # Data e hora
         if "start" in outlook_event and "dateTime" in outlook_event["start"]:
-            start_dt = datetime.fromisoformat(
-                outlook_event["start"]["dateTime"].replace("Z", "+00:00")
-            )
-            start_dt = start_dt.astimezone(tz=None)
+            start_dt = self._horario_expresso(outlook_event["start"])
 
             # Extraindo data no formato DD/MM/YYYY
             expresso_event["data"] = start_dt.strftime("%d/%m/%Y")
 
             # Extraindo hora de início
-            expresso_event["hora_inicio"] = start_dt
+            expresso_event["hora_inicio"] = start_dt.strftime("%H:%M")
 
         # Hora de término
         if "end" in outlook_event and "dateTime" in outlook_event["end"]:
-            end_dt = datetime.fromisoformat(
-                outlook_event["end"]["dateTime"].replace("Z", "+00:00")
-            )
-            end_dt = end_dt.astimezone(tz=None)
-            expresso_event["hora_fim"] = end_dt
+            end_dt = self._horario_expresso(outlook_event["end"])
+            expresso_event["hora_fim"] = end_dt.strftime("%H:%M")
 
         # Participantes
         if "attendees" in outlook_event:
@@ -1100,10 +1503,6 @@ if __name__ == "__main__":
 
     # Exibir informações dos eventos
     for evento in eventos:
-        # Evitar erro ao imprimir tag_url que é um objeto WebElement
-        tag_url_str = "WebElement encontrado" if evento["tag_url"] else "Não encontrado"
-
-        print("Tag da URL:", tag_url_str)
         print("Id:", evento["id"])
         print("Data:", evento["data"])
         print("Início:", evento["inicio"])